@@ -1,57 +1,100 @@
 from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
-from flask_jwt_extended import JWTManager
 from config import Config
 from dotenv import load_dotenv
-import sqlite3
+from extensions import db, jwt
+from services.sqlite_profile import apply_pragmas, profile_pragmas
 from sqlalchemy import event
-from sqlalchemy.engine import Engine
 
 # Load environment variables
 load_dotenv()
 
-# Initialize app and config
-app = Flask(__name__)
-app.config.from_object(Config)
-app.debug = True
-
-# Initialize extensions
-db = SQLAlchemy(app)
-jwt = JWTManager(app)
-
-# Enable SQLite foreign key constraints
-@event.listens_for(Engine, "connect")
-def enforce_foreign_keys(dbapi_connection, connection_record):
-    if isinstance(dbapi_connection, sqlite3.Connection):
-        cursor = dbapi_connection.cursor()
-        cursor.execute("PRAGMA foreign_keys=ON")
-        cursor.close()
+# Import models so db.metadata knows every table (flask init-db)
+from models.client import Client
+from models.trip import Trip
+from models.invoice import Invoice
+from models.payment import Payment
+from models.client_note import ClientNote
+from models.revenue_rollup import RevenueRollup
+from models.data_version import DataVersion
+from models.audit_event import AuditEvent
+from models.export_job import ExportJob
+from models.analytics_change import AnalyticsChange
+from models.scheduled_run import ScheduledRun
+from auth.models import User
 
-# Import and register Blueprints
+# Blueprints
 from routes.clients import clients_bp
 from routes.trips import trips_bp
 from routes.invoices import invoices_bp
 from routes.payments import payments_bp
 from routes.reports import reports_bp
 from routes.client_notes import notes_bp
+from routes.search import search_bp
+from routes.metrics import metrics_bp
+from routes.audit import audit_bp
+from routes.exports import exports_bp
 from auth.routes import auth_bp
 
-app.register_blueprint(notes_bp)
-app.register_blueprint(clients_bp)
-app.register_blueprint(trips_bp)
-app.register_blueprint(invoices_bp)
-app.register_blueprint(payments_bp)
-app.register_blueprint(reports_bp)
-app.register_blueprint(auth_bp)
+from auth import token_cache
+from services import audit, json_provider, metrics, overdue, read_engine
+from commands import register_commands
+
+
+# ----------------------------
+# 🏭 Application factory
+# ----------------------------
+# Building an app touches neither the database nor the schema: tables are
+# created with `flask init-db` (or `flask upgrade-db` on an existing file).
+# Run with `flask run` (FLASK_APP=app) or e.g. `gunicorn "app:create_app()"`.
+def create_app(config=Config):
+    app = Flask(__name__)
+    app.config.from_object(config)
+    app.json = json_provider.create(app)
+
+    # Initialize extensions (plus the read-only engine for reports and exports)
+    read_engine.configure(app.config)
+    db.init_app(app)
+    jwt.init_app(app)
+    token_cache.init_app(app)
+
+    with app.app_context():
+        # SQLite connection profile: foreign keys, WAL, cache, busy timeout (see config.py)
+        sqlite_pragmas = profile_pragmas(app.config)
+        configure_sqlite(db.engine, sqlite_pragmas)
+        configure_sqlite(db.engines[read_engine.READ_BIND], {**sqlite_pragmas, 'query_only': 'ON'})
+
+    # Per-endpoint latency and SQL instrumentation (served at /metrics)
+    metrics.init_app(app)
+
+    app.register_blueprint(notes_bp)
+    app.register_blueprint(clients_bp)
+    app.register_blueprint(trips_bp)
+    app.register_blueprint(invoices_bp)
+    app.register_blueprint(payments_bp)
+    app.register_blueprint(reports_bp)
+    app.register_blueprint(search_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(audit_bp)
+    app.register_blueprint(exports_bp)
+    app.register_blueprint(auth_bp)
+
+    # Send the READ_ENDPOINTS to the read-only engine
+    read_engine.init_app(app)
+
+    # Background writer for the audit log (started on the first event)
+    audit.init_app(app)
+
+    # Pending -> Overdue sweeps every OVERDUE_SWEEP_INTERVAL seconds (started on the first request)
+    overdue.init_app(app)
+
+    # CLI commands (flask init-db, flask upgrade-db, flask explain-queries, ...)
+    register_commands(app)
+    return app
 
-# Import models for table creation
-from models.client import Client
-from models.trip import Trip
-from models.invoice import Invoice
-from models.payment import Payment
-from models.client_note import ClientNote
-from auth.models import User
 
-# Ensure all tables exist
-with app.app_context():
-    db.create_all()
+def configure_sqlite(engine, pragmas):
+    # Listens on this app's engine only, so apps built with different
+    # profiles (e.g. a benchmark next to the default app) don't mix
+    @event.listens_for(engine, "connect")
+    def configure_sqlite_connection(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, pragmas)
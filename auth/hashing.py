@@ -0,0 +1,95 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore, Lock
+from flask import current_app
+from auth.utils import hash_method, hash_password, verify_password
+
+# Password hashes are computed in a small per-process thread pool. scrypt
+# and pbkdf2 release the GIL, so a burst of logins uses at most HASH_WORKERS
+# cores and leaves request threads free for other traffic. At most
+# HASH_WORKERS + HASH_MAX_PENDING hashes are admitted at once; beyond that
+# callers get HashingBusy, which /login and /register answer with 429.
+TIMING_WEIGHT = 0.2  # EWMA weight of the newest verification time
+
+_pool = {'pid': None, 'executor': None, 'slots': None}
+_lock = Lock()
+_timing = {'verify_seconds': None}
+_methods = {}  # PASSWORD_HASH_METHOD -> method string as stored in hashes
+
+
+class HashingBusy(RuntimeError):
+    pass
+
+
+def executor():
+    if _pool['pid'] != os.getpid():
+        with _lock:
+            if _pool['pid'] != os.getpid():
+                config = current_app.config
+                _pool['executor'] = ThreadPoolExecutor(max_workers=config['HASH_WORKERS'],
+                                                       thread_name_prefix='password-hash')
+                _pool['slots'] = BoundedSemaphore(config['HASH_WORKERS'] + config['HASH_MAX_PENDING'])
+                _pool['pid'] = os.getpid()
+    return _pool['executor'], _pool['slots']
+
+
+def run(fn, *args):
+    pool, slots = executor()
+    if not slots.acquire(blocking=False):
+        raise HashingBusy('Too many logins in progress, try again shortly')
+    try:
+        return pool.submit(fn, *args).result()
+    finally:
+        slots.release()
+
+
+def record_timing(seconds):
+    previous = _timing['verify_seconds']
+    _timing['verify_seconds'] = seconds if previous is None else \
+        (1 - TIMING_WEIGHT) * previous + TIMING_WEIGHT * seconds
+
+
+# ----------------------------
+# 🔐 Hash and verify
+# ----------------------------
+def hash_new(password):
+    return run(hash_password, password, current_app.config['PASSWORD_HASH_METHOD'])
+
+
+def verify(password, password_hash):
+    # password_hash=None (unknown username): takes as long as a real check,
+    # from the running average, but sleeps instead of hashing
+    started = time.perf_counter()
+    if password_hash is not None:
+        valid = run(verify_password, password, password_hash)
+        record_timing(time.perf_counter() - started)
+        return valid
+
+    if _timing['verify_seconds'] is None:
+        current_method()  # hashes once, which also gives the first timing
+        return False
+    _, slots = executor()
+    if not slots.acquire(blocking=False):
+        raise HashingBusy('Too many logins in progress, try again shortly')
+    try:
+        time.sleep(_timing['verify_seconds'])
+    finally:
+        slots.release()
+    return False
+
+
+def current_method():
+    # Normalized PASSWORD_HASH_METHOD ('scrypt' -> 'scrypt:32768:8:1'),
+    # taken from one real hash per process
+    method = current_app.config['PASSWORD_HASH_METHOD']
+    if method not in _methods:
+        started = time.perf_counter()
+        _methods[method] = hash_method(run(hash_password, '', method))
+        if _timing['verify_seconds'] is None:
+            record_timing(time.perf_counter() - started)
+    return _methods[method]
+
+
+def needs_rehash(password_hash):
+    return hash_method(password_hash) != current_method()
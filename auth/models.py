@@ -1,6 +1,6 @@
 # auth/models.py
 
-from app import db
+from extensions import db
 from werkzeug.security import generate_password_hash, check_password_hash
 
 class User(db.Model):
@@ -1,14 +1,61 @@
-from flask_jwt_extended import verify_jwt_in_request, get_jwt
+from flask_jwt_extended import verify_jwt_in_request
 from functools import wraps
-from flask import jsonify
+from flask import current_app, g, jsonify, request
+
+# One verification per request: the token's signature is checked on first
+# sight only, later requests with the same token reuse the decoded claims
+# from the app's TokenCache (auth/token_cache.py). Either way the result is
+# stored where flask_jwt_extended keeps it, so get_jwt() and
+# get_jwt_identity() work as after @jwt_required().
+
+
+def bearer_token():
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    return token if scheme == 'Bearer' and token else None
+
+
+def authenticate():
+    # Returns the claims; raises flask_jwt_extended's errors (401/422) like
+    # verify_jwt_in_request() for a missing, invalid or expired token
+    claims = g.get('_jwt_extended_jwt')
+    if claims:
+        return claims
+
+    cache = current_app.extensions['token_cache']
+    token = bearer_token()
+    cached = cache.get(token) if token else None
+    if cached:
+        header, claims = cached
+        g._jwt_extended_jwt_user = None
+        g._jwt_extended_jwt_header = header
+        g._jwt_extended_jwt = claims
+        g._jwt_extended_jwt_location = 'headers'
+        return claims
+
+    verified = verify_jwt_in_request()
+    if verified is None:  # JWT_EXEMPT_METHODS, e.g. OPTIONS
+        return {}
+    header, claims = verified
+    if token:
+        cache.put(token, header, claims)
+    return claims
+
+
+def login_required():
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            authenticate()
+            return fn(*args, **kwargs)
+        return decorator
+    return wrapper
+
 
 def role_required(*allowed_roles):
     def wrapper(fn):
         @wraps(fn)
         def decorator(*args, **kwargs):
-            verify_jwt_in_request()
-            claims = get_jwt()
-            user_role = claims.get("role")
+            user_role = authenticate().get("role")
 
             if user_role not in allowed_roles:
                 return jsonify({"message": "Forbidden: insufficient permissions"}), 403
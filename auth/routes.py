@@ -1,9 +1,12 @@
 from flask import Blueprint, request, jsonify
-from app import db
+from extensions import db
 from auth.models import User
-from auth.utils import hash_password, verify_password
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, get_jwt
+from auth import hashing
+from auth.hashing import HashingBusy
+from flask_jwt_extended import create_access_token, get_jwt_identity, get_jwt
+from auth.permissions import login_required
 from config import VALID_ROLES
+from services import audit
 
 
 auth_bp = Blueprint('auth', __name__)
@@ -38,10 +41,16 @@ def register():
         return jsonify({'error': 'Username already exists'}), 409
 
     user = User(username=username, role=role)
-    user.password_hash = hash_password(password)
+    try:
+        user.password_hash = hashing.hash_new(password)
+    except HashingBusy as e:
+        return jsonify({'error': str(e)}), 429, {'Retry-After': '1'}
 
     db.session.add(user)
+    db.session.flush()
+    user_id = user.id
     db.session.commit()
+    audit.record('register', 'user', user_id, {'username': username, 'role': role})
 
     return jsonify({'message': 'User registered successfully'}), 201
 
@@ -62,12 +71,25 @@ def login():
 
     user = User.query.filter_by(username=username).first()
 
-    if not user or not verify_password(password, user.password_hash):
+    try:
+        valid = hashing.verify(password, user.password_hash if user else None)
+    except HashingBusy as e:
+        return jsonify({'error': str(e)}), 429, {'Retry-After': '1'}
+    if not valid:
         return jsonify({'error': 'Invalid username or password'}), 401
 
+    # Hashes made with older PASSWORD_HASH_METHOD parameters are upgraded
+    # while the plain password is at hand
+    try:
+        if hashing.needs_rehash(user.password_hash):
+            user.password_hash = hashing.hash_new(password)
+            db.session.commit()
+    except HashingBusy:
+        pass  # upgraded on a later login
+
     token = create_access_token(
         identity=str(user.id),
-        additional_claims={"role": user.role}
+        additional_claims={"role": user.role, "username": user.username}
     )
 
     return jsonify({'access_token': token}), 200
@@ -76,10 +98,21 @@ def login():
 # Current User Info
 # ---------------------
 @auth_bp.route('/me', methods=['GET'])
-@jwt_required()
+@login_required()
 def me():
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    # Answered from the token; only tokens issued before the username claim
+    # was added need the user row
+    claims = get_jwt()
+    if 'username' in claims:
+        return jsonify({
+            'user_id': int(get_jwt_identity()),
+            'username': claims['username'],
+            'role': claims['role']
+        })
+
+    user = db.session.get(User, int(get_jwt_identity()))
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
 
     return jsonify({
         'user_id': user.id,
@@ -88,7 +121,7 @@ def me():
     })
 
 @auth_bp.route('/users', methods=['GET'])
-@jwt_required()
+@login_required()
 def get_all_users():
 
     claims = get_jwt()
@@ -0,0 +1,46 @@
+import hashlib
+import time
+from collections import OrderedDict
+from threading import Lock
+
+
+class TokenCache:
+    # Header and claims of recently verified access tokens, keyed by the
+    # SHA-256 of the token. LRU-bounded; an entry lives AUTH_TOKEN_CACHE_TTL
+    # seconds at most and never past the token's own exp.
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()  # digest -> (expires_at, header, claims)
+        self.lock = Lock()
+
+    def get(self, token):
+        key = hashlib.sha256(token.encode()).digest()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[1], entry[2]
+
+    def put(self, token, header, claims):
+        if self.max_entries <= 0:
+            return
+        key = hashlib.sha256(token.encode()).digest()
+        expires_at = min(time.time() + self.ttl, claims.get('exp', float('inf')))
+        with self.lock:
+            self.entries[key] = (expires_at, header, claims)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+def init_app(app):
+    app.extensions['token_cache'] = TokenCache(app.config['AUTH_TOKEN_CACHE_SIZE'], app.config['AUTH_TOKEN_CACHE_TTL'])
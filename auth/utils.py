@@ -1,7 +1,11 @@
 from werkzeug.security import generate_password_hash, check_password_hash
 
-def hash_password(password):
-    return generate_password_hash(password)
+def hash_password(password, method='scrypt'):
+    return generate_password_hash(password, method=method)
 
 def verify_password(password, password_hash):
     return check_password_hash(password_hash, password)
+
+def hash_method(password_hash):
+    # 'scrypt:32768:8:1$salt$hash' -> 'scrypt:32768:8:1'
+    return password_hash.split('$', 1)[0]
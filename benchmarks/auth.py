@@ -0,0 +1,96 @@
+"""Per-request cost of authenticating a bearer token.
+
+Times, inside a test request context, the token handling a protected view
+used to do (@jwt_required() plus role_required verifying the token again),
+one verification, and auth.permissions.authenticate() with a warm token
+cache. It also times GET /me end to end with the cache on and off.
+
+    python benchmarks/auth.py --iterations 20000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def per_call_us(app, headers, step, iterations):
+    from flask import g
+
+    timings = []
+    for _ in range(5):
+        with app.test_request_context('/me', headers=headers):
+            started = time.perf_counter()
+            for _ in range(iterations):
+                for name in [name for name in vars(g) if name.startswith('_jwt_extended')]:
+                    delattr(g, name)  # a fresh request each time
+                step()
+            timings.append((time.perf_counter() - started) / iterations * 1e6)
+    return round(statistics.median(timings), 2)
+
+
+def request_us(client, headers, iterations):
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        client.get('/me', headers=headers)
+        timings.append((time.perf_counter() - started) * 1e6)
+    return round(statistics.median(timings), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20000, help='token checks per timing run')
+    parser.add_argument('--requests', type=int, default=2000, help='GET /me requests per cache setting')
+    args = parser.parse_args()
+
+    # The default JWT_SECRET_KEY trips PyJWT's key length warning on every decode
+    warnings.filterwarnings('ignore', message='The HMAC key')
+    from flask_jwt_extended import create_access_token, get_jwt, verify_jwt_in_request
+    from app import create_app
+    from auth.permissions import authenticate
+
+    app = create_app()
+    with app.app_context():
+        token = create_access_token(identity='1', additional_claims={'role': 'admin', 'username': 'bench'})
+    headers = {'Authorization': f'Bearer {token}'}
+
+    def double_verification():
+        verify_jwt_in_request()  # @jwt_required()
+        verify_jwt_in_request()  # role_required
+        get_jwt()
+
+    def single_verification():
+        verify_jwt_in_request()
+        get_jwt()
+
+    results = {
+        'per_check_us': {
+            'double_verification': per_call_us(app, headers, double_verification, args.iterations),
+            'single_verification': per_call_us(app, headers, single_verification, args.iterations),
+            'cached': per_call_us(app, headers, authenticate, args.iterations),
+        },
+        'get_me_us': {},
+    }
+
+    client = app.test_client()
+    cache = app.extensions['token_cache']
+    for name, size in (('cache_off', 0), ('cache_on', app.config['AUTH_TOKEN_CACHE_SIZE'])):
+        cache.clear()
+        cache.max_entries = size
+        request_us(client, headers, 50)  # warm-up
+        results['get_me_us'][name] = request_us(client, headers, args.requests)
+
+    for section, values in results.items():
+        for name, value in values.items():
+            print(f'{section:<14} {name:<22} {value:>9.2f} us', file=sys.stderr)
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+"""Fill a CRM database with a deterministic synthetic dataset.
+
+The same --seed and volumes always produce the same rows (ids, names, dates,
+amounts), so benchmark results from different commits are comparable. Rows are
+inserted through the models' tables in batches; the revenue rollup and search
+index are rebuilt once at the end instead of per row.
+
+    python benchmarks/generate_data.py --reset --clients 1000000 \\
+        --trips 5000000 --invoices 5000000 --payments 5000000 --notes 1000000
+
+Writes to crm.db unless DATABASE_URL is set (sqlite:///path/to/file.db).
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config  # noqa: E402
+
+BASE_DATE = date(2022, 1, 1)  # fixed, so the data does not depend on the day it was generated
+SPAN_DAYS = 4 * 365
+
+FIRST_NAMES = ['Anna', 'Erik', 'Sofia', 'Lars', 'Maja', 'Omar', 'Elin', 'Jonas', 'Aisha', 'Nils',
+               'Emma', 'Karl', 'Sara', 'Ali', 'Ida', 'Oskar', 'Lea', 'Hugo', 'Nora', 'Axel']
+LAST_NAMES = ['Andersson', 'Johansson', 'Karlsson', 'Nilsson', 'Eriksson', 'Larsson', 'Olsson',
+              'Persson', 'Svensson', 'Gustafsson', 'Smith', 'Garcia', 'Khan', 'Novak', 'Rossi']
+COMPANIES = ['Acme', 'Globex', 'Initech', 'Umbrella', 'Stark Travel', 'Wayne Tours', 'Nordic Trips',
+             'Blue Sky', 'Fjord Events', 'Polar Holidays', None]
+DESTINATIONS = ['Paris', 'Rome', 'Barcelona', 'Tokyo', 'New York', 'Bangkok', 'Reykjavik', 'Cape Town',
+                'Lisbon', 'Istanbul', 'Bali', 'Dubai', 'Sydney', 'Prague', 'Marrakech', 'Lima']
+TRIP_NOTES = ['Window seat', 'Vegetarian meals', 'Travel insurance included', 'Airport transfer',
+              'Honeymoon package', 'Business class upgrade', 'Late check-out', None, None]
+NOTE_TEXTS = ['Prefers email contact', 'Asked about group discounts', 'Follow up next quarter',
+              'Interested in beach destinations', 'Complained about delayed refund', 'VIP customer',
+              'Needs visa assistance', 'Pays by invoice only']
+PAYMENT_METHODS = ['Credit Card', 'Bank Transfer', 'Cash', 'PayPal', 'Swish']
+INVOICE_STATUSES = ['Paid'] * 6 + ['Pending'] * 3 + ['Overdue']
+
+
+def day(rng):
+    return BASE_DATE + timedelta(days=rng.randrange(SPAN_DAYS))
+
+
+# ----------------------------
+# 🧪 Row generators (one RNG per table, so changing one volume keeps the others stable)
+# ----------------------------
+def client_rows(rng, count):
+    for i in range(1, count + 1):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        yield {
+            'id': i,
+            'name': f'{first} {last}',
+            'email': f'{first.lower()}.{last.lower()}.{i}@example.com',
+            'phone': f'+46 7{rng.randrange(10)} {rng.randrange(1000000, 9999999)}',
+            'company': rng.choice(COMPANIES),
+        }
+
+
+def trip_rows(rng, count, clients):
+    for i in range(1, count + 1):
+        start = day(rng)
+        yield {
+            'id': i,
+            'client_id': rng.randint(1, clients),
+            'destination': rng.choice(DESTINATIONS),
+            'start_date': start,
+            'end_date': start + timedelta(days=rng.randint(2, 21)),
+            'price': round(rng.uniform(300, 8000), 2),
+            'notes': rng.choice(TRIP_NOTES),
+        }
+
+
+def invoice_rows(rng, count, trips):
+    for i in range(1, count + 1):
+        issued = day(rng)
+        yield {
+            'id': i,
+            'trip_id': rng.randint(1, trips),
+            'issue_date': issued,
+            'due_date': issued + timedelta(days=rng.choice([14, 30, 60])),
+            'amount': round(rng.uniform(300, 8000), 2),
+            'status': rng.choice(INVOICE_STATUSES),
+        }
+
+
+def payment_rows(rng, count, invoices):
+    for i in range(1, count + 1):
+        yield {
+            'id': i,
+            'invoice_id': rng.randint(1, invoices),
+            'payment_date': day(rng),
+            'amount': round(rng.uniform(50, 4000), 2),
+            'payment_method': rng.choice(PAYMENT_METHODS),
+        }
+
+
+def note_rows(rng, count, clients):
+    for i in range(1, count + 1):
+        created = datetime.combine(day(rng), datetime.min.time()) + timedelta(seconds=rng.randrange(86400))
+        yield {
+            'id': i,
+            'client_id': rng.randint(1, clients),
+            'note': rng.choice(NOTE_TEXTS),
+            'timestamp': created,
+        }
+
+
+# ----------------------------
+# 💾 Loading
+# ----------------------------
+def database_path():
+    uri = Config.SQLALCHEMY_DATABASE_URI
+    if not uri.startswith('sqlite:///'):
+        sys.exit(f'Only SQLite databases are supported, got {uri}')
+    return uri[len('sqlite:///'):]
+
+
+def load(db, model, rows, batch_size):
+    from sqlalchemy import insert
+    from services.bulk_import import chunked
+
+    started = time.perf_counter()
+    total = 0
+    for batch in chunked(rows, batch_size):
+        db.session.execute(insert(model), batch)
+        db.session.commit()
+        total += len(batch)
+    elapsed = time.perf_counter() - started
+    print(f'{model.__tablename__:<12} {total:>10} rows  {elapsed:7.1f}s  ({total / max(elapsed, 1e-9):,.0f} rows/s)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=10000)
+    parser.add_argument('--trips', type=int, default=50000)
+    parser.add_argument('--invoices', type=int, default=50000)
+    parser.add_argument('--payments', type=int, default=50000)
+    parser.add_argument('--notes', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch-size', type=int, default=10000, help='rows per INSERT batch / commit')
+    parser.add_argument('--reset', action='store_true', help='delete the database file first')
+    args = parser.parse_args()
+
+    if args.clients < 1 or (args.invoices and not args.trips) or (args.payments and not args.invoices):
+        parser.error('trips need clients, invoices need trips and payments need invoices')
+
+    path = database_path()
+    if args.reset:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+    from app import create_app
+    from extensions import db
+    from models.client import Client
+    from models.client_note import ClientNote
+    from models.trip import Trip
+    from models.invoice import Invoice
+    from models.payment import Payment
+    from services import invoice_balance, report_cache, revenue_rollup, search_index
+    from services.schema import create_schema
+
+    def rng(table):
+        return random.Random(f'{args.seed}-{table}')
+
+    app = create_app()
+    with app.app_context():
+        create_schema()  # tables and the FTS index on the target file
+        if db.session.query(Client.id).first() is not None:
+            sys.exit(f'{path} already has data; rerun with --reset to replace it')
+
+        print(f'Generating into {path} (seed {args.seed})')
+        load(db, Client, client_rows(rng('client'), args.clients), args.batch_size)
+        load(db, Trip, trip_rows(rng('trip'), args.trips, args.clients), args.batch_size)
+        load(db, Invoice, invoice_rows(rng('invoice'), args.invoices, args.trips), args.batch_size)
+        load(db, Payment, payment_rows(rng('payment'), args.payments, args.invoices), args.batch_size)
+        load(db, ClientNote, note_rows(rng('note'), args.notes, args.clients), args.batch_size)
+
+        started = time.perf_counter()
+        invoice_balance.recompute(update_status=False)  # keep the generated status mix
+        rollup_rows = revenue_rollup.rebuild()
+        indexed = search_index.rebuild() if search_index.is_available() else 0
+        report_cache.invalidate()
+        db.session.commit()
+        db.session.execute(db.text('ANALYZE'))
+        db.session.commit()
+        print(f'derived      balances, rollup {rollup_rows} rows, search index {indexed} rows  '
+              f'{time.perf_counter() - started:7.1f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,440 @@
+"""Latency, throughput, SQL query count and peak RSS for every API endpoint.
+
+Each endpoint runs in its own fresh worker process (so peak RSS is per
+endpoint) through Flask's test client, against a scratch copy of the database
+so write endpoints never change the generated dataset. Results are written as
+JSON; pass --compare to check them against an earlier run.
+
+    python benchmarks/generate_data.py --reset
+    python benchmarks/run_endpoints.py --requests 200 --output bench-new.json
+    python benchmarks/run_endpoints.py --output bench-new.json --compare bench-old.json
+
+Reads crm.db unless --database or DATABASE_URL is given.
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config  # noqa: E402
+
+BENCH_USER = {'username': 'bench-admin', 'password': 'bench-password', 'role': 'admin'}
+BULK_ROWS = 100
+TABLES = ('client', 'trip', 'invoice', 'payment', 'client_note', 'user')
+
+
+# ----------------------------
+# 📋 Endpoint cases
+# ----------------------------
+# path placeholders: {client} {trip} {invoice} {payment} {note} are random
+# existing ids, {new} is whatever the (untimed) setup step created.
+def case(method, path, body=None, setup=None, status=200, heavy=False, name=None, auth=True):
+    return {
+        'name': name or f'{method} {path}',
+        'method': method,
+        'path': path,
+        'body': body,
+        'setup': setup,
+        'status': status,
+        'heavy': heavy,  # runs --heavy-requests times (full exports / streams)
+        'auth': auth,
+    }
+
+
+def unique():
+    return uuid.uuid4().hex[:12]
+
+
+def client_body(ids):
+    return {'name': 'Bench Client', 'email': f'bench-{unique()}@example.com', 'phone': '+46 70 1234567',
+            'company': 'Bench AB'}
+
+
+def trip_body(ids):
+    return {'client_id': ids['client'], 'destination': 'Lisbon', 'start_date': '2025-05-01',
+            'end_date': '2025-05-08', 'price': 1450.0, 'notes': 'Benchmark trip'}
+
+
+def invoice_body(ids):
+    return {'trip_id': ids['trip'], 'issue_date': '2025-04-01', 'due_date': '2025-05-01', 'amount': 1450.0}
+
+
+def payment_body(ids):
+    return {'invoice_id': ids['invoice'], 'payment_date': '2025-04-15', 'amount': 700.0,
+            'payment_method': 'Credit Card'}
+
+
+def bulk(make_body):
+    return lambda ids: [make_body(ids) for _ in range(BULK_ROWS)]
+
+
+CASES = [
+    # auth
+    case('GET', '/roles', auth=False),
+    case('POST', '/login', body=lambda ids: {k: BENCH_USER[k] for k in ('username', 'password')}, auth=False),
+    case('POST', '/register', body=lambda ids: {'username': f'bench-{unique()}', 'password': 'pw', 'role': 'agent'},
+         status=201, auth=False),
+    case('GET', '/me'),
+    case('GET', '/users'),
+    case('GET', '/audit'),
+
+    # clients
+    case('GET', '/clients'),
+    case('GET', '/clients?name=smith', name='GET /clients?name (search index)'),
+    case('GET', '/clients?stream=true', heavy=True),
+    case('GET', '/clients/{client}'),
+    case('GET', '/clients/{client}/details'),
+    case('GET', '/clients/{client}/details/export'),
+    case('GET', '/clients/export', heavy=True),
+    case('GET', '/clients/export?gzip=true', heavy=True),
+    case('POST', '/clients', body=client_body, status=201),
+    case('POST', '/clients/bulk', body=bulk(client_body)),
+    case('PATCH', '/clients/{client}', body=lambda ids: {'phone': '+46 70 7654321'}),
+    case('DELETE', '/clients/{new}', setup='new_client'),
+
+    # notes
+    case('GET', '/clients/{client}/notes'),
+    case('POST', '/clients/{client}/notes', body=lambda ids: {'note': 'Benchmark note'}, status=201),
+    case('PATCH', '/clients/{client}/notes/{note}', body=lambda ids: {'note': 'Edited note'}, setup='existing_note'),
+    case('DELETE', '/clients/{client}/notes/{new}', setup='new_note'),
+
+    # trips
+    case('GET', '/trips'),
+    case('GET', '/trips?destination=paris', name='GET /trips?destination (search index)'),
+    case('GET', '/trips?client_id={client}'),
+    case('GET', '/trips?start_date=2025-01-01'),
+    case('GET', '/trips?stream=true', heavy=True),
+    case('POST', '/trips', body=trip_body, status=201),
+    case('POST', '/trips/bulk', body=bulk(trip_body)),
+    case('PATCH', '/trips/{trip}', body=lambda ids: {'price': 1999.0}),
+    case('DELETE', '/trips/{new}', setup='new_trip'),
+
+    # invoices
+    case('GET', '/invoices/{trip}'),
+    case('GET', '/invoice/{invoice}'),
+    case('POST', '/invoices', body=invoice_body, status=201),
+    case('POST', '/invoices/bulk', body=bulk(invoice_body)),
+    case('PATCH', '/invoices/{invoice}', body=lambda ids: {'amount': 1500.0}),
+    case('DELETE', '/invoices/{new}', setup='new_invoice'),
+
+    # payments
+    case('GET', '/payments/{invoice}'),
+    case('GET', '/payment/{payment}'),
+    case('POST', '/payments', body=payment_body, status=201),
+    case('POST', '/payments/bulk', body=bulk(payment_body)),
+    case('PATCH', '/payments/{payment}', body=lambda ids: {'amount': 750.0}),
+    case('DELETE', '/payments/{new}', setup='new_payment'),
+
+    # search
+    case('GET', '/search?q=smith'),
+    case('GET', '/search?q=beach&type=note'),
+
+    # reports: warm (served from the report cache) and cold (cache invalidated before each request)
+    case('GET', '/reports/unpaid-invoices'),
+    case('GET', '/reports/monthly-revenue'),
+    case('GET', '/reports/monthly-revenue?year=2024'),
+    case('GET', '/reports/revenue-by-client'),
+    case('GET', '/reports/invoice-summary'),
+    case('GET', '/reports/invoice-summary?include_ids=false'),
+    case('GET', '/reports/ar-aging'),
+    case('GET', '/reports/pivot?rows=destination&columns=quarter'),
+    case('GET', '/reports/pivot?rows=cohort&columns=payment_method&agg=mean&year=2024',
+         name='GET /reports/pivot?rows=cohort&columns=payment_method&agg=mean'),
+    case('GET', '/reports/unpaid-invoices', setup='cold_reports', name='GET /reports/unpaid-invoices (cold)'),
+    case('GET', '/reports/monthly-revenue', setup='cold_reports', name='GET /reports/monthly-revenue (cold)'),
+    case('GET', '/reports/revenue-by-client', setup='cold_reports', name='GET /reports/revenue-by-client (cold)'),
+    case('GET', '/reports/invoice-summary', setup='cold_reports', name='GET /reports/invoice-summary (cold)'),
+    case('GET', '/reports/ar-aging', setup='cold_reports', name='GET /reports/ar-aging (cold)'),
+    case('GET', '/reports/pivot?rows=destination&columns=quarter', setup='cold_reports',
+         name='GET /reports/pivot?rows=destination&columns=quarter (cold)'),
+    case('GET', '/reports/unpaid-invoices/export'),
+    case('GET', '/reports/monthly-revenue/export'),
+    case('GET', '/reports/revenue-by-client/export'),
+    case('GET', '/reports/invoice-summary/export'),
+    case('GET', '/reports/ar-aging/export'),
+    case('GET', '/reports/pivot/export?rows=destination&columns=quarter'),
+    case('GET', '/reports/monthly-revenue/chart'),
+    case('GET', '/reports/revenue-by-client/chart?format=svg'),
+    case('GET', '/reports/monthly-revenue/chart', setup='cold_reports', name='GET /reports/monthly-revenue/chart (cold)'),
+]
+
+
+# ----------------------------
+# 🧱 Untimed setup steps (run in the worker, before each timed request)
+# ----------------------------
+def setup_step(name, ids):
+    from extensions import db
+    from models.client import Client
+    from models.client_note import ClientNote
+    from models.trip import Trip
+    from models.invoice import Invoice
+    from models.payment import Payment
+    from services import report_cache
+
+    if name == 'cold_reports':
+        report_cache.invalidate()
+        db.session.commit()
+        return {}
+    if name == 'existing_note':
+        note = db.session.get(ClientNote, ids['note'])
+        return {'client': note.client_id, 'note': note.id}
+
+    entity = {
+        'new_client': lambda: Client(name='Doomed', email=f'doomed-{unique()}@example.com'),
+        'new_note': lambda: ClientNote(client_id=ids['client'], note='Doomed note'),
+        'new_trip': lambda: Trip(client_id=ids['client'], destination='Nowhere', start_date=date_of('2025-01-01'),
+                                 end_date=date_of('2025-01-02'), price=1.0),
+        'new_invoice': lambda: Invoice(trip_id=ids['trip'], issue_date=date_of('2025-01-01'),
+                                       due_date=date_of('2025-02-01'), amount=1.0),
+        'new_payment': lambda: Payment(invoice_id=ids['invoice'], payment_date=date_of('2025-01-15'), amount=1.0,
+                                       payment_method='Cash'),
+    }[name]()
+    db.session.add(entity)
+    db.session.commit()
+    return {'new': entity.id}
+
+
+def date_of(value):
+    from datetime import date
+    return date.fromisoformat(value)
+
+
+# ----------------------------
+# ⏱️ Worker: one process per endpoint
+# ----------------------------
+def percentile(sorted_values, fraction):
+    # nearest-rank
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def login(client):
+    credentials = {k: BENCH_USER[k] for k in ('username', 'password')}
+    response = client.post('/login', json=credentials)
+    if response.status_code == 401:
+        client.post('/register', json=BENCH_USER)
+        response = client.post('/login', json=credentials)
+    return {'Authorization': 'Bearer ' + response.get_json()['access_token']}
+
+
+def run_case(index, requests, warmup, seed):
+    import random
+
+    spec = CASES[index]
+    # The default JWT_SECRET_KEY trips PyJWT's key length warning on every request
+    warnings.filterwarnings('ignore', message='The HMAC key')
+    # Route handlers print() on writes; keep the worker's stdout clean
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        from sqlalchemy import event, func
+        from app import create_app
+        from extensions import db
+        from models.client import Client
+        from models.client_note import ClientNote
+        from models.trip import Trip
+        from models.invoice import Invoice
+        from models.payment import Payment
+        from services.schema import create_schema
+
+        app = create_app()
+        statements = [0]
+
+        def count_statement(*args):
+            statements[0] += 1
+
+        with app.app_context():
+            create_schema()  # the dataset may predate newer tables and indexes
+            for engine in db.engines.values():
+                event.listen(engine, 'before_cursor_execute', count_statement)
+            max_ids = {
+                name: db.session.query(func.max(model.id)).scalar() or 1
+                for name, model in [('client', Client), ('trip', Trip), ('invoice', Invoice),
+                                    ('payment', Payment), ('note', ClientNote)]
+            }
+            db.session.remove()
+
+        client = app.test_client()
+        headers = login(client)  # also registers the benchmark user on first use
+        if not spec['auth']:
+            headers = {}
+        rng = random.Random(f'{seed}-{spec["name"]}')
+        rss_baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        latencies, queries, status_counts = [], [], {}
+        for i in range(warmup + requests):
+            ids = {name: rng.randint(1, top) for name, top in max_ids.items()}
+            if spec['setup']:
+                with app.app_context():
+                    ids.update(setup_step(spec['setup'], ids))
+                    db.session.remove()
+            body = spec['body'](ids) if spec['body'] else None
+
+            statements[0] = 0
+            started = time.perf_counter()
+            response = client.open(spec['path'].format(**ids), method=spec['method'], json=body, headers=headers)
+            response.get_data()  # drain streamed bodies inside the timed window
+            elapsed = time.perf_counter() - started
+            response.close()
+
+            if i < warmup:
+                continue
+            latencies.append(elapsed * 1000)
+            queries.append(statements[0])
+            status_counts[str(response.status_code)] = status_counts.get(str(response.status_code), 0) + 1
+
+        from services import charts
+        charts.shutdown()
+
+    latencies.sort()
+    return {
+        'name': spec['name'],
+        'method': spec['method'],
+        'path': spec['path'],
+        'requests': len(latencies),
+        'status_counts': status_counts,
+        'unexpected_status': sum(n for code, n in status_counts.items() if int(code) != spec['status']),
+        'latency_ms': {
+            'p50': round(percentile(latencies, 0.50), 3),
+            'p95': round(percentile(latencies, 0.95), 3),
+            'p99': round(percentile(latencies, 0.99), 3),
+            'mean': round(sum(latencies) / len(latencies), 3),
+            'max': round(latencies[-1], 3),
+        },
+        'throughput_rps': round(len(latencies) / (sum(latencies) / 1000), 1),
+        'sql_queries': {'mean': round(sum(queries) / len(queries), 2), 'max': max(queries)},
+        'rss_baseline_kb': rss_baseline,
+        'rss_peak_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+# ----------------------------
+# 📦 Driver
+# ----------------------------
+def database_path(args):
+    uri = 'sqlite:///' + os.path.abspath(args.database) if args.database else Config.SQLALCHEMY_DATABASE_URI
+    if not uri.startswith('sqlite:///'):
+        sys.exit(f'Only SQLite databases are supported, got {uri}')
+    return uri[len('sqlite:///'):]
+
+
+def copy_database(source, target):
+    # The backup API gives a consistent copy even with a live WAL file
+    src, dst = sqlite3.connect(source), sqlite3.connect(target)
+    with dst:
+        src.backup(dst)
+    counts = {table: dst.execute(f'SELECT count(*) FROM "{table}"').fetchone()[0] for table in TABLES}
+    src.close()
+    dst.close()
+    return counts
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path) as f:
+        baseline = {entry['name']: entry for entry in json.load(f)['endpoints']}
+
+    regressions = []
+    print(f"{'endpoint':<50} {'p95 old':>9} {'p95 new':>9} {'ratio':>7} {'sql old':>8} {'sql new':>8}", file=sys.stderr)
+    for entry in results['endpoints']:
+        old = baseline.get(entry['name'])
+        if not old:
+            continue
+        ratio = entry['latency_ms']['p95'] / max(old['latency_ms']['p95'], 1e-9)
+        more_sql = entry['sql_queries']['max'] > old['sql_queries']['max']
+        flag = ' <-' if ratio > threshold or more_sql else ''
+        if flag:
+            regressions.append(entry['name'])
+        print(f"{entry['name']:<50} {old['latency_ms']['p95']:>9} {entry['latency_ms']['p95']:>9} "
+              f"{ratio:>7.2f} {old['sql_queries']['max']:>8} {entry['sql_queries']['max']:>8}{flag}", file=sys.stderr)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', help='SQLite file to benchmark (default: DATABASE_URL or crm.db)')
+    parser.add_argument('--requests', type=int, default=100, help='timed requests per endpoint')
+    parser.add_argument('--heavy-requests', type=int, default=3, help='timed requests for full exports/streams')
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--only', help='run endpoints whose name contains this substring')
+    parser.add_argument('--output', help='write JSON results here (default: stdout)')
+    parser.add_argument('--compare', help='earlier results JSON to compare p95 latency and SQL counts against')
+    parser.add_argument('--threshold', type=float, default=1.2, help='p95 ratio that counts as a regression')
+    args = parser.parse_args()
+
+    source = database_path(args)
+    if not os.path.exists(source):
+        sys.exit(f'{source} does not exist; run benchmarks/generate_data.py first')
+
+    workdir = tempfile.mkdtemp(prefix='crm-bench-')
+    scratch = os.path.join(workdir, 'bench.db')
+    rows = copy_database(source, scratch)
+    os.environ['DATABASE_URL'] = 'sqlite:///' + scratch  # inherited by the spawned workers
+
+    selected = [i for i, spec in enumerate(CASES) if not args.only or args.only in spec['name']]
+    endpoints = []
+    try:
+        for index in selected:
+            requests = args.heavy_requests if CASES[index]['heavy'] else args.requests
+            warmup = min(args.warmup, requests)
+            # A fresh process per endpoint keeps ru_maxrss (peak RSS) attributable to it
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+                result = pool.submit(run_case, index, requests, warmup, args.seed).result()
+            endpoints.append(result)
+            print(f"{result['name']:<50} p50 {result['latency_ms']['p50']:>9.2f} ms  "
+                  f"p95 {result['latency_ms']['p95']:>9.2f} ms  sql {result['sql_queries']['max']:>3}",
+                  file=sys.stderr)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'database': source,
+            'rows': rows,
+            'requests': args.requests,
+            'heavy_requests': args.heavy_requests,
+            'warmup': args.warmup,
+            'seed': args.seed,
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'sqlite_profile': Config.SQLITE_PROFILE,
+        },
+        'endpoints': endpoints,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            sys.exit(f'{len(regressions)} endpoint(s) regressed: {", ".join(regressions)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""Rows per second of the ORM and Core (services/rows.py) list paths.
+
+For each resource, fetches --rows rows and encodes them to a JSON body three
+ways: ORM objects with hand-built dicts and Flask's JSON provider (the old
+path), Core rows with the precompiled RowSerializer and Flask's provider,
+and Core rows with the orjson provider.
+
+    python benchmarks/serialization.py --rows 10000 --repeat 5
+
+Reads crm.db unless --database or DATABASE_URL is given.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def orm_trip(trip):
+    return {'id': trip.id, 'destination': trip.destination, 'start_date': str(trip.start_date),
+            'end_date': str(trip.end_date), 'price': trip.price, 'notes': trip.notes, 'client_id': trip.client_id}
+
+
+def orm_invoice(inv):
+    return {'id': inv.id, 'issue_date': str(inv.issue_date), 'due_date': str(inv.due_date), 'amount': inv.amount,
+            'paid_amount': inv.paid_amount, 'balance_due': inv.balance_due, 'status': inv.status}
+
+
+def orm_unpaid_invoice(inv):
+    return {'invoice_id': inv.id, 'trip_id': inv.trip_id, 'issue_date': str(inv.issue_date),
+            'due_date': str(inv.due_date), 'amount': inv.amount, 'paid_amount': inv.paid_amount,
+            'balance_due': inv.balance_due, 'status': inv.status}
+
+
+def orm_payment(pay):
+    return {'id': pay.id, 'payment_date': str(pay.payment_date), 'amount': pay.amount,
+            'payment_method': pay.payment_method}
+
+
+def orm_note(note):
+    return {'id': note.id, 'note': note.note, 'timestamp': note.timestamp.isoformat()}
+
+
+def resources():
+    from models.client_note import ClientNote
+    from models.invoice import Invoice
+    from models.payment import Payment
+    from models.trip import Trip
+    from routes.client_notes import NOTE_ROWS
+    from routes.invoices import TRIP_INVOICE_ROWS
+    from routes.payments import INVOICE_PAYMENT_ROWS
+    from routes.reports import UNPAID_INVOICE_ROWS, UNPAID_STATUSES
+    from routes.trips import TRIP_ROWS
+
+    # (name, ORM query, old dict builder, Core select, RowSerializer)
+    return [
+        ('trips', Trip.query.order_by(Trip.id), orm_trip, TRIP_ROWS.select().order_by(Trip.id), TRIP_ROWS),
+        ('invoices', Invoice.query.order_by(Invoice.id), orm_invoice,
+         TRIP_INVOICE_ROWS.select().order_by(Invoice.id), TRIP_INVOICE_ROWS),
+        ('unpaid invoices', Invoice.query.filter(Invoice.status.in_(UNPAID_STATUSES)).order_by(Invoice.id), orm_unpaid_invoice,
+         UNPAID_INVOICE_ROWS.select().filter(Invoice.status.in_(UNPAID_STATUSES)).order_by(Invoice.id), UNPAID_INVOICE_ROWS),
+        ('payments', Payment.query.order_by(Payment.id), orm_payment,
+         INVOICE_PAYMENT_ROWS.select().order_by(Payment.id), INVOICE_PAYMENT_ROWS),
+        ('notes', ClientNote.query.order_by(ClientNote.id), orm_note, NOTE_ROWS.select().order_by(ClientNote.id),
+         NOTE_ROWS),
+    ]
+
+
+def best_rate(run, repeat):
+    # Median rows/sec over `repeat` runs, each in a fresh session
+    from extensions import db
+
+    rates = []
+    for _ in range(repeat):
+        db.session.remove()
+        started = time.perf_counter()
+        rows = run()
+        rates.append(rows / (time.perf_counter() - started))
+    return statistics.median(rates)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', help='SQLite file to read (default: DATABASE_URL or crm.db)')
+    parser.add_argument('--rows', type=int, default=10000, help='rows fetched per resource and run')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.database:
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.abspath(args.database)
+    warnings.filterwarnings('ignore', message='The HMAC key')
+
+    from flask.json.provider import DefaultJSONProvider
+    from app import create_app
+    from extensions import db
+    from services.json_provider import OrjsonProvider, orjson
+
+    app = create_app()
+    default_json = DefaultJSONProvider(app)
+    fast_json = OrjsonProvider(app) if orjson is not None else None
+
+    results = []
+    with app.app_context():
+        for name, query, build, statement, serializer in resources():
+            def orm_path():
+                items = [build(obj) for obj in query.limit(args.rows).all()]
+                default_json.dumps(items)
+                return len(items)
+
+            def core_path(provider):
+                def run():
+                    items = serializer.all(statement.limit(args.rows))
+                    provider.dumps(items)
+                    return len(items)
+                return run
+
+            entry = {
+                'resource': name,
+                'orm_rows_per_s': round(best_rate(orm_path, args.repeat)),
+                'core_rows_per_s': round(best_rate(core_path(default_json), args.repeat)),
+                'core_orjson_rows_per_s': round(best_rate(core_path(fast_json), args.repeat)) if fast_json else None,
+            }
+            fastest = entry['core_orjson_rows_per_s'] or entry['core_rows_per_s']
+            entry['speedup'] = round(fastest / max(entry['orm_rows_per_s'], 1), 2)
+            results.append(entry)
+            print(f"{name:<16} orm {entry['orm_rows_per_s']:>9,}/s  core {entry['core_rows_per_s']:>9,}/s  "
+                  f"core+orjson {entry['core_orjson_rows_per_s'] or 0:>9,}/s  x{entry['speedup']}", file=sys.stderr)
+        db.session.remove()
+
+    json.dump({'rows': args.rows, 'repeat': args.repeat, 'resources': results}, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == '__main__':
+    main()
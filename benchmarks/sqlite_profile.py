@@ -0,0 +1,142 @@
+"""Mixed read/write throughput of the SQLite connection profiles.
+
+Spawns reader and writer processes (like gunicorn workers) against a scratch
+database and reports operations per second and "database is locked" errors
+for each profile in config.SQLITE_PROFILES.
+
+    python benchmarks/sqlite_profile.py --seconds 10 --readers 4 --writers 2
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config  # noqa: E402
+from services.sqlite_profile import BASE_PRAGMAS  # noqa: E402
+
+SCHEMA = """
+CREATE TABLE payment (
+    id INTEGER PRIMARY KEY,
+    invoice_id INTEGER NOT NULL,
+    payment_date DATE NOT NULL,
+    amount FLOAT NOT NULL,
+    payment_method VARCHAR(50)
+);
+CREATE INDEX ix_payment_payment_date ON payment (payment_date);
+"""
+
+# Same shape as the monthly revenue report: a grouped scan over all payments
+READ_SQL = "SELECT strftime('%Y-%m', payment_date) AS month, sum(amount) FROM payment GROUP BY month"
+WRITE_SQL = "INSERT INTO payment (invoice_id, payment_date, amount, payment_method) VALUES (?, ?, ?, ?)"
+
+
+def connect(path, pragmas):
+    connection = sqlite3.connect(path)  # pysqlite default: 5 s lock timeout
+    for name, value in pragmas.items():
+        connection.execute(f"PRAGMA {name}={value}")
+    return connection
+
+
+def seed(path, rows):
+    connection = sqlite3.connect(path)
+    connection.executescript(SCHEMA)
+    rng = random.Random(42)
+    connection.executemany(WRITE_SQL, (
+        (rng.randint(1, 50000), f'2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}',
+         round(rng.uniform(10, 5000), 2), 'Card')
+        for _ in range(rows)
+    ))
+    connection.commit()
+    connection.close()
+
+
+def worker(role, path, pragmas, seconds, results):
+    connection = connect(path, pragmas)
+    rng = random.Random(os.getpid())
+    ops = locked = 0
+    deadline = time.perf_counter() + seconds
+
+    while time.perf_counter() < deadline:
+        try:
+            if role == 'reader':
+                connection.execute(READ_SQL).fetchall()
+            else:
+                connection.execute(WRITE_SQL, (rng.randint(1, 50000), '2024-06-15', 99.0, 'Cash'))
+                connection.commit()
+            ops += 1
+        except sqlite3.OperationalError as e:
+            if 'locked' not in str(e):
+                raise
+            connection.rollback()
+            locked += 1
+
+    connection.close()
+    results.put((role, ops, locked))
+
+
+def run_profile(name, pragmas, args):
+    workdir = tempfile.mkdtemp(prefix='crm-bench-')
+    path = os.path.join(workdir, 'bench.db')
+    seed(path, args.rows)
+    # journal_mode is persistent: set it once up front like the app's first connection would
+    connect(path, pragmas).close()
+
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=worker, args=(role, path, pragmas, args.seconds, results))
+        for role in ['reader'] * args.readers + ['writer'] * args.writers
+    ]
+    for process in processes:
+        process.start()
+    totals = {'reader': [0, 0], 'writer': [0, 0]}
+    for _ in processes:
+        role, ops, locked = results.get()
+        totals[role][0] += ops
+        totals[role][1] += locked
+    for process in processes:
+        process.join()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'profile': name,
+        'pragmas': pragmas,
+        'reads_per_sec': round(totals['reader'][0] / args.seconds, 1),
+        'writes_per_sec': round(totals['writer'][0] / args.seconds, 1),
+        'locked_errors': totals['reader'][1] + totals['writer'][1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--rows', type=int, default=100000, help='payments seeded before the run')
+    parser.add_argument('--json', action='store_true', help='print machine-readable results only')
+    args = parser.parse_args()
+
+    results = [
+        run_profile(name, {**BASE_PRAGMAS, **profile}, args)
+        for name, profile in Config.SQLITE_PROFILES.items()
+    ]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{args.readers} readers + {args.writers} writers, {args.seconds:g}s, {args.rows} seeded payments")
+    print(f"{'profile':<10} {'reads/s':>10} {'writes/s':>10} {'locked':>8}")
+    for r in results:
+        print(f"{r['profile']:<10} {r['reads_per_sec']:>10} {r['writes_per_sec']:>10} {r['locked_errors']:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""Per-worker startup time: interpreter start to the first answered request.
+
+Starts a fresh Python process per run (like a gunicorn worker or a CLI
+invocation), imports the app, builds it and sends one request through the
+test client, and reports how long each phase took.
+
+    python benchmarks/startup.py --runs 20
+    python benchmarks/startup.py --database /tmp/big.db --output startup.json
+
+Reads crm.db unless --database or DATABASE_URL is given. Startup does not
+write to the database, so no scratch copy is made.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+sys.path.insert(0, ROOT)
+
+from config import Config  # noqa: E402
+
+# Runs in the child process. A failed login still opens a connection and
+# queries the user table, so the first request includes engine start-up.
+CHILD = """
+import json, time, warnings
+started = time.perf_counter()
+warnings.filterwarnings('ignore')
+import app as module
+imported = time.perf_counter()
+application = module.create_app() if hasattr(module, 'create_app') else module.app
+created = time.perf_counter()
+response = application.test_client().post('/login', json={'username': 'startup-bench', 'password': 'startup-bench'})
+answered = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'first_request_ms': (answered - created) * 1000,
+    'status': response.status_code,
+}))
+"""
+PHASES = ('process_ms', 'import_ms', 'create_app_ms', 'first_request_ms')
+
+
+def run_once(env):
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, '-c', CHILD], cwd=ROOT, env=env, capture_output=True, text=True)
+    elapsed = (time.perf_counter() - started) * 1000
+    if completed.returncode != 0:
+        sys.exit(f'worker failed:\n{completed.stderr}')
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result['process_ms'] = elapsed  # includes interpreter start-up and exit
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', help='SQLite file to start against (default: DATABASE_URL or crm.db)')
+    parser.add_argument('--runs', type=int, default=10, help='fresh processes to time')
+    parser.add_argument('--output', help='write JSON results here (default: stdout)')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if args.database:
+        env['DATABASE_URL'] = 'sqlite:///' + os.path.abspath(args.database)
+    database = env.get('DATABASE_URL') or Config.SQLALCHEMY_DATABASE_URI
+
+    run_once(env)  # warm the OS file cache and .pyc files
+    runs = [run_once(env) for _ in range(args.runs)]
+
+    phases = {}
+    for phase in PHASES:
+        values = sorted(run[phase] for run in runs)
+        phases[phase] = {
+            'median': round(statistics.median(values), 1),
+            'min': round(values[0], 1),
+            'max': round(values[-1], 1),
+        }
+        print(f"{phase:<18} median {phases[phase]['median']:>8.1f} ms  min {phases[phase]['min']:>8.1f} ms",
+              file=sys.stderr)
+
+    results = {
+        'database': database,
+        'runs': args.runs,
+        'python': platform.python_version(),
+        'first_request_status': sorted({run['status'] for run in runs}),
+        'phases': phases,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
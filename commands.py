@@ -0,0 +1,131 @@
+import click
+from flask.cli import with_appcontext
+
+
+# ----------------------------
+# 🗄️ flask init-db
+# ----------------------------
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Create all tables and indexes (run once before the first start, and after upgrades)."""
+    from services.schema import create_schema
+
+    changes = create_schema()
+    for name in changes:
+        click.echo(f'created {name}')
+    click.echo('Database is up to date')
+
+
+# ----------------------------
+# 🧱 flask upgrade-db
+# ----------------------------
+@click.command('upgrade-db')
+@with_appcontext
+def upgrade_db_command():
+    """Apply missing columns, indexes and backfills to an existing database in place."""
+    from services.schema import upgrade_schema
+
+    created = upgrade_schema()
+    for name in created:
+        click.echo(f'created {name}')
+    click.echo(f'{len(created)} schema change(s) applied')
+
+
+# ----------------------------
+# 🔍 flask explain-queries
+# ----------------------------
+@click.command('explain-queries')
+@click.option('--verbose', is_flag=True, help='Print the full plan for every query.')
+@with_appcontext
+def explain_queries_command(verbose):
+    """Run EXPLAIN QUERY PLAN over list/report queries and flag table scans."""
+    from services.query_audit import audit_query_plans
+
+    unexpected = 0
+    for result in audit_query_plans():
+        if not result['scans']:
+            status = 'ok'
+        elif result['full_scan_expected']:
+            status = 'full scan (aggregate)'
+        else:
+            status = 'TABLE SCAN'
+            unexpected += 1
+
+        click.echo(f"[{status}] {result['name']}")
+        steps = result['plan'] if verbose else result['scans']
+        for step in steps:
+            click.echo(f'    {step}')
+
+    if unexpected:
+        raise click.ClickException(f'{unexpected} query(ies) fall back to a table scan')
+    click.echo('No unexpected table scans')
+
+
+# ----------------------------
+# 🔁 flask rebuild-revenue-rollup
+# ----------------------------
+@click.command('rebuild-revenue-rollup')
+@with_appcontext
+def rebuild_revenue_rollup_command():
+    """Recompute the monthly revenue rollup from the payments table."""
+    from extensions import db
+    from services import revenue_rollup
+
+    rows = revenue_rollup.rebuild()
+    db.session.commit()
+    click.echo(f'revenue_rollup rebuilt: {rows} row(s)')
+
+
+# ----------------------------
+# 🔎 flask rebuild-search-index
+# ----------------------------
+@click.command('rebuild-search-index')
+@with_appcontext
+def rebuild_search_index_command():
+    """Repopulate the FTS5 search index from clients, trips and notes."""
+    from extensions import db
+    from services import search_index
+
+    if not search_index.is_available() and not search_index.ensure_created():
+        raise click.ClickException('This SQLite build does not support FTS5 trigram search')
+    rows = search_index.rebuild()
+    db.session.commit()
+    click.echo(f'search_index rebuilt: {rows} row(s)')
+
+
+# ----------------------------
+# 🧹 flask purge-exports
+# ----------------------------
+@click.command('purge-exports')
+@with_appcontext
+def purge_exports_command():
+    """Delete export files past EXPORT_RETENTION_SECONDS or EXPORT_MAX_TOTAL_BYTES."""
+    from services import exports
+
+    jobs = exports.purge()
+    click.echo(f'exports purged: {jobs} job(s) expired or failed')
+
+
+# ----------------------------
+# ⏰ flask sweep-overdue
+# ----------------------------
+@click.command('sweep-overdue')
+@with_appcontext
+def sweep_overdue_command():
+    """Mark Pending invoices past their due date as Overdue (run from cron or a scheduler)."""
+    from services import audit, overdue
+
+    changed = overdue.run_sweep()
+    audit.flush()
+    click.echo(f'overdue sweep: {changed} invoice(s) marked Overdue')
+
+
+def register_commands(app):
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(upgrade_db_command)
+    app.cli.add_command(explain_queries_command)
+    app.cli.add_command(rebuild_revenue_rollup_command)
+    app.cli.add_command(rebuild_search_index_command)
+    app.cli.add_command(purge_exports_command)
+    app.cli.add_command(sweep_overdue_command)
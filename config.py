@@ -1,11 +1,13 @@
 import os
+import tempfile
 
 # Get absolute path to current directory
 basedir = os.path.abspath(os.path.dirname(__file__))
 
 class Config:
-    # SQLite DB path (safe across OS)
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(basedir, 'crm.db')
+    # SQLite DB path (safe across OS); DATABASE_URL points the app at another
+    # file, e.g. a generated benchmark dataset
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///' + os.path.join(basedir, 'crm.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
     # App secret key (for Flask sessions and CSRF protection)
@@ -14,6 +16,102 @@ class Config:
     # JWT configuration
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'your-jwt-secret-key'
     JWT_ACCESS_TOKEN_EXPIRES = 3600  # in seconds (1 hour)
+    AUTH_TOKEN_CACHE_SIZE = 10000  # verified tokens whose claims are reused (0 disables)
+    AUTH_TOKEN_CACHE_TTL = 300  # seconds a token goes without re-verifying its signature
+
+    # Password hashing (auth/hashing.py): a werkzeug method such as
+    # 'scrypt:32768:8:1' or 'pbkdf2:sha256:600000'. Stored hashes made with
+    # other parameters are rehashed on the user's next login.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'scrypt:32768:8:1'
+    HASH_WORKERS = 2  # concurrent hashes per worker process
+    HASH_MAX_PENDING = 16  # hashes waiting for a thread before /login and /register answer 429
+
+    # JSON encoding of responses: 'orjson' (used when installed, otherwise
+    # Flask's encoder) or 'default'
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER') or 'orjson'
+
+    # List endpoints: keyset pagination and streaming
+    DEFAULT_PAGE_SIZE = 100
+    MAX_PAGE_SIZE = 1000
+    STREAM_BATCH_SIZE = 1000  # rows fetched per round-trip in streaming mode
+    EXPORT_BATCH_SIZE = 200  # clients (with their trips/invoices/payments) per export batch
+
+    # Bulk import endpoints: rows validated, inserted and committed per chunk
+    BULK_IMPORT_CHUNK_SIZE = 500
+
+    # /reports/* result cache (per worker, LRU), invalidated by data writes
+    REPORT_CACHE_MAX_ENTRIES = 128
+    REPORT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+    # /reports/pivot: largest number of result cells (row x column groups)
+    PIVOT_MAX_CELLS = 10000
+    # Updated/deleted rows kept in analytics_change for workers to patch their
+    # column stores; a worker that falls further behind reloads from scratch
+    ANALYTICS_CHANGE_LOG_SIZE = 100000
+
+    # /reports/<name>/chart: rendered by a per-worker process pool
+    CHART_RENDER_WORKERS = 2
+    CHART_RENDER_TIMEOUT = 30  # seconds before the request gets a 503
+    CHART_MAX_CLIENTS = 50  # bars on the revenue-by-client chart (?limit=)
+
+    # POST /exports: background export jobs, written to EXPORT_DIR on local disk
+    EXPORT_DIR = os.environ.get('EXPORT_DIR') or os.path.join(tempfile.gettempdir(), 'crm-exports')
+    EXPORT_WORKERS = 2  # jobs running at once per worker process
+    EXPORT_MAX_PENDING = 10  # queued + running jobs before POST /exports answers 429
+    EXPORT_MAX_PENDING_PER_USER = 3  # ... and per requester
+    EXPORT_PROGRESS_INTERVAL = 1.0  # seconds between progress writes
+    EXPORT_RETENTION_SECONDS = 24 * 3600  # finished files are deleted after this
+    EXPORT_MAX_TOTAL_BYTES = 5 * 1024 ** 3  # oldest files are deleted beyond this total
+
+    # Read-only engine (services/read_engine.py): GET requests to endpoints
+    # matching these fnmatch patterns use a separate pool over the same
+    # database, with PRAGMA query_only, so reports and exports never hold
+    # the connections write routes need
+    READ_ENDPOINTS = (
+        'reports.*',
+        'clients.export_all_clients',
+        'clients.export_client_details',
+        'exports.get_export',
+        'exports.download_export',
+    )
+    READ_POOL_SIZE = 5
+    READ_POOL_MAX_OVERFLOW = 5
+
+    # SQLite connection profile, applied to every new connection by the
+    # connect listener in app.py (foreign_keys=ON is always added).
+    # 'tuned' lets readers and writers from several workers run side by side.
+    SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE') or 'tuned'
+    SQLITE_PROFILES = {
+        'default': {},  # SQLite defaults: rollback journal, synchronous=FULL
+        'tuned': {
+            'busy_timeout': 5000,        # ms to wait on a lock before "database is locked"
+            'journal_mode': 'WAL',       # readers no longer block the writer
+            'synchronous': 'NORMAL',     # fsync at checkpoints only; safe with WAL
+            'mmap_size': 268435456,      # 256 MiB memory-mapped reads
+            'cache_size': -65536,        # 64 MiB page cache (negative = KiB)
+            'temp_store': 'MEMORY',      # sorts / GROUP BY temp b-trees in RAM
+        },
+    }
+
+    # Instrumentation served at /metrics. Each worker process writes its
+    # counters to METRICS_DIR and /metrics adds them up, so point every
+    # worker of one deployment at the same directory (and clear it on deploy).
+    METRICS_DIR = os.environ.get('METRICS_DIR') or os.path.join(tempfile.gettempdir(), 'crm-metrics')
+    METRICS_FLUSH_INTERVAL = 5  # seconds between snapshot writes per process
+    # Opt-in: let requests from 127.0.0.1 / ::1 skip the admin token. Leave it off
+    # behind a reverse proxy on the same host, where every request is local.
+    METRICS_ALLOW_LOCAL = os.environ.get('METRICS_ALLOW_LOCAL', '').lower() in ('1', 'true', 'yes')
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS') or 200)  # logged to 'crm.slow_sql'
+
+    # Audit log: events are queued in-process and inserted by a background thread
+    AUDIT_QUEUE_SIZE = 10000  # a full queue makes writers wait rather than drop events
+    AUDIT_BATCH_SIZE = 500  # rows per INSERT
+    AUDIT_FLUSH_INTERVAL = 0.5  # seconds a partial batch waits for more events
+
+    # Pending invoices past their due date are marked Overdue by a sweep:
+    # `flask sweep-overdue` from cron, or in-process every this many seconds
+    # (one worker per interval runs it; 0 = off, the default)
+    OVERDUE_SWEEP_INTERVAL = int(os.environ.get('OVERDUE_SWEEP_INTERVAL') or 0)
 
 
 # User roles constant
@@ -0,0 +1,8 @@
+from flask_sqlalchemy import SQLAlchemy
+from flask_jwt_extended import JWTManager
+from services.read_engine import RoutingSession
+
+# Created unbound so models and routes can import them without an app;
+# create_app() in app.py binds them with init_app
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+jwt = JWTManager()
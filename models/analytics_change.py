@@ -0,0 +1,11 @@
+from extensions import db
+
+class AnalyticsChange(db.Model):
+    # Rows updated or deleted since a worker's column store was loaded, in
+    # commit order; each worker re-reads just these rows (services/analytics.py)
+    __tablename__ = 'analytics_change'
+    __table_args__ = {'sqlite_autoincrement': True}  # ids are positions in the log: never reused
+
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(20), nullable=False)  # client, trip, invoice, payment
+    entity_id = db.Column(db.Integer, nullable=False)
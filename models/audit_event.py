@@ -0,0 +1,17 @@
+from extensions import db
+
+class AuditEvent(db.Model):
+    # Who changed what: one row per create/update/delete, written in batches
+    # by the background writer in services/audit.py
+    __tablename__ = 'audit_event'
+    __table_args__ = (
+        db.Index('ix_audit_event_entity', 'entity', 'entity_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    timestamp = db.Column(db.DateTime, nullable=False)
+    user_id = db.Column(db.String(50), index=True)  # JWT identity; None for /register
+    action = db.Column(db.String(20), nullable=False)  # create, update, delete, bulk_create, register
+    entity = db.Column(db.String(30), nullable=False)  # client, trip, invoice, payment, note, user
+    entity_id = db.Column(db.Integer)
+    details = db.Column(db.Text)  # JSON: submitted fields, bulk counts, ...
@@ -1,4 +1,5 @@
-from app import db
+from extensions import db
+from models.versioned import version_column
 from models.client_note import ClientNote  # Optional: for type hinting clarity
 
 class Client(db.Model):
@@ -7,6 +8,8 @@ class Client(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     phone = db.Column(db.String(20))
     company = db.Column(db.String(100))
+    # Bumped by writes to the client or anything under it (see services/versioning.py)
+    version = version_column()
 
     # Relationship: A client has many trips
     trips = db.relationship(
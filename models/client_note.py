@@ -1,4 +1,4 @@
-from app import db
+from extensions import db
 from datetime import datetime, timezone
 
 class ClientNote(db.Model):
@@ -8,7 +8,8 @@ class ClientNote(db.Model):
     client_id = db.Column(
         db.Integer,
         db.ForeignKey('client.id', ondelete='CASCADE'),
-        nullable=False
+        nullable=False,
+        index=True
     )
     note = db.Column(db.Text, nullable=False)
     timestamp = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
@@ -0,0 +1,9 @@
+from extensions import db
+
+class DataVersion(db.Model):
+    # Named change counters shared by all worker processes, e.g. 'reports'
+    # is bumped by every write that can change a report's output
+    __tablename__ = 'data_version'
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
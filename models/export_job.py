@@ -0,0 +1,28 @@
+from extensions import db
+
+class ExportJob(db.Model):
+    # One POST /exports request: services/exports.py writes the file to
+    # EXPORT_DIR in the background and records progress here
+    __tablename__ = 'export_job'
+    __table_args__ = (
+        db.Index('ix_export_job_status_finished_at', 'status', 'finished_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.String(50), nullable=False, index=True)  # JWT identity of the requester
+    export_type = db.Column(db.String(30), nullable=False)  # 'clients' or a report name, e.g. 'ar-aging'
+    filters = db.Column(db.Text)  # JSON: the query args of the matching export endpoint
+    format = db.Column(db.String(10), nullable=False, default='csv')  # csv, gzip
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed, expired
+    rows_done = db.Column(db.Integer, nullable=False, default=0)
+    rows_total = db.Column(db.Integer)
+    file_name = db.Column(db.String(255))  # inside EXPORT_DIR
+    download_name = db.Column(db.String(255))
+    size_bytes = db.Column(db.Integer)
+    error = db.Column(db.Text)
+    # The worker process whose pool runs the job; a job whose process is gone is failed
+    worker_host = db.Column(db.String(255))
+    worker_pid = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, nullable=False)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
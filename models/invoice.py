@@ -1,16 +1,31 @@
-from app import db
+from extensions import db
+from models.versioned import version_column
 
 class Invoice(db.Model):
+    __table_args__ = (
+        # Report predicates: status buckets, then due-date ranges within a status
+        db.Index('ix_invoice_status_due_date', 'status', 'due_date'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     trip_id = db.Column(
         db.Integer,
         db.ForeignKey('trip.id', ondelete='CASCADE'),
-        nullable=False
+        nullable=False,
+        index=True
     )
     issue_date = db.Column(db.Date, nullable=False)
-    due_date = db.Column(db.Date, nullable=False)
+    due_date = db.Column(db.Date, nullable=False, index=True)
     amount = db.Column(db.Float, nullable=False)
     status = db.Column(db.String(20), default='Pending')  # 'Pending', 'Paid', etc.
+    # Sum of this invoice's payments and what is still owed, kept in step by
+    # services/invoice_balance.py. A new invoice starts with nothing paid.
+    paid_amount = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    balance_due = db.Column(
+        db.Float, nullable=False, server_default='0',
+        default=lambda context: context.get_current_parameters()['amount']
+    )
+    version = version_column()
 
     trip = db.relationship(
         'Trip',
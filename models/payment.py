@@ -1,15 +1,18 @@
-from app import db
+from extensions import db
+from models.versioned import version_column
 
 class Payment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     invoice_id = db.Column(
         db.Integer,
         db.ForeignKey('invoice.id', ondelete='CASCADE'),
-        nullable=False
+        nullable=False,
+        index=True
     )
-    payment_date = db.Column(db.Date, nullable=False)
+    payment_date = db.Column(db.Date, nullable=False, index=True)
     amount = db.Column(db.Float, nullable=False)
     payment_method = db.Column(db.String(50))  # e.g. Credit Card
+    version = version_column()
 
     invoice = db.relationship(
         'Invoice',
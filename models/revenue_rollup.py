@@ -0,0 +1,12 @@
+from extensions import db
+
+class RevenueRollup(db.Model):
+    # Pre-aggregated payment totals per (year, month, destination), kept in
+    # step with payment and trip writes by services/revenue_rollup.py
+    __tablename__ = 'revenue_rollup'
+
+    year = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.Integer, primary_key=True)
+    destination = db.Column(db.String(100), primary_key=True)
+    total_revenue = db.Column(db.Float, nullable=False, default=0.0)
+    payment_count = db.Column(db.Integer, nullable=False, default=0)
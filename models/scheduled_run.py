@@ -0,0 +1,9 @@
+from extensions import db
+
+class ScheduledRun(db.Model):
+    # Last claimed run of an in-process periodic job (e.g. the overdue sweep),
+    # so that one worker process runs it per interval
+    __tablename__ = 'scheduled_run'
+
+    name = db.Column(db.String(50), primary_key=True)
+    claimed_at = db.Column(db.Integer, nullable=False)  # epoch seconds
@@ -1,17 +1,20 @@
-from app import db
+from extensions import db
+from models.versioned import version_column
 
 class Trip(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     destination = db.Column(db.String(100), nullable=False)
-    start_date = db.Column(db.Date, nullable=False)
+    start_date = db.Column(db.Date, nullable=False, index=True)
     end_date = db.Column(db.Date, nullable=False)
     price = db.Column(db.Float, nullable=False)
     notes = db.Column(db.Text)
+    version = version_column()
 
     client_id = db.Column(
         db.Integer,
         db.ForeignKey('client.id', ondelete='CASCADE'),
-        nullable=False
+        nullable=False,
+        index=True
     )
 
     invoices = db.relationship(
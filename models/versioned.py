@@ -0,0 +1,14 @@
+import secrets
+from extensions import db
+
+
+def initial_version():
+    # SQLite hands a deleted row's id to the next insert, and ETags are
+    # '{scope}-{id}-v{version}': starting each row at a random version keeps a
+    # new row from answering 304 to an ETag of the deleted one
+    return secrets.randbelow(2 ** 31 - 1) + 1
+
+
+def version_column():
+    # Bumped by services/versioning.py on every write to the row or below it
+    return db.Column(db.Integer, nullable=False, default=initial_version, server_default='1')
@@ -0,0 +1,47 @@
+import json
+from flask import Blueprint, request, jsonify
+from auth.permissions import role_required
+from models.audit_event import AuditEvent
+from services import audit
+from services.pagination import PaginationError, keyset_page, parse_page_args
+
+audit_bp = Blueprint('audit', __name__)
+
+# ----------------------------
+# 🧾 GET /audit (filters, keyset pagination)
+# ----------------------------
+@audit_bp.route('/audit', methods=['GET'])
+@role_required('admin')
+def get_audit_events():
+    query = AuditEvent.query
+    for param in ('entity', 'action', 'user_id'):
+        value = request.args.get(param)
+        if value:
+            query = query.filter(getattr(AuditEvent, param) == value)
+
+    entity_id = request.args.get('entity_id', type=int)
+    if entity_id is not None:
+        query = query.filter(AuditEvent.entity_id == entity_id)
+
+    try:
+        limit, after_id = parse_page_args(request.args)
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Include this worker's events that are still queued
+    audit.flush()
+    events, next_cursor = keyset_page(query, AuditEvent.id, limit, after_id)
+    return jsonify({
+        'items': [
+            {
+                'id': event.id,
+                'timestamp': event.timestamp.isoformat(),
+                'user_id': event.user_id,
+                'action': event.action,
+                'entity': event.entity,
+                'entity_id': event.entity_id,
+                'details': json.loads(event.details) if event.details else None
+            } for event in events
+        ],
+        'next_cursor': next_cursor
+    }), 200
@@ -1,9 +1,10 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required
 from auth.permissions import role_required
-from app import db
+from extensions import db
 from models.client_note import ClientNote
 from models.client import Client
+from services import audit, search_index, versioning
+from services.rows import RowSerializer
 
 notes_bp = Blueprint('client_notes', __name__)
 
@@ -18,7 +19,6 @@ def get_client_or_404(client_id):
 # 📌 POST /clients/<id>/notes
 # ------------------------------
 @notes_bp.route('/clients/<int:client_id>/notes', methods=['POST'])
-@jwt_required()
 @role_required('admin', 'agent')
 def add_note(client_id):
     client, error_response, status = get_client_or_404(client_id)
@@ -32,14 +32,18 @@ def add_note(client_id):
 
     new_note = ClientNote(client_id=client.id, note=note_text.strip())
     db.session.add(new_note)
+    db.session.flush()
+    search_index.index_note(new_note)
+    versioning.touch_clients([client.id])
+    note_id = new_note.id  # read before commit expires the instance
     db.session.commit()
+    audit.record('create', 'note', note_id, {'client_id': client_id, 'note': note_text.strip()})
     return jsonify({'message': 'Note added successfully'}), 201
 
 # ------------------------------
 # 📝 PATCH /clients/<id>/notes/<id>
 # ------------------------------
 @notes_bp.route('/clients/<int:client_id>/notes/<int:note_id>', methods=['PATCH'])
-@jwt_required()
 @role_required('admin', 'agent')
 def update_note(client_id, note_id):
     client, error_response, status = get_client_or_404(client_id)
@@ -56,35 +60,32 @@ def update_note(client_id, note_id):
         return jsonify({'error': 'Valid updated note text is required'}), 400
 
     note.note = new_text.strip()
+    search_index.index_note(note)
+    versioning.touch_clients([client_id])
     db.session.commit()
+    audit.record('update', 'note', note_id, {'client_id': client_id, 'note': new_text.strip()})
     return jsonify({'message': 'Note updated successfully'}), 200
 
+# GET /clients/<id>/notes rows: Core select, no ORM objects
+NOTE_ROWS = RowSerializer(id=ClientNote.id, note=ClientNote.note, timestamp=ClientNote.timestamp)
+
 # ------------------------------
 # 📋 GET /clients/<id>/notes
 # ------------------------------
 @notes_bp.route('/clients/<int:client_id>/notes', methods=['GET'])
-@jwt_required()
 @role_required('admin', 'agent', 'analyst')
 def get_notes(client_id):
     client, error_response, status = get_client_or_404(client_id)
     if error_response:
         return error_response, status
 
-    notes = ClientNote.query.filter_by(client_id=client_id).all()
-    return jsonify([
-        {
-            'id': note.id,
-            'note': note.note,
-            'timestamp': note.timestamp.isoformat()
-        }
-        for note in notes
-    ]), 200
+    notes = NOTE_ROWS.all(NOTE_ROWS.select().filter(ClientNote.client_id == client_id))
+    return jsonify(notes), 200
 
 # ------------------------------
 # ❌ DELETE /clients/<id>/notes/<id>
 # ------------------------------
 @notes_bp.route('/clients/<int:client_id>/notes/<int:note_id>', methods=['DELETE'])
-@jwt_required()
 @role_required('admin')
 def delete_note(client_id, note_id):
     client, error_response, status = get_client_or_404(client_id)
@@ -95,6 +96,9 @@ def delete_note(client_id, note_id):
     if not note:
         return jsonify({'error': 'Note not found'}), 404
 
+    search_index.remove('note', [note_id])
     db.session.delete(note)
+    versioning.touch_clients([client_id])
     db.session.commit()
+    audit.record('delete', 'note', note_id, {'client_id': client_id})
     return jsonify({'message': 'Note deleted successfully'}), 200
@@ -1,8 +1,16 @@
-from flask import Blueprint, request, jsonify, Response
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from flask import Blueprint, request, jsonify, Response, abort, current_app, stream_with_context
+from flask_jwt_extended import get_jwt_identity, get_jwt
 from auth.permissions import role_required
-from app import db
+from extensions import db
 from models.client import Client
+from models.trip import Trip
+from models.invoice import Invoice
+from sqlalchemy.orm import selectinload
+from services import analytics, audit, report_cache, revenue_rollup, search_index, versioning
+from services.bulk_import import BulkPayloadError, import_records, iter_records
+from sqlalchemy import insert
+from services.pagination import PaginationError, flag_arg, keyset_page, parse_page_args
+from services.streaming import gzip_stream, iter_keyset_batches, stream_json_array
 import csv
 from io import StringIO
 
@@ -20,39 +28,106 @@ def serialize_client(client):
         'company': client.company
     }
 
+# ----------------------------
+# 🔧 Helper: Load a client with its whole graph
+# ----------------------------
+def client_graph_options():
+    # One SELECT ... IN per relationship level: the query count stays fixed
+    # no matter how many notes, trips, invoices or payments a client has
+    return (
+        selectinload(Client.notes),
+        selectinload(Client.trips)
+            .selectinload(Trip.invoices)
+            .selectinload(Invoice.payments),
+    )
+
+def get_client_graph(client_id):
+    return Client.query.options(*client_graph_options()).filter_by(id=client_id).first()
+
+# ----------------------------
+# 🔧 Helper: Validate a client payload
+# ----------------------------
+def validate_client(data):
+    if not isinstance(data, dict):
+        return None, 'Expected a JSON object'
+
+    required_fields = ['name', 'email', 'phone']
+    missing = [f for f in required_fields if f not in data or not data[f]]
+    if missing:
+        return None, f"Missing required field(s): {', '.join(missing)}"
+
+    return {
+        'name': data['name'],
+        'email': data['email'],
+        'phone': data['phone'],
+        'company': data.get('company')
+    }, None
+
 # ----------------------------
 # ✅ POST /clients
 # ----------------------------
 @clients_bp.route('/clients', methods=['POST'])
-@jwt_required()
 @role_required('admin', 'agent')
 def create_client():
-    data = request.get_json()
-    required_fields = ['name', 'email', 'phone']
-    missing = [f for f in required_fields if f not in data or not data[f]]
-
-    if missing:
-        return jsonify({'error': f"Missing required field(s): {', '.join(missing)}"}), 400
+    values, error = validate_client(request.get_json())
+    if error:
+        return jsonify({'error': error}), 400
 
-    if Client.query.filter_by(email=data['email']).first():
+    if Client.query.filter_by(email=values['email']).first():
         return jsonify({'error': 'A client with this email already exists'}), 409
 
-    new_client = Client(
-        name=data['name'],
-        email=data['email'],
-        phone=data['phone'],
-        company=data.get('company')
-    )
+    new_client = Client(**values)
     db.session.add(new_client)
+    db.session.flush()
+    search_index.index_client(new_client)
+    report_cache.invalidate()
+    client_id = new_client.id  # read before commit expires the instance
     db.session.commit()
+    audit.record('create', 'client', client_id, values)
 
     return jsonify({'message': 'Client created successfully'}), 201
 
 # ----------------------------
-# 🔍 GET /clients (with filters)
+# 📥 POST /clients/bulk (JSON array or NDJSON)
+# ----------------------------
+def persist_clients(rows):
+    emails = {values['email'] for _, values in rows}
+    taken = {email for (email,) in db.session.query(Client.email).filter(Client.email.in_(emails))}
+
+    rejected, accepted = [], []
+    for index, values in rows:
+        if values['email'] in taken:
+            rejected.append((index, 'A client with this email already exists'))
+            continue
+        taken.add(values['email'])  # duplicates inside the upload
+        accepted.append(values)
+
+    if accepted:
+        ids = db.session.execute(
+            insert(Client).returning(Client.id, sort_by_parameter_order=True), accepted
+        ).scalars().all()
+        search_index.add_many('client', [
+            {'ref_id': client_id, 'client_id': client_id, 'name': v['name'], 'email': v['email'],
+             'company': v['company'], 'phone': v['phone']}
+            for client_id, v in zip(ids, accepted)
+        ])
+        report_cache.invalidate()
+    return rejected
+
+@clients_bp.route('/clients/bulk', methods=['POST'])
+@role_required('admin', 'agent')
+def bulk_create_clients():
+    try:
+        result = import_records(iter_records(), validate_client, persist_clients)
+    except BulkPayloadError as e:
+        return jsonify({'error': str(e)}), 400
+    audit.record('bulk_create', 'client', details={'created': result['created'], 'failed': result['failed']})
+    return jsonify(result), 200
+
+# ----------------------------
+# 🔍 GET /clients (with filters, keyset pagination)
 # ----------------------------
 @clients_bp.route('/clients', methods=['GET'])
-@jwt_required()
 @role_required('admin', 'agent', 'analyst')
 def get_clients():
     query = Client.query
@@ -63,18 +138,38 @@ def get_clients():
         'company': Client.company
     }
 
+    # Filters go through the full-text index; values too short for it keep ilike
+    indexed = {}
     for param, column in filters.items():
         value = request.args.get(param)
-        if value:
+        if not value:
+            continue
+        if search_index.is_indexable(value):
+            indexed[param] = value
+        else:
             query = query.filter(column.ilike(f"%{value}%"))
+    if indexed:
+        query = query.filter(Client.id.in_(search_index.matching_ids('client', indexed)))
 
-    return jsonify([serialize_client(c) for c in query.all()]), 200
+    try:
+        limit, after_id = parse_page_args(request.args)
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if flag_arg(request.args, 'stream'):
+        query = query.filter(Client.id > after_id).order_by(Client.id)
+        return stream_json_array(query, serialize_client)
+
+    clients, next_cursor = keyset_page(query, Client.id, limit, after_id)
+    return jsonify({
+        'items': [serialize_client(c) for c in clients],
+        'next_cursor': next_cursor
+    }), 200
 
 # ----------------------------
 # 🛠️ PATCH /clients/<id>
 # ----------------------------
 @clients_bp.route('/clients/<int:client_id>', methods=['PATCH'])
-@jwt_required()
 @role_required('admin', 'agent')
 def update_client(client_id):
     client = Client.query.get_or_404(client_id)
@@ -94,42 +189,63 @@ def update_client(client_id):
         if field in data:
             setattr(client, field, data[field])
 
+    search_index.index_client(client)
+    versioning.touch_clients([client_id])
+    analytics.invalidate(Client, [client_id])
+    report_cache.invalidate()
     db.session.commit()
+    audit.record('update', 'client', client_id, data)
     return jsonify({'message': 'Client updated successfully'})
 
 # ----------------------------
 # ❌ DELETE /clients/<id>
 # ----------------------------
 @clients_bp.route('/clients/<int:client_id>', methods=['DELETE'])
-@jwt_required()
 @role_required('admin')
 def delete_client(client_id):
     client = Client.query.get(client_id)
     if not client:
         return jsonify({'error': 'Client not found'}), 404
 
+    revenue_rollup.remove_payments(Trip.client_id == client_id)
+    search_index.remove_client(client_id)
     db.session.delete(client)
+    analytics.invalidate(Client, [client_id])
+    report_cache.invalidate()
     db.session.commit()
+    audit.record('delete', 'client', client_id)
     return jsonify({'message': 'Client deleted successfully'}), 200
 
 # ----------------------------
 # 🔍 GET /clients/<id>
 # ----------------------------
 @clients_bp.route('/clients/<int:client_id>', methods=['GET'])
-@jwt_required()
 @role_required('admin', 'agent')
 def get_client_by_id(client_id):
+    etag = versioning.etag_for(Client, client_id, 'client')
+    if etag is None:
+        abort(404)
+    if request.if_none_match.contains(etag):
+        return versioning.not_modified(etag)
+
     client = Client.query.get_or_404(client_id)
-    return jsonify(serialize_client(client))
+    return versioning.with_etag(jsonify(serialize_client(client)), etag)
 
 # ----------------------------
 # 📋 GET /clients/<id>/details
 # ----------------------------
 @clients_bp.route('/clients/<int:client_id>/details', methods=['GET'])
-@jwt_required()
 @role_required('admin', 'agent', 'analyst')
 def get_client_details(client_id):
-    client = Client.query.get(client_id)
+    # The client's version covers its notes, trips, invoices and payments,
+    # so a revalidation never has to load the graph
+    etag = versioning.etag_for(Client, client_id, 'client-details')
+    if etag is None:
+        return jsonify({'error': 'Client not found'}), 404
+    if request.if_none_match.contains(etag):
+        return versioning.not_modified(etag)
+
+    client = get_client_graph(client_id)
     if not client:
         return jsonify({'error': 'Client not found'}), 404
 
@@ -150,6 +266,8 @@ def get_client_details(client_id):
                 'issue_date': str(invoice.issue_date),
                 'due_date': str(invoice.due_date),
                 'amount': invoice.amount,
+                'paid_amount': invoice.paid_amount,
+                'balance_due': invoice.balance_due,
                 'status': invoice.status,
                 'payments': [
                     {
@@ -172,20 +290,19 @@ def get_client_details(client_id):
         for note in client.notes
     ]
 
-    return jsonify({
+    return versioning.with_etag(jsonify({
         **serialize_client(client),
         'trips': trips_data,
         'notes': notes_data
-    }), 200
+    }), etag), 200
 
 # ----------------------------
 # 📤 /clients/<id>/details/export
 # ----------------------------
 @clients_bp.route('/clients/<int:client_id>/details/export', methods=['GET'])
-@jwt_required()
 @role_required('admin', 'agent', 'analyst')
 def export_client_details(client_id):
-    client = Client.query.get(client_id)
+    client = get_client_graph(client_id)
     if not client:
         return jsonify({'error': 'Client not found'}), 404
 
@@ -223,45 +340,66 @@ def export_client_details(client_id):
     )
 
 # ----------------------------
-# 📤 /clients/export
+# 🔧 Helper: Bulk export CSV chunks
 # ----------------------------
-@clients_bp.route('/clients/export', methods=['GET'])
-@jwt_required()
-@role_required('admin', 'analyst')
-def export_all_clients():
-    clients = Client.query.all()
-    output = StringIO()
-    writer = csv.writer(output)
+def write_client_block(writer, client):
+    writer.writerow(['Client Info'])
+    writer.writerow(['ID', 'Name', 'Email', 'Phone', 'Company'])
+    writer.writerow([client.id, client.name, client.email, client.phone, client.company])
+    writer.writerow([])
 
-    for client in clients:
-        writer.writerow(['Client Info'])
-        writer.writerow(['ID', 'Name', 'Email', 'Phone', 'Company'])
-        writer.writerow([client.id, client.name, client.email, client.phone, client.company])
-        writer.writerow([])
+    writer.writerow(['Notes'])
+    writer.writerow(['Note ID', 'Text', 'Timestamp'])
+    for note in client.notes:
+        writer.writerow([note.id, note.note, note.timestamp.strftime("%Y-%m-%d %H:%M:%S")])
+    writer.writerow([])
 
-        writer.writerow(['Notes'])
-        writer.writerow(['Note ID', 'Text', 'Timestamp'])
-        for note in client.notes:
-            writer.writerow([note.id, note.note, note.timestamp.strftime("%Y-%m-%d %H:%M:%S")])
+    for trip in client.trips:
+        writer.writerow(['Trip'])
+        writer.writerow(['ID', 'Destination', 'Start', 'End', 'Price', 'Notes'])
+        writer.writerow([trip.id, trip.destination, trip.start_date, trip.end_date, trip.price, trip.notes])
+        for invoice in trip.invoices:
+            writer.writerow(['Invoice'])
+            writer.writerow(['ID', 'Amount', 'Status', 'Issue Date', 'Due Date'])
+            writer.writerow([invoice.id, invoice.amount, invoice.status, invoice.issue_date, invoice.due_date])
+            writer.writerow(['Payments'])
+            writer.writerow(['ID', 'Amount', 'Method', 'Date'])
+            for payment in invoice.payments:
+                writer.writerow([payment.id, payment.amount, payment.payment_method, payment.payment_date])
         writer.writerow([])
+    writer.writerow(['=========='])
+    writer.writerow([])
 
-        for trip in client.trips:
-            writer.writerow(['Trip'])
-            writer.writerow(['ID', 'Destination', 'Start', 'End', 'Price', 'Notes'])
-            writer.writerow([trip.id, trip.destination, trip.start_date, trip.end_date, trip.price, trip.notes])
-            for invoice in trip.invoices:
-                writer.writerow(['Invoice'])
-                writer.writerow(['ID', 'Amount', 'Status', 'Issue Date', 'Due Date'])
-                writer.writerow([invoice.id, invoice.amount, invoice.status, invoice.issue_date, invoice.due_date])
-                writer.writerow(['Payments'])
-                writer.writerow(['ID', 'Amount', 'Method', 'Date'])
-                for payment in invoice.payments:
-                    writer.writerow([payment.id, payment.amount, payment.payment_method, payment.payment_date])
-            writer.writerow([])
-        writer.writerow(['=========='])
-        writer.writerow([])
+def generate_clients_csv(batch_size, progress=None):
+    # progress(n) is called after each batch of n clients (export jobs)
+    output = StringIO()
+    writer = csv.writer(output)
+    query = Client.query.options(*client_graph_options())
+
+    for batch in iter_keyset_batches(query, Client.id, batch_size):
+        for client in batch:
+            write_client_block(writer, client)
+        yield output.getvalue()
+        output.seek(0)
+        output.truncate(0)
+        # Drop the finished batch from the identity map so memory stays flat
+        db.session.expunge_all()
+        if progress:
+            progress(len(batch))
 
-    output.seek(0)
-    return Response(output, mimetype='text/csv',
+# ----------------------------
+# 📤 /clients/export (streamed, optional ?gzip=true)
+# ----------------------------
+@clients_bp.route('/clients/export', methods=['GET'])
+@role_required('admin', 'analyst')
+def export_all_clients():
+    chunks = generate_clients_csv(current_app.config['EXPORT_BATCH_SIZE'])
+
+    if flag_arg(request.args, 'gzip'):
+        return Response(stream_with_context(gzip_stream(chunks)), mimetype='application/gzip',
+            headers={'Content-Disposition': 'attachment; filename=all_clients_export.csv.gz'}
+        )
+
+    return Response(stream_with_context(chunks), mimetype='text/csv',
         headers={'Content-Disposition': 'attachment; filename=all_clients_export.csv'}
     )
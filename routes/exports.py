@@ -0,0 +1,97 @@
+import json
+from flask import Blueprint, request, jsonify, send_file, url_for
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from auth.permissions import role_required
+from extensions import db
+from models.export_job import ExportJob
+from services import audit, exports
+from services.exports import ExportBusy, ExportError
+
+exports_bp = Blueprint('exports', __name__)
+
+
+def serialize_job(job):
+    percent = None
+    if job.status == 'done':
+        percent = 100.0
+    elif job.rows_total:
+        percent = round(100.0 * job.rows_done / job.rows_total, 1)
+
+    return {
+        'id': job.id,
+        'type': job.export_type,
+        'filters': json.loads(job.filters) if job.filters else {},
+        'format': job.format,
+        'status': job.status,
+        'progress': {'rows_done': job.rows_done, 'rows_total': job.rows_total, 'percent': percent},
+        'size_bytes': job.size_bytes,
+        'error': job.error,
+        'created_at': job.created_at.isoformat(),
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'download_url': url_for('exports.download_export', job_id=job.id) if job.status == 'done' else None
+    }
+
+
+def get_own_job(job_id):
+    # Admins see every job; everyone else only their own (others are a 404)
+    job = db.session.get(ExportJob, job_id)
+    if job is None:
+        return None
+    if job.user_id != str(get_jwt_identity()) and get_jwt().get('role') != 'admin':
+        return None
+    return job
+
+# ----------------------------
+# 📥 POST /exports
+# ----------------------------
+@exports_bp.route('/exports', methods=['POST'])
+@role_required('admin', 'analyst')
+def create_export():
+    data = request.get_json() or {}
+    try:
+        job = exports.enqueue(
+            data.get('type'),
+            data.get('filters') or {},
+            data.get('format', 'csv'),
+            get_jwt_identity()
+        )
+    except ExportError as e:
+        return jsonify({'error': str(e)}), 400
+    except ExportBusy as e:
+        return jsonify({'error': str(e)}), 429
+
+    audit.record('create', 'export', job.id, {'type': job.export_type, 'format': job.format})
+    response = jsonify(serialize_job(job))
+    response.headers['Location'] = url_for('exports.get_export', job_id=job.id)
+    return response, 202
+
+# ----------------------------
+# 🔍 GET /exports/<id> (status and progress)
+# ----------------------------
+@exports_bp.route('/exports/<int:job_id>', methods=['GET'])
+@role_required('admin', 'analyst')
+def get_export(job_id):
+    job = get_own_job(job_id)
+    if not job:
+        return jsonify({'error': 'Export not found'}), 404
+    return jsonify(serialize_job(job)), 200
+
+# ----------------------------
+# 📤 GET /exports/<id>/download (supports Range requests)
+# ----------------------------
+@exports_bp.route('/exports/<int:job_id>/download', methods=['GET'])
+@role_required('admin', 'analyst')
+def download_export(job_id):
+    job = get_own_job(job_id)
+    if not job:
+        return jsonify({'error': 'Export not found'}), 404
+    if job.status == 'expired':
+        return jsonify({'error': 'Export has expired'}), 410
+    if job.status != 'done':
+        return jsonify({'error': f'Export is {job.status}'}), 409
+
+    _, mimetype = exports.FORMATS[job.format]
+    # conditional=True answers Range / If-Range with 206 partial content
+    return send_file(exports.artifact_path(job.file_name), mimetype=mimetype, as_attachment=True,
+                     download_name=job.download_name, conditional=True, max_age=0)
@@ -1,28 +1,40 @@
-from flask import Blueprint, request, jsonify
-from app import db
+from flask import Blueprint, request, jsonify, abort
+from extensions import db
 from models.invoice import Invoice
 from models.trip import Trip
-from datetime import datetime
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import date, datetime
 from auth.permissions import role_required
+from models.payment import Payment
+from services import analytics, audit, invoice_balance, report_cache, revenue_rollup, versioning
+from services.bulk_import import BulkPayloadError, import_records, iter_records
+from services.rows import RowSerializer
+from sqlalchemy import insert
 
 invoices_bp = Blueprint('invoices', __name__)
 
 # Allowed invoice statuses
 VALID_STATUSES = {'Pending', 'Paid', 'Overdue'}
 
-# Create a new invoice
-@invoices_bp.route('/invoices', methods=['POST'])
-@jwt_required()
-@role_required('admin', 'agent')
-def create_invoice():
-    print(f"Invoice created by user: {get_jwt_identity()}")
-    data = request.get_json()
+# GET /invoices/<trip_id> rows: Core select, no ORM objects
+TRIP_INVOICE_ROWS = RowSerializer(
+    id=Invoice.id,
+    issue_date=Invoice.issue_date,
+    due_date=Invoice.due_date,
+    amount=Invoice.amount,
+    paid_amount=Invoice.paid_amount,
+    balance_due=Invoice.balance_due,
+    status=Invoice.status
+)
+
+# Validate an invoice payload (shared by single and bulk create)
+def validate_invoice(data):
+    if not isinstance(data, dict):
+        return None, 'Expected a JSON object'
 
     required_fields = ['trip_id', 'issue_date', 'due_date', 'amount']
     missing = [field for field in required_fields if field not in data]
     if missing:
-        return jsonify({'error': f"Missing required fields: {', '.join(missing)}"}), 400
+        return None, f"Missing required fields: {', '.join(missing)}"
 
     try:
         trip_id = int(data['trip_id'])
@@ -30,63 +42,113 @@ def create_invoice():
         issue_date = datetime.strptime(data['issue_date'], '%Y-%m-%d').date()
         due_date = datetime.strptime(data['due_date'], '%Y-%m-%d').date()
     except (ValueError, TypeError):
-        return jsonify({'error': 'Invalid data format or type'}), 400
+        return None, 'Invalid data format or type'
 
-    status = data.get('status', 'Pending')
+    # Without an explicit status, an invoice that is already past due starts as Overdue
+    status = data.get('status', 'Overdue' if due_date < date.today() else 'Pending')
     if status not in VALID_STATUSES:
-        return jsonify({'error': f"Invalid status. Must be one of: {', '.join(VALID_STATUSES)}"}), 400
+        return None, f"Invalid status. Must be one of: {', '.join(VALID_STATUSES)}"
+
+    return {
+        'trip_id': trip_id,
+        'issue_date': issue_date,
+        'due_date': due_date,
+        'amount': amount,
+        'status': status
+    }, None
+
+
+# Create a new invoice
+@invoices_bp.route('/invoices', methods=['POST'])
+@role_required('admin', 'agent')
+def create_invoice():
+    values, error = validate_invoice(request.get_json())
+    if error:
+        return jsonify({'error': error}), 400
 
-    if not Trip.query.get(trip_id):
+    if not Trip.query.get(values['trip_id']):
         return jsonify({'error': 'Trip not found'}), 404
 
-    invoice = Invoice(
-        trip_id=trip_id,
-        issue_date=issue_date,
-        due_date=due_date,
-        amount=amount,
-        status=status
-    )
+    invoice = Invoice(**values)
 
     db.session.add(invoice)
+    versioning.touch_trips([invoice.trip_id])
+    report_cache.invalidate()
+    invoice_id = invoice.id  # flushed by touch_trips; read before commit expires it
     db.session.commit()
+    audit.record('create', 'invoice', invoice_id, values)
 
     return jsonify({'message': 'Invoice created successfully'}), 201
 
 
+# Bulk import invoices (JSON array or NDJSON)
+def persist_invoices(rows):
+    trip_ids = {values['trip_id'] for _, values in rows}
+    existing = {trip_id for (trip_id,) in db.session.query(Trip.id).filter(Trip.id.in_(trip_ids))}
+
+    rejected, accepted = [], []
+    for index, values in rows:
+        if values['trip_id'] in existing:
+            accepted.append(values)
+        else:
+            rejected.append((index, 'Trip not found'))
+
+    if accepted:
+        db.session.execute(insert(Invoice), accepted)
+        versioning.touch_trips({v['trip_id'] for v in accepted})
+        report_cache.invalidate()
+    return rejected
+
+
+@invoices_bp.route('/invoices/bulk', methods=['POST'])
+@role_required('admin', 'agent')
+def bulk_create_invoices():
+    try:
+        result = import_records(iter_records(), validate_invoice, persist_invoices)
+    except BulkPayloadError as e:
+        return jsonify({'error': str(e)}), 400
+    audit.record('bulk_create', 'invoice', details={'created': result['created'], 'failed': result['failed']})
+    return jsonify(result), 200
+
+
 # Get all invoices for a trip
 @invoices_bp.route('/invoices/<int:trip_id>', methods=['GET'])
 def get_invoices_for_trip(trip_id):
-    Trip.query.get_or_404(trip_id)
-    invoices = Invoice.query.filter_by(trip_id=trip_id).all()
+    # Invoice writes bump the trip's version, so it also versions this list
+    etag = versioning.etag_for(Trip, trip_id, 'trip-invoices')
+    if etag is None:
+        abort(404)
+    if request.if_none_match.contains(etag):
+        return versioning.not_modified(etag)
 
-    return jsonify([
-        {
-            'id': inv.id,
-            'issue_date': str(inv.issue_date),
-            'due_date': str(inv.due_date),
-            'amount': inv.amount,
-            'status': inv.status
-        } for inv in invoices
-    ]), 200
+    invoices = TRIP_INVOICE_ROWS.all(TRIP_INVOICE_ROWS.select().filter(Invoice.trip_id == trip_id))
+    return versioning.with_etag(jsonify(invoices), etag), 200
 
 
 # Get invoice by ID
 @invoices_bp.route('/invoice/<int:invoice_id>', methods=['GET'])
 def get_invoice_by_id(invoice_id):
+    etag = versioning.etag_for(Invoice, invoice_id, 'invoice')
+    if etag is None:
+        abort(404)
+    if request.if_none_match.contains(etag):
+        return versioning.not_modified(etag)
+
     inv = Invoice.query.get_or_404(invoice_id)
-    return jsonify({
+    return versioning.with_etag(jsonify({
         'id': inv.id,
         'trip_id': inv.trip_id,
         'issue_date': str(inv.issue_date),
         'due_date': str(inv.due_date),
         'amount': inv.amount,
+        'paid_amount': inv.paid_amount,
+        'balance_due': inv.balance_due,
         'status': inv.status
-    }), 200
+    }), etag), 200
 
 
 # Update invoice
 @invoices_bp.route('/invoices/<int:invoice_id>', methods=['PATCH'])
-@jwt_required()
 @role_required('admin', 'agent')
 def update_invoice(invoice_id):
     invoice = Invoice.query.get_or_404(invoice_id)
@@ -119,20 +181,35 @@ def update_invoice(invoice_id):
         if data['status'] not in VALID_STATUSES:
             return jsonify({'error': f"Invalid status. Must be one of: {', '.join(VALID_STATUSES)}"}), 400
         invoice.status = data['status']
+    elif 'due_date' in data and invoice.status in ('Pending', 'Overdue'):
+        # A moved due date re-buckets an unpaid invoice now instead of waiting for the sweep
+        invoice.status = 'Overdue' if invoice.due_date < date.today() else 'Pending'
+
+    if 'amount' in data:
+        # An explicitly submitted status wins over the automatic Paid/unpaid switch
+        invoice_balance.adjust(invoice_id, 0.0, update_status='status' not in data)
 
+    versioning.touch_invoices([invoice_id])
+    analytics.invalidate(Invoice, [invoice_id])
+    report_cache.invalidate()
     db.session.commit()
+    audit.record('update', 'invoice', invoice_id, data)
     return jsonify({'message': 'Invoice updated successfully'}), 200
 
 
 # Delete invoice
 @invoices_bp.route('/invoices/<int:invoice_id>', methods=['DELETE'])
-@jwt_required()
 @role_required('admin')
 def delete_invoice(invoice_id):
     invoice = Invoice.query.get(invoice_id)
     if not invoice:
         return jsonify({'error': 'Invoice not found'}), 404
 
+    revenue_rollup.remove_payments(Payment.invoice_id == invoice_id)
+    versioning.touch_trips([invoice.trip_id])
     db.session.delete(invoice)
+    analytics.invalidate(Invoice, [invoice_id])
+    report_cache.invalidate()
     db.session.commit()
+    audit.record('delete', 'invoice', invoice_id)
     return jsonify({'message': 'Invoice deleted successfully'}), 200
@@ -0,0 +1,22 @@
+from flask import Blueprint, Response, current_app, jsonify, request
+from auth.permissions import authenticate
+from services import metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+LOCAL_ADDRESSES = {'127.0.0.1', '::1'}
+
+# ----------------------------
+# 📈 GET /metrics (Prometheus text format, all worker processes)
+# ----------------------------
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    # Admins only, unless METRICS_ALLOW_LOCAL lets scrapers on the same host in.
+    # A forwarded request came through a proxy, so its loopback address says nothing.
+    is_local = (current_app.config['METRICS_ALLOW_LOCAL'] and request.remote_addr in LOCAL_ADDRESSES
+                and 'X-Forwarded-For' not in request.headers)
+    if not is_local:
+        if authenticate().get('role') != 'admin':
+            return jsonify({'error': 'Admins only'}), 403
+
+    return Response(metrics.render(metrics.collect()), mimetype='text/plain; version=0.0.4')
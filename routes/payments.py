@@ -1,25 +1,33 @@
-from flask import Blueprint, request, jsonify
-from app import db
+from flask import Blueprint, request, jsonify, abort
+from extensions import db
 from models.payment import Payment
 from models.invoice import Invoice
 from datetime import datetime
-from flask_jwt_extended import jwt_required, get_jwt_identity
 from auth.permissions import role_required
+from services import analytics, audit, invoice_balance, report_cache, revenue_rollup, versioning
+from services.bulk_import import BulkPayloadError, import_records, iter_records
+from services.rows import RowSerializer
+from sqlalchemy import insert
 
 payments_bp = Blueprint('payments', __name__)
 
-# Create a new payment
-@payments_bp.route('/payments', methods=['POST'])
-@jwt_required()
-@role_required('admin', 'agent')
-def create_payment():
-    print(f"Payment recorded by user: {get_jwt_identity()}")
-    data = request.get_json()
+# GET /payments/<invoice_id> rows: Core select, no ORM objects
+INVOICE_PAYMENT_ROWS = RowSerializer(
+    id=Payment.id,
+    payment_date=Payment.payment_date,
+    amount=Payment.amount,
+    payment_method=Payment.payment_method
+)
+
+# Validate a payment payload (shared by single and bulk create)
+def validate_payment(data):
+    if not isinstance(data, dict):
+        return None, 'Expected a JSON object'
 
     required_fields = ['invoice_id', 'payment_date', 'amount', 'payment_method']
     missing = [f for f in required_fields if f not in data]
     if missing:
-        return jsonify({'error': f"Missing fields: {', '.join(missing)}"}), 400
+        return None, f"Missing fields: {', '.join(missing)}"
 
     try:
         invoice_id = int(data['invoice_id'])
@@ -27,59 +35,114 @@ def create_payment():
         payment_method = str(data['payment_method']).strip()
         payment_date = datetime.strptime(data['payment_date'], '%Y-%m-%d').date()
     except (ValueError, TypeError):
-        return jsonify({'error': 'Invalid data type or format'}), 400
+        return None, 'Invalid data type or format'
 
     if not payment_method:
-        return jsonify({'error': 'Payment method cannot be empty'}), 400
+        return None, 'Payment method cannot be empty'
 
-    if not Invoice.query.get(invoice_id):
+    return {
+        'invoice_id': invoice_id,
+        'payment_date': payment_date,
+        'amount': amount,
+        'payment_method': payment_method
+    }, None
+
+
+# Create a new payment
+@payments_bp.route('/payments', methods=['POST'])
+@role_required('admin', 'agent')
+def create_payment():
+    values, error = validate_payment(request.get_json())
+    if error:
+        return jsonify({'error': error}), 400
+
+    if not Invoice.query.get(values['invoice_id']):
         return jsonify({'error': 'Invoice not found'}), 404
 
-    payment = Payment(
-        invoice_id=invoice_id,
-        payment_date=payment_date,
-        amount=amount,
-        payment_method=payment_method
-    )
+    payment = Payment(**values)
 
     db.session.add(payment)
+    db.session.flush()
+    revenue_rollup.add_payments(Payment.id == payment.id)
+    invoice_balance.adjust(payment.invoice_id, payment.amount)
+    versioning.touch_invoices([payment.invoice_id])
+    report_cache.invalidate()
+    payment_id = payment.id  # read before commit expires the instance
     db.session.commit()
+    audit.record('create', 'payment', payment_id, values)
     return jsonify({'message': 'Payment recorded successfully'}), 201
 
 
+# Bulk import payments (JSON array or NDJSON)
+def persist_payments(rows):
+    invoice_ids = {values['invoice_id'] for _, values in rows}
+    existing = {invoice_id for (invoice_id,) in db.session.query(Invoice.id).filter(Invoice.id.in_(invoice_ids))}
+
+    rejected, accepted = [], []
+    for index, values in rows:
+        if values['invoice_id'] in existing:
+            accepted.append(values)
+        else:
+            rejected.append((index, 'Invoice not found'))
+
+    if accepted:
+        ids = db.session.execute(
+            insert(Payment).returning(Payment.id, sort_by_parameter_order=True), accepted
+        ).scalars().all()
+        revenue_rollup.add_payments(Payment.id.in_(ids))
+        invoice_ids = {values['invoice_id'] for values in accepted}
+        invoice_balance.recompute(Invoice.id.in_(invoice_ids))
+        versioning.touch_invoices(invoice_ids)
+        report_cache.invalidate()
+    return rejected
+
+
+@payments_bp.route('/payments/bulk', methods=['POST'])
+@role_required('admin', 'agent')
+def bulk_create_payments():
+    try:
+        result = import_records(iter_records(), validate_payment, persist_payments)
+    except BulkPayloadError as e:
+        return jsonify({'error': str(e)}), 400
+    audit.record('bulk_create', 'payment', details={'created': result['created'], 'failed': result['failed']})
+    return jsonify(result), 200
+
+
 # Get all payments for an invoice
 @payments_bp.route('/payments/<int:invoice_id>', methods=['GET'])
 def get_payments_for_invoice(invoice_id):
-    Invoice.query.get_or_404(invoice_id)
-    payments = Payment.query.filter_by(invoice_id=invoice_id).all()
+    # Payment writes bump the invoice's version, so it also versions this list
+    etag = versioning.etag_for(Invoice, invoice_id, 'invoice-payments')
+    if etag is None:
+        abort(404)
+    if request.if_none_match.contains(etag):
+        return versioning.not_modified(etag)
 
-    return jsonify([
-        {
-            'id': pay.id,
-            'payment_date': str(pay.payment_date),
-            'amount': pay.amount,
-            'payment_method': pay.payment_method
-        }
-        for pay in payments
-    ]), 200
+    payments = INVOICE_PAYMENT_ROWS.all(INVOICE_PAYMENT_ROWS.select().filter(Payment.invoice_id == invoice_id))
+    return versioning.with_etag(jsonify(payments), etag), 200
 
 
 # Get payment by ID
 @payments_bp.route('/payment/<int:payment_id>', methods=['GET'])
 def get_payment_by_id(payment_id):
+    etag = versioning.etag_for(Payment, payment_id, 'payment')
+    if etag is None:
+        abort(404)
+    if request.if_none_match.contains(etag):
+        return versioning.not_modified(etag)
+
     pay = Payment.query.get_or_404(payment_id)
-    return jsonify({
+    return versioning.with_etag(jsonify({
         'id': pay.id,
         'invoice_id': pay.invoice_id,
         'payment_date': str(pay.payment_date),
         'amount': pay.amount,
         'payment_method': pay.payment_method
-    }), 200
+    }), etag), 200
 
 
 # Update payment (PATCH)
 @payments_bp.route('/payments/<int:payment_id>', methods=['PATCH'])
-@jwt_required()
 @role_required('admin', 'agent')
 def update_payment(payment_id):
     payment = Payment.query.get_or_404(payment_id)
@@ -91,6 +154,10 @@ def update_payment(payment_id):
     if unknown_fields:
         return jsonify({'error': f"Unknown or unauthorized fields: {', '.join(unknown_fields)}"}), 400
 
+    # Take the old values out of the rollup; the new ones go back in below
+    revenue_rollup.remove_payments(Payment.id == payment_id)
+    previous_amount = payment.amount
+
     if 'payment_date' in data:
         try:
             payment.payment_date = datetime.strptime(data['payment_date'], '%Y-%m-%d').date()
@@ -109,19 +176,30 @@ def update_payment(payment_id):
             return jsonify({'error': 'Payment method cannot be empty'}), 400
         payment.payment_method = payment_method
 
+    revenue_rollup.add_payments(Payment.id == payment_id)
+    invoice_balance.adjust(payment.invoice_id, payment.amount - previous_amount)
+    versioning.touch_payments([payment_id])
+    analytics.invalidate(Payment, [payment_id])
+    report_cache.invalidate()
     db.session.commit()
+    audit.record('update', 'payment', payment_id, data)
     return jsonify({'message': 'Payment updated successfully'}), 200
 
 
 # Delete payment
 @payments_bp.route('/payments/<int:payment_id>', methods=['DELETE'])
-@jwt_required()
 @role_required('admin')
 def delete_payment(payment_id):
     payment = Payment.query.get(payment_id)
     if not payment:
         return jsonify({'error': 'Payment not found'}), 404
 
+    revenue_rollup.remove_payments(Payment.id == payment_id)
+    invoice_balance.adjust(payment.invoice_id, -payment.amount)
+    versioning.touch_invoices([payment.invoice_id])
     db.session.delete(payment)
+    analytics.invalidate(Payment, [payment_id])
+    report_cache.invalidate()
     db.session.commit()
+    audit.record('delete', 'payment', payment_id)
     return jsonify({'message': 'Payment deleted successfully'}), 200
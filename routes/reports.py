@@ -1,11 +1,17 @@
-from flask import Blueprint, jsonify, request, Response
-from flask_jwt_extended import jwt_required
+from flask import Blueprint, current_app, jsonify, request, Response
 from auth.permissions import role_required
-from app import db
+from extensions import db
 from models.client import Client
 from models.trip import Trip
 from models.invoice import Invoice
 from models.payment import Payment
+from models.revenue_rollup import RevenueRollup
+from services import analytics, charts
+from services.analytics import AnalyticsError
+from services.charts import ChartError
+from services.pagination import flag_arg
+from services.report_cache import cached_report
+from services.rows import RowSerializer
 from sqlalchemy import func, extract
 from datetime import date
 import csv
@@ -25,52 +31,128 @@ def export_csv(filename, header, rows):
         'Content-Disposition': f'attachment; filename={filename}'
     })
 
+# --------- Queries (shared by JSON, CSV and `flask explain-queries`) ---------
+
+UNPAID_INVOICE_ROWS = RowSerializer(
+    invoice_id=Invoice.id,
+    trip_id=Invoice.trip_id,
+    issue_date=Invoice.issue_date,
+    due_date=Invoice.due_date,
+    amount=Invoice.amount,
+    paid_amount=Invoice.paid_amount,
+    balance_due=Invoice.balance_due,
+    status=Invoice.status
+)
+
+
+# Every status but 'Paid' (see VALID_STATUSES in routes/invoices.py), listed
+# so SQLite can seek the (status, due_date) index instead of scanning
+UNPAID_STATUSES = ('Pending', 'Overdue')
+
+
+def unpaid_invoices_query():
+    # Balances are stored on the invoice: no join or SUM over payments
+    return UNPAID_INVOICE_ROWS.select().filter(Invoice.status.in_(UNPAID_STATUSES)).order_by(Invoice.id)
+
+
+def monthly_revenue_query(year=None, destination=None):
+    # Served from the incrementally maintained rollup, not the payment history
+    query = db.session.query(
+        RevenueRollup.year,
+        RevenueRollup.month,
+        RevenueRollup.destination,
+        RevenueRollup.total_revenue.label('total')
+    )
+
+    if year:
+        query = query.filter(RevenueRollup.year == year)
+    if destination:
+        query = query.filter(RevenueRollup.destination.ilike(f'%{destination}%'))
+
+    return query.order_by(RevenueRollup.year, RevenueRollup.month, RevenueRollup.destination)
+
+
+def revenue_by_client_query():
+    return db.session.query(
+        Client.id, Client.name, func.sum(Payment.amount).label('total_revenue')
+    ).join(Trip).join(Invoice).join(Payment).group_by(Client.id, Client.name)\
+     .order_by(func.sum(Payment.amount).desc())
+
+
+def invoice_summary_query(today=None, include_ids=True):
+    # One grouped pass over the (status, due_date) index: SQLite counts (and
+    # optionally concatenates ids) per status and past-due flag. Unpaid
+    # invoices past their due date are overdue whether or not the sweep in
+    # services/overdue.py has marked them yet.
+    past_due = (Invoice.due_date < (today or date.today())).label('past_due')
+    columns = [Invoice.status, past_due, func.count(Invoice.id).label('total')]
+    if include_ids:
+        columns.append(func.group_concat(Invoice.id).label('ids'))
+
+    return db.session.query(*columns).group_by(Invoice.status, past_due)
+
+
+def summary_bucket(status, past_due):
+    if status == 'Paid':
+        return 'paid'
+    return 'overdue' if past_due else 'pending'
+
+
+# (key, CSV label) of the AR aging columns, by days past due_date
+# (bucketed in services/analytics.py)
+AGING_BUCKETS = (
+    ('current', 'Current'),
+    ('days_1_30', '1-30'),
+    ('days_31_60', '31-60'),
+    ('days_61_90', '61-90'),
+    ('days_over_90', '90+'),
+)
+
+
+def summarize_ar_aging():
+    # Vectorized over the analytics column store: a grouped SQL pass over
+    # millions of outstanding invoices takes seconds on SQLite
+    keys = [key for key, _ in AGING_BUCKETS] + ['total']
+    client_ids, names, amounts, totals = analytics.ar_aging()
+    clients = [
+        (client_id, name, dict(zip(keys, row)))
+        for client_id, name, row in zip(client_ids, names, amounts)
+    ]
+    return clients, dict(zip(keys, totals))
+
+
+def summarize_invoices(include_ids=True):
+    summary = {name: (0, []) for name in ('paid', 'pending', 'overdue')}
+    for row in invoice_summary_query(include_ids=include_ids).all():
+        name = summary_bucket(row.status, row.past_due)
+        total, ids = summary[name]
+        if include_ids and row.ids:
+            ids = ids + list(map(int, row.ids.split(',')))
+        summary[name] = (total + row.total, ids)
+    return {name: (total, sorted(ids)) for name, (total, ids) in summary.items()}
+
 # --------- Reports (JSON) ---------
 
 @reports_bp.route('/reports/unpaid-invoices', methods=['GET'])
-@jwt_required()
 @role_required('admin', 'analyst')
+@cached_report
 def unpaid_invoices():
-    invoices = Invoice.query.filter(Invoice.status != 'Paid').all()
-    return jsonify([
-        {
-            'invoice_id': inv.id,
-            'trip_id': inv.trip_id,
-            'issue_date': str(inv.issue_date),
-            'due_date': str(inv.due_date),
-            'amount': inv.amount,
-            'status': inv.status
-        } for inv in invoices
-    ])
+    return jsonify(UNPAID_INVOICE_ROWS.all(unpaid_invoices_query()))
 
 
 @reports_bp.route('/reports/monthly-revenue', methods=['GET'])
-@jwt_required()
 @role_required('admin', 'analyst')
+@cached_report
 def monthly_revenue():
     year = request.args.get('year', type=int)
     destination = request.args.get('destination', type=str)
 
-    query = db.session.query(
-        func.strftime('%Y', Payment.payment_date).label('year'),
-        func.strftime('%m', Payment.payment_date).label('month'),
-        Trip.destination,
-        func.sum(Payment.amount).label('total')
-    ).select_from(Payment)\
-     .join(Invoice, Payment.invoice_id == Invoice.id)\
-     .join(Trip, Invoice.trip_id == Trip.id)
-
-    if year:
-        query = query.filter(func.strftime('%Y', Payment.payment_date) == str(year))
-    if destination:
-        query = query.filter(Trip.destination.ilike(f'%{destination}%'))
-
-    results = query.group_by('year', 'month', Trip.destination).order_by('year', 'month').all()
+    results = monthly_revenue_query(year, destination).all()
 
     return jsonify([
         {
-            'year': r.year,
-            'month': r.month,
+            'year': f'{r.year:04d}',
+            'month': f'{r.month:02d}',
             'destination': r.destination,
             'total_revenue': round(r.total, 2)
         } for r in results
@@ -79,13 +161,10 @@ def monthly_revenue():
 
 
 @reports_bp.route('/reports/revenue-by-client', methods=['GET'])
-@jwt_required()
 @role_required('admin', 'analyst')
+@cached_report
 def revenue_by_client():
-    results = db.session.query(
-        Client.id, Client.name, func.sum(Payment.amount).label('total_revenue')
-    ).join(Trip).join(Invoice).join(Payment).group_by(Client.id, Client.name)\
-     .order_by(func.sum(Payment.amount).desc()).all()
+    results = revenue_by_client_query().all()
 
     return jsonify([
         {
@@ -97,101 +176,240 @@ def revenue_by_client():
 
 
 @reports_bp.route('/reports/invoice-summary', methods=['GET'])
-@jwt_required()
 @role_required('admin', 'analyst')
+@cached_report
 def invoice_summary():
-    today = date.today()
-    invoices = Invoice.query.all()
+    include_ids = flag_arg(request.args, 'include_ids', default=True)
+    summary = summarize_invoices(include_ids)
 
-    paid = [i.id for i in invoices if i.status == 'Paid']
-    overdue = [i.id for i in invoices if i.status != 'Paid' and i.due_date < today]
-    pending = [i.id for i in invoices if i.status != 'Paid' and i.due_date >= today]
+    result = {}
+    for name in ('paid', 'pending', 'overdue'):
+        total, ids = summary[name]
+        result[f'total_{name}'] = total
+        if include_ids:
+            result[f'{name}_invoice_ids'] = ids
+
+    return jsonify(result)
+
+
+@reports_bp.route('/reports/ar-aging', methods=['GET'])
+@role_required('admin', 'analyst')
+@cached_report
+def ar_aging():
+    clients, totals = summarize_ar_aging()
 
     return jsonify({
-        "total_paid": len(paid),
-        "paid_invoice_ids": paid,
-        "total_pending": len(pending),
-        "pending_invoice_ids": pending,
-        "total_overdue": len(overdue),
-        "overdue_invoice_ids": overdue
+        'as_of': str(date.today()),
+        'clients': [
+            {
+                'client_id': client_id,
+                'client_name': name,
+                **{key: round(value, 2) for key, value in amounts.items()}
+            } for client_id, name, amounts in clients
+        ],
+        'totals': {key: round(value, 2) for key, value in totals.items()}
     })
 
-# --------- Reports (CSV Export) ---------
 
-@reports_bp.route('/reports/unpaid-invoices/export', methods=['GET'])
-@jwt_required()
+@reports_bp.route('/reports/pivot', methods=['GET'])
 @role_required('admin', 'analyst')
-def export_unpaid_invoices():
-    invoices = Invoice.query.filter(Invoice.status != 'Paid').all()
+@cached_report
+def revenue_pivot():
+    try:
+        result = analytics.pivot(**analytics.parse_pivot_args(request.args))
+    except AnalyticsError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify(result)
+
+# --------- CSV tables (shared by the export routes and /exports jobs) ---------
+
+def unpaid_invoices_table(args):
+    invoices = db.session.execute(unpaid_invoices_query()).all()
     rows = [
-        [inv.id, inv.trip_id, inv.amount, inv.issue_date, inv.due_date, inv.status]
+        [inv.invoice_id, inv.trip_id, inv.amount, inv.paid_amount, inv.balance_due, inv.issue_date, inv.due_date,
+         inv.status]
         for inv in invoices
     ]
-    return export_csv('unpaid_invoices.csv',
-        ['Invoice ID', 'Trip ID', 'Amount', 'Issue Date', 'Due Date', 'Status'], rows)
+    return ('unpaid_invoices.csv',
+        ['Invoice ID', 'Trip ID', 'Amount', 'Paid Amount', 'Balance Due', 'Issue Date', 'Due Date', 'Status'], rows)
 
 
-@reports_bp.route('/reports/monthly-revenue/export', methods=['GET'])
-@jwt_required()
-@role_required('admin', 'analyst')
-def export_monthly_revenue():
-    year = request.args.get('year', type=int)
-    destination = request.args.get('destination', type=str)
+def monthly_revenue_table(args):
+    year = args.get('year', type=int)
+    destination = args.get('destination', type=str)
 
-    query = db.session.query(
-        func.strftime('%Y', Payment.payment_date).label('year'),
-        func.strftime('%m', Payment.payment_date).label('month'),
-        Trip.destination,
-        func.sum(Payment.amount).label('total')
-    ).select_from(Payment)\
-     .join(Invoice, Payment.invoice_id == Invoice.id)\
-     .join(Trip, Invoice.trip_id == Trip.id)
+    results = monthly_revenue_query(year, destination).all()
 
-    if year:
-        query = query.filter(func.strftime('%Y', Payment.payment_date) == str(year))
-    if destination:
-        query = query.filter(Trip.destination.ilike(f'%{destination}%'))
+    rows = [[f'{r.year:04d}', f'{r.month:02d}', r.destination, round(r.total, 2)] for r in results]
 
-    results = query.group_by('year', 'month', Trip.destination).order_by('year', 'month').all()
+    return ('monthly_revenue.csv',
+        ['Year', 'Month', 'Destination', 'Total Revenue'], rows)
 
-    rows = [[r.year, r.month, r.destination, round(r.total, 2)] for r in results]
 
-    return export_csv('monthly_revenue.csv',
-        ['Year', 'Month', 'Destination', 'Total Revenue'], rows)
+def revenue_by_client_table(args):
+    results = revenue_by_client_query().all()
 
+    rows = [[r.id, r.name, round(r.total_revenue, 2)] for r in results]
 
+    return ('revenue_by_client.csv',
+        ['Client ID', 'Client Name', 'Total Revenue'], rows)
 
-@reports_bp.route('/reports/revenue-by-client/export', methods=['GET'])
-@jwt_required()
+
+def invoice_summary_table(args):
+    include_ids = flag_arg(args, 'include_ids', default=True)
+    summary = summarize_invoices(include_ids)
+
+    rows = [
+        [label, ", ".join(map(str, summary[name][1])), summary[name][0]]
+        for label, name in (('Paid', 'paid'), ('Pending', 'pending'), ('Overdue', 'overdue'))
+    ]
+
+    return ('invoice_summary.csv',
+        ['Status', 'Invoice IDs', 'Total Count'], rows)
+
+
+def ar_aging_table(args):
+    clients, totals = summarize_ar_aging()
+    keys = [key for key, _ in AGING_BUCKETS] + ['total']
+
+    rows = [[client_id, name] + [round(amounts[key], 2) for key in keys] for client_id, name, amounts in clients]
+    rows.append(['', 'Total'] + [round(totals[key], 2) for key in keys])
+
+    return ('ar_aging.csv',
+        ['Client ID', 'Client Name'] + [label for _, label in AGING_BUCKETS] + ['Total'], rows)
+
+
+def revenue_pivot_table(args):
+    # Raises AnalyticsError for invalid pivot arguments
+    result = analytics.pivot(**analytics.parse_pivot_args(args))
+
+    labels = result['rows'] + (['client_name'] if 'client_id' in result['rows'] else [])
+    if result['columns'] is None:
+        header = labels + [result['agg']]
+        rows = [[row[name] for name in labels] + [row['value']] for row in result['data']]
+    else:
+        header = labels + result['column_labels'] + ['Total']
+        rows = [
+            [row[name] for name in labels] + [row['values'].get(column) for column in result['column_labels']]
+            + [row['total']] for row in result['data']
+        ]
+        rows.append(['Total'] + [''] * (len(labels) - 1)
+                    + [result['totals'][column] for column in result['column_labels']] + [result['total']])
+
+    return 'revenue_pivot.csv', header, rows
+
+
+# report name -> table builder, as in /reports/<name>/export
+CSV_TABLES = {
+    'unpaid-invoices': unpaid_invoices_table,
+    'monthly-revenue': monthly_revenue_table,
+    'revenue-by-client': revenue_by_client_table,
+    'invoice-summary': invoice_summary_table,
+    'ar-aging': ar_aging_table,
+    'pivot': revenue_pivot_table,
+}
+
+# --------- Reports (CSV Export) ---------
+
+@reports_bp.route('/reports/unpaid-invoices/export', methods=['GET'])
 @role_required('admin', 'analyst')
-def export_revenue_by_client():
-    results = db.session.query(
-        Client.id, Client.name, func.sum(Payment.amount)
-    ).join(Trip).join(Invoice).join(Payment)\
-     .group_by(Client.id, Client.name).order_by(func.sum(Payment.amount).desc()).all()
+@cached_report
+def export_unpaid_invoices():
+    return export_csv(*unpaid_invoices_table(request.args))
 
-    rows = [[r.id, r.name, round(r[2], 2)] for r in results]
 
-    return export_csv('revenue_by_client.csv',
-        ['Client ID', 'Client Name', 'Total Revenue'], rows)
+@reports_bp.route('/reports/monthly-revenue/export', methods=['GET'])
+@role_required('admin', 'analyst')
+@cached_report
+def export_monthly_revenue():
+    return export_csv(*monthly_revenue_table(request.args))
+
+
+@reports_bp.route('/reports/revenue-by-client/export', methods=['GET'])
+@role_required('admin', 'analyst')
+@cached_report
+def export_revenue_by_client():
+    return export_csv(*revenue_by_client_table(request.args))
 
 
 @reports_bp.route('/reports/invoice-summary/export', methods=['GET'])
-@jwt_required()
 @role_required('admin', 'analyst')
+@cached_report
 def export_invoice_summary():
-    today = date.today()
-    invoices = Invoice.query.all()
+    return export_csv(*invoice_summary_table(request.args))
 
-    paid = [i.id for i in invoices if i.status == 'Paid']
-    overdue = [i.id for i in invoices if i.status != 'Paid' and i.due_date < today]
-    pending = [i.id for i in invoices if i.status != 'Paid' and i.due_date >= today]
 
-    rows = [
-        ['Paid', ", ".join(map(str, paid)), len(paid)],
-        ['Pending', ", ".join(map(str, pending)), len(pending)],
-        ['Overdue', ", ".join(map(str, overdue)), len(overdue)],
-    ]
+@reports_bp.route('/reports/ar-aging/export', methods=['GET'])
+@role_required('admin', 'analyst')
+@cached_report
+def export_ar_aging():
+    return export_csv(*ar_aging_table(request.args))
 
-    return export_csv('invoice_summary.csv',
-        ['Status', 'Invoice IDs', 'Total Count'], rows)
+
+@reports_bp.route('/reports/pivot/export', methods=['GET'])
+@role_required('admin', 'analyst')
+@cached_report
+def export_revenue_pivot():
+    try:
+        return export_csv(*revenue_pivot_table(request.args))
+    except AnalyticsError as e:
+        return jsonify({'error': str(e)}), 400
+
+# --------- Reports (Charts) ---------
+
+def monthly_revenue_chart(args):
+    year = args.get('year', type=int)
+    destination = args.get('destination', type=str)
+
+    totals = {}
+    for r in monthly_revenue_query(year, destination).all():
+        label = f'{r.year:04d}-{r.month:02d}'
+        totals[label] = totals.get(label, 0.0) + r.total
+
+    return {
+        'kind': 'bar',
+        'title': 'Monthly revenue' + (f' ({destination})' if destination else ''),
+        'labels': list(totals),
+        'values': [round(total, 2) for total in totals.values()],
+        'value_label': 'Revenue'
+    }
+
+
+def revenue_by_client_chart(args):
+    max_clients = current_app.config['CHART_MAX_CLIENTS']
+    limit = min(max(args.get('limit', 20, type=int), 1), max_clients)
+    results = revenue_by_client_query().limit(limit).all()
+
+    return {
+        'kind': 'barh',
+        'title': f'Top {limit} clients by revenue',
+        'labels': [row.name for row in results],
+        'values': [round(row.total_revenue, 2) for row in results],
+        'value_label': 'Revenue'
+    }
+
+
+CHARTS = {
+    'monthly-revenue': monthly_revenue_chart,
+    'revenue-by-client': revenue_by_client_chart,
+}
+
+
+@reports_bp.route('/reports/<name>/chart', methods=['GET'])
+@role_required('admin', 'analyst')
+@cached_report
+def report_chart(name):
+    if name not in CHARTS:
+        return jsonify({'error': f"No chart for '{name}'. Available: {', '.join(CHARTS)}"}), 404
+
+    image_format = request.args.get('format', 'png')
+    if image_format not in charts.FORMATS:
+        return jsonify({'error': f"Invalid format. Must be one of: {', '.join(charts.FORMATS)}"}), 400
+
+    try:
+        image = charts.render(CHARTS[name](request.args), image_format)
+    except ChartError as e:
+        return jsonify({'error': str(e)}), 503
+
+    return Response(image, mimetype=charts.FORMATS[image_format])
@@ -0,0 +1,40 @@
+from flask import Blueprint, request, jsonify
+from auth.permissions import role_required
+from services import search_index
+
+search_bp = Blueprint('search', __name__)
+
+MAX_SEARCH_RESULTS = 100
+
+# ----------------------------
+# 🔎 GET /search?q=...&type=client,trip,note
+# ----------------------------
+@search_bp.route('/search', methods=['GET'])
+@role_required('admin', 'agent', 'analyst')
+def search():
+    if not search_index.is_available():
+        return jsonify({'error': 'Full-text search is not available on this database'}), 503
+
+    terms = request.args.get('q', '').split()
+    if not any(len(term) >= search_index.MIN_TERM_LENGTH for term in terms):
+        return jsonify({'error': f'q must contain a term of at least {search_index.MIN_TERM_LENGTH} characters'}), 400
+
+    kinds = request.args.get('type', ','.join(search_index.KIND_CODES)).split(',')
+    unknown = [kind for kind in kinds if kind not in search_index.KIND_CODES]
+    if unknown:
+        return jsonify({'error': f"Invalid type(s): {', '.join(unknown)}"}), 400
+
+    limit = request.args.get('limit', 20, type=int)
+    if limit < 1:
+        return jsonify({'error': 'limit must be positive'}), 400  # SQLite reads LIMIT -1 as no limit
+    limit = min(limit, MAX_SEARCH_RESULTS)
+
+    return jsonify([
+        {
+            'type': row.kind,
+            'id': row.ref_id,
+            'client_id': row.client_id,
+            'score': round(-row.rank, 4),  # bm25() is lower-is-better
+            'snippet': row.snippet
+        } for row in search_index.search(terms, kinds, limit)
+    ]), 200
@@ -1,29 +1,40 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
 from auth.permissions import role_required
-from app import db
+from extensions import db
 from models.trip import Trip
 from models.client import Client
+from models.invoice import Invoice
+from services import analytics, audit, report_cache, revenue_rollup, search_index, versioning
+from services.bulk_import import BulkPayloadError, import_records, iter_records
+from services.pagination import PaginationError, flag_arg, keyset_rows, parse_page_args
+from services.rows import RowSerializer
+from services.streaming import stream_json_array
+from sqlalchemy import insert
 from datetime import datetime
 
 trips_bp = Blueprint('trips', __name__)
 
-# ------------------------
-# CREATE A NEW TRIP
-# ------------------------
-@trips_bp.route('/trips', methods=['POST'])
-@jwt_required()
-@role_required('admin', 'agent')
-def create_trip():
-    user_id = get_jwt_identity()
-    print(f"Trip created by user: {user_id}")
 
-    data = request.get_json()
+# GET /trips rows: Core select, no ORM objects
+TRIP_ROWS = RowSerializer(
+    id=Trip.id,
+    destination=Trip.destination,
+    start_date=Trip.start_date,
+    end_date=Trip.end_date,
+    price=Trip.price,
+    notes=Trip.notes,
+    client_id=Trip.client_id
+)
+
+
+def validate_trip(data):
+    if not isinstance(data, dict):
+        return None, 'Expected a JSON object'
 
     required_fields = ['destination', 'start_date', 'end_date', 'price', 'client_id']
     missing = [field for field in required_fields if field not in data]
     if missing:
-        return jsonify({'error': f"Missing required fields: {', '.join(missing)}"}), 400
+        return None, f"Missing required fields: {', '.join(missing)}"
 
     try:
         start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date()
@@ -31,41 +42,99 @@ def create_trip():
         price = float(data['price'])
         client_id = int(data['client_id'])
     except (ValueError, TypeError):
-        return jsonify({'error': 'Invalid data format for date, price, or client_id'}), 400
+        return None, 'Invalid data format for date, price, or client_id'
+
+    return {
+        'destination': data['destination'],
+        'start_date': start_date,
+        'end_date': end_date,
+        'price': price,
+        'notes': data.get('notes'),
+        'client_id': client_id
+    }, None
+
+
+# ------------------------
+# CREATE A NEW TRIP
+# ------------------------
+@trips_bp.route('/trips', methods=['POST'])
+@role_required('admin', 'agent')
+def create_trip():
+    values, error = validate_trip(request.get_json())
+    if error:
+        return jsonify({'error': error}), 400
 
     # Check if client exists
-    if not Client.query.get(client_id):
+    if not Client.query.get(values['client_id']):
         return jsonify({'error': 'Client not found'}), 404
 
-    trip = Trip(
-        destination=data['destination'],
-        start_date=start_date,
-        end_date=end_date,
-        price=price,
-        notes=data.get('notes'),
-        client_id=client_id
-    )
+    trip = Trip(**values)
 
     db.session.add(trip)
+    db.session.flush()
+    search_index.index_trip(trip)
+    versioning.touch_clients([trip.client_id])
+    report_cache.invalidate()
+    trip_id = trip.id  # read before commit expires the instance
     db.session.commit()
+    audit.record('create', 'trip', trip_id, values)
 
     return jsonify({'message': 'Trip created successfully'}), 201
 
 
 # ------------------------
-# LIST TRIPS WITH FILTERS
+# BULK IMPORT TRIPS (JSON ARRAY OR NDJSON)
+# ------------------------
+def persist_trips(rows):
+    client_ids = {values['client_id'] for _, values in rows}
+    existing = {client_id for (client_id,) in db.session.query(Client.id).filter(Client.id.in_(client_ids))}
+
+    rejected, accepted = [], []
+    for index, values in rows:
+        if values['client_id'] in existing:
+            accepted.append(values)
+        else:
+            rejected.append((index, 'Client not found'))
+
+    if accepted:
+        ids = db.session.execute(
+            insert(Trip).returning(Trip.id, sort_by_parameter_order=True), accepted
+        ).scalars().all()
+        search_index.add_many('trip', [
+            {'ref_id': trip_id, 'client_id': v['client_id'], 'destination': v['destination'], 'notes': v['notes']}
+            for trip_id, v in zip(ids, accepted)
+        ])
+        versioning.touch_clients({v['client_id'] for v in accepted})
+        report_cache.invalidate()
+    return rejected
+
+
+@trips_bp.route('/trips/bulk', methods=['POST'])
+@role_required('admin', 'agent')
+def bulk_create_trips():
+    try:
+        result = import_records(iter_records(), validate_trip, persist_trips)
+    except BulkPayloadError as e:
+        return jsonify({'error': str(e)}), 400
+    audit.record('bulk_create', 'trip', details={'created': result['created'], 'failed': result['failed']})
+    return jsonify(result), 200
+
+
+# ------------------------
+# LIST TRIPS WITH FILTERS (KEYSET PAGINATION)
 # ------------------------
 @trips_bp.route('/trips', methods=['GET'])
-@jwt_required()
 @role_required('admin', 'agent', 'analyst')
 def get_trips():
     destination = request.args.get('destination')
     client_id = request.args.get('client_id', type=int)
     start_date = request.args.get('start_date')  # Format: YYYY-MM-DD
 
-    query = Trip.query
+    query = TRIP_ROWS.select()
 
-    if destination:
+    if destination and search_index.is_indexable(destination):
+        query = query.filter(Trip.id.in_(search_index.matching_ids('trip', {'destination': destination})))
+    elif destination:
         query = query.filter(Trip.destination.ilike(f"%{destination}%"))
     if client_id:
         query = query.filter(Trip.client_id == client_id)
@@ -76,29 +145,30 @@ def get_trips():
         except ValueError:
             return jsonify({'error': 'Invalid start_date format (expected YYYY-MM-DD)'}), 400
 
-    trips = query.all()
+    try:
+        limit, after_id = parse_page_args(request.args)
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if flag_arg(request.args, 'stream'):
+        query = query.filter(Trip.id > after_id).order_by(Trip.id)
+        return stream_json_array(query, TRIP_ROWS)
 
-    return jsonify([
-        {
-            'id': t.id,
-            'destination': t.destination,
-            'start_date': str(t.start_date),
-            'end_date': str(t.end_date),
-            'price': t.price,
-            'notes': t.notes,
-            'client_id': t.client_id
-        } for t in trips
-    ]), 200
+    trips, next_cursor = keyset_rows(query, Trip.id, limit, after_id)
+    return jsonify({
+        'items': [TRIP_ROWS(t) for t in trips],
+        'next_cursor': next_cursor
+    }), 200
 
 
 # ------------------------
 # UPDATE TRIP
 # ------------------------
 @trips_bp.route('/trips/<int:trip_id>', methods=['PATCH'])
-@jwt_required()
 @role_required('admin', 'agent')
 def update_trip(trip_id):
     trip = Trip.query.get_or_404(trip_id)
+    previous_client_id = trip.client_id
     data = request.get_json()
 
     allowed_fields = {'destination', 'start_date', 'end_date', 'price', 'notes', 'client_id'}
@@ -106,8 +176,11 @@ def update_trip(trip_id):
     if unknown:
         return jsonify({'error': f"Invalid field(s): {', '.join(unknown)}"}), 400
 
-    if 'destination' in data:
+    if 'destination' in data and data['destination'] != trip.destination:
+        # Move this trip's payments from the old destination to the new one
+        revenue_rollup.remove_payments(Invoice.trip_id == trip_id)
         trip.destination = data['destination']
+        revenue_rollup.add_payments(Invoice.trip_id == trip_id)
     if 'start_date' in data:
         try:
             trip.start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date()
@@ -134,7 +207,14 @@ def update_trip(trip_id):
             return jsonify({'error': 'Client not found'}), 404
         trip.client_id = client_id
 
+    search_index.index_trip(trip)
+    versioning.touch_trips([trip_id])
+    if trip.client_id != previous_client_id:
+        versioning.touch_clients([previous_client_id])
+    analytics.invalidate(Trip, [trip_id])
+    report_cache.invalidate()
     db.session.commit()
+    audit.record('update', 'trip', trip_id, data)
     return jsonify({'message': 'Trip updated successfully'}), 200
 
 
@@ -142,14 +222,19 @@ def update_trip(trip_id):
 # DELETE TRIP
 # ------------------------
 @trips_bp.route('/trips/<int:trip_id>', methods=['DELETE'])
-@jwt_required()
 @role_required('admin')
 def delete_trip(trip_id):
     trip = Trip.query.get(trip_id)
     if not trip:
         return jsonify({'error': 'Trip not found'}), 404
 
+    revenue_rollup.remove_payments(Invoice.trip_id == trip_id)
+    search_index.remove('trip', [trip_id])
+    versioning.touch_clients([trip.client_id])
     db.session.delete(trip)
+    analytics.invalidate(Trip, [trip_id])
+    report_cache.invalidate()
     db.session.commit()
+    audit.record('delete', 'trip', trip_id)
 
     return jsonify({'message': 'Trip deleted successfully'}), 200
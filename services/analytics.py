@@ -0,0 +1,520 @@
+from datetime import date
+from threading import Lock
+import numpy as np
+from flask import current_app
+from sqlalchemy import Integer, cast, delete, func, insert, select
+from extensions import db
+from models.analytics_change import AnalyticsChange
+from models.client import Client
+from models.trip import Trip
+from models.invoice import Invoice
+from models.payment import Payment
+from services.invoice_balance import PAID_TOLERANCE
+
+# Per-worker, in-memory copy of the payment history and the invoice, trip and
+# client columns it joins to. Inserts are loaded from each table's
+# high-water mark (its largest live id) on the next report request.
+# Updates and deletes are logged to analytics_change; on its next request
+# each worker re-reads just those rows (and the loaded rows under them) and
+# patches its arrays in place. Deleted rows stay in the arrays, masked out
+# by `live`.
+FETCH_BATCH = 50000
+RELOAD_BATCH = 500  # ids per IN (...) when re-reading changed rows
+UNIX_EPOCH_JULIAN_DAY = 2440587.5
+
+AGGREGATES = ('sum', 'count', 'mean', 'min', 'max')
+
+_lock = Lock()
+_store = None
+
+
+class AnalyticsError(ValueError):
+    pass
+
+
+# ----------------------------
+# 🧹 Invalidation (call before commit in client/trip/invoice/payment updates and deletes)
+# ----------------------------
+def invalidate(model, ids):
+    # Inserts need no call: they are picked up from the high-water marks.
+    # Deleting a row covers the rows cascaded away under it.
+    db.session.execute(insert(AnalyticsChange), [
+        {'entity': model.__tablename__, 'entity_id': entity_id} for entity_id in ids
+    ])
+    keep = current_app.config['ANALYTICS_CHANGE_LOG_SIZE']
+    db.session.execute(delete(AnalyticsChange).where(
+        AnalyticsChange.id <= select(func.max(AnalyticsChange.id) - keep).scalar_subquery()
+    ))
+
+
+def change_log_bounds():
+    return db.session.query(func.min(AnalyticsChange.id), func.max(AnalyticsChange.id)).one()
+
+
+# ----------------------------
+# 🧱 Column store
+# ----------------------------
+def epoch_days(column):
+    # Dates as days since 1970-01-01, which load straight into datetime64[D]
+    return cast(func.julianday(column) - UNIX_EPOCH_JULIAN_DAY, Integer)
+
+
+class Categories:
+    # Dictionary encoding of a string column: integer codes in first-seen order
+    def __init__(self):
+        self.labels = []
+        self.codes = {}
+
+    def encode(self, values):
+        codes = self.codes
+        for value in values:
+            if value not in codes:
+                codes[value] = len(self.labels)
+                self.labels.append(value)
+        return np.fromiter((codes[value] for value in values), dtype=np.int32, count=len(values))
+
+
+class Table:
+    # One array per column, in id order; columns are {name: (expression, dtype)}
+    # and dtype 'category' is dictionary encoded
+    def __init__(self, model, **columns):
+        self.model = model
+        self.columns = columns
+        self.categories = {name: Categories() for name, (_, dtype) in columns.items() if dtype == 'category'}
+        self.ids = np.empty(0, dtype=np.int32)
+        self.live = np.empty(0, dtype=bool)  # False once the row is deleted
+        self.data = {name: self.convert(name, np.empty(0, dtype=object)) for name in columns}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def convert(self, name, values):
+        # values: one column of a fetched batch, as an object array
+        dtype = self.columns[name][1]
+        if dtype == 'category':
+            return self.categories[name].encode(values)
+        if dtype == 'datetime64[D]':
+            return values.astype(np.int64).astype(dtype)
+        return values.astype(dtype)
+
+    def select(self):
+        return select(self.model.id, *[expression.label(name) for name, (expression, _) in self.columns.items()])
+
+    def refresh(self):
+        # Loads the rows inserted since the last refresh. Without AUTOINCREMENT
+        # SQLite numbers a new row max(id) + 1, so once the rows at the end of
+        # the table are deleted their ids are handed out again: the high-water
+        # mark is the last live id, and a returning id goes back into its old
+        # slot. Returns (appended count, revived positions), or None when an
+        # id falls between loaded ones and the store has to be reloaded.
+        tail = len(self.live) - int(np.argmax(self.live[::-1])) if self.live.any() else 0
+        high_water = int(self.ids[tail - 1]) if tail else 0
+        loaded_max = int(self.ids[-1]) if len(self.ids) else 0
+        stmt = self.select().where(self.model.id > high_water).order_by(self.model.id)
+
+        # Batches are read as plain tuples from the DB-API cursor and turned
+        # into one 2-D array each: building Row objects (or zipping columns)
+        # costs more than SQLite's own fetch at millions of rows
+        chunks = []
+        result = db.session.connection().execute(stmt)
+        try:
+            for rows in iter(lambda: result.cursor.fetchmany(FETCH_BATCH), []):
+                batch = np.array(rows, dtype=object)
+                chunks.append((batch[:, 0].astype(np.int32),
+                               [self.convert(name, batch[:, i]) for i, name in enumerate(self.columns, 1)]))
+        finally:
+            result.close()
+
+        revived = []
+        for index, (ids, values) in enumerate(chunks):
+            returning = int(np.searchsorted(ids, loaded_max, side='right'))
+            if not returning:
+                break
+            at = self.positions(ids[:returning])
+            if not np.array_equal(self.ids[np.minimum(at, len(self.ids) - 1)], ids[:returning]):
+                return None
+            for i, name in enumerate(self.columns):
+                self.data[name][at] = values[i][:returning]
+            self.live[at] = True
+            revived.append(at)
+            chunks[index] = (ids[returning:], [column[returning:] for column in values])
+        revived = np.concatenate(revived) if revived else np.empty(0, dtype=np.int32)
+
+        count = sum(len(ids) for ids, _ in chunks)
+        if not count:
+            return 0, revived
+        self.ids = np.concatenate([self.ids] + [ids for ids, _ in chunks])
+        for i, name in enumerate(self.columns):
+            self.data[name] = np.concatenate([self.data[name]] + [values[i] for _, values in chunks])
+        self.live = np.concatenate([self.live, np.ones(count, dtype=bool)])
+        return count, revived
+
+    def reload(self, positions):
+        # Re-reads the rows at these positions: rows still in the database get
+        # their current values, the others are marked deleted. An id SQLite
+        # handed to a new row after the old one was deleted comes back live.
+        # Returns the positions that were found.
+        found = []
+        for start in range(0, len(positions), RELOAD_BATCH):
+            batch = positions[start:start + RELOAD_BATCH]
+            rows = db.session.execute(self.select().where(self.model.id.in_(self.ids[batch].tolist()))).all()
+            self.live[batch] = False
+            if not rows:
+                continue
+            rows = np.array([tuple(row) for row in rows], dtype=object)
+            at = self.positions(rows[:, 0].astype(np.int32))
+            for i, name in enumerate(self.columns, 1):
+                self.data[name][at] = self.convert(name, rows[:, i])
+            self.live[at] = True
+            found.append(at)
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int32)
+
+    def positions(self, ids):
+        return np.searchsorted(self.ids, np.asarray(ids, dtype=self.ids.dtype)).astype(np.int32)
+
+    def loaded_positions(self, ids):
+        # Positions of the ids that are loaded; others are skipped
+        ids = np.unique(np.asarray(ids, dtype=self.ids.dtype))
+        positions = np.minimum(self.positions(ids), max(len(self.ids) - 1, 0))
+        return positions[self.ids[positions] == ids] if len(self.ids) else positions[:0]
+
+
+class ColumnStore:
+    def __init__(self, change_id):
+        self.change_id = change_id  # last analytics_change row applied
+        self.payments = Table(
+            Payment,
+            invoice_id=(Payment.invoice_id, np.int32),
+            payment_date=(epoch_days(Payment.payment_date), 'datetime64[D]'),
+            amount=(Payment.amount, np.float64),
+            payment_method=(Payment.payment_method, 'category')
+        )
+        self.invoices = Table(
+            Invoice,
+            trip_id=(Invoice.trip_id, np.int32),
+            amount=(Invoice.amount, np.float64),
+            due_date=(epoch_days(Invoice.due_date), 'datetime64[D]')
+        )
+        self.trips = Table(
+            Trip,
+            client_id=(Trip.client_id, np.int32),
+            destination=(Trip.destination, 'category'),
+            start_date=(epoch_days(Trip.start_date), 'datetime64[D]')
+        )
+        self.clients = Table(Client, name=(Client.name, object))
+
+        # Row positions of each row's parent, extended as rows are appended
+        self.payment_invoice = np.empty(0, dtype=np.int32)
+        self.invoice_trip = np.empty(0, dtype=np.int32)
+        self.trip_client = np.empty(0, dtype=np.int32)
+
+    def refresh(self):
+        # Children first: a payment is committed after its invoice (trip,
+        # client), so every parent of a loaded row is loaded too. Returns
+        # False when the store has to be reloaded instead.
+        tables = [
+            (self.payments, 'invoice_id', self.invoices, 'payment_invoice'),
+            (self.invoices, 'trip_id', self.trips, 'invoice_trip'),
+            (self.trips, 'client_id', self.clients, 'trip_client'),
+        ]
+        loaded = [table.refresh() for table, _, _, _ in tables] + [self.clients.refresh()]
+        if None in loaded:
+            return False
+
+        for (count, revived), (table, foreign_key, parent, link) in zip(loaded, tables):
+            if len(revived):
+                getattr(self, link)[revived] = parent.positions(table.data[foreign_key][revived])
+            if count:
+                new_positions = parent.positions(table.data[foreign_key][-count:])
+                setattr(self, link, np.concatenate([getattr(self, link), new_positions]))
+        return True
+
+    def apply_changes(self, changes):
+        # changes: {table name: ids}. Parents first, each pulling in its
+        # loaded children: a deleted trip takes its invoices and payments
+        # with it, and an updated one may have moved to another client.
+        # Run after refresh(), so a row's new parent is already loaded.
+        levels = [
+            (self.clients, None, None, None),
+            (self.trips, 'client_id', self.clients, 'trip_client'),
+            (self.invoices, 'trip_id', self.trips, 'invoice_trip'),
+            (self.payments, 'invoice_id', self.invoices, 'payment_invoice'),
+        ]
+        parent_positions = np.empty(0, dtype=np.int32)
+        for table, foreign_key, parent, link in levels:
+            positions = table.loaded_positions(changes.get(table.model.__tablename__, []))
+            if link is not None and len(parent_positions):
+                children = np.flatnonzero(np.isin(getattr(self, link), parent_positions)).astype(np.int32)
+                positions = np.union1d(positions, children)
+            found = table.reload(positions)
+            if link is not None and len(found):
+                getattr(self, link)[found] = parent.positions(table.data[foreign_key][found])
+            parent_positions = positions
+
+    # Payment rows joined up to their trip and client
+    def payment_trip(self):
+        return self.invoice_trip[self.payment_invoice]
+
+    def payment_client(self):
+        return self.trip_client[self.payment_trip()]
+
+
+def refreshed_store():
+    # Call with _lock held, for the whole computation: refresh swaps arrays
+    global _store
+    first_change, last_change = change_log_bounds()
+    last_change = last_change or 0
+    if _store is not None and first_change is not None and first_change > _store.change_id + 1:
+        _store = None  # the log was pruned past this worker's position
+    if _store is None:
+        # Rows changed while loading are applied again on the next request
+        _store = ColumnStore(last_change)
+        _store.refresh()
+        return _store
+
+    changes = {}
+    if last_change > _store.change_id:
+        for entity, entity_id in db.session.query(AnalyticsChange.entity, AnalyticsChange.entity_id)\
+                .filter(AnalyticsChange.id > _store.change_id, AnalyticsChange.id <= last_change):
+            changes.setdefault(entity, []).append(entity_id)
+    if not _store.refresh():
+        # An id SQLite reused falls between loaded rows
+        _store = ColumnStore(last_change)
+        _store.refresh()
+        return _store
+    if changes:
+        _store.apply_changes(changes)
+    _store.change_id = last_change
+    return _store
+
+
+# ----------------------------
+# 🏷️ Dimensions of a payment: (keys, label) with one integer key per payment
+# row and label turning a key into its JSON value
+# ----------------------------
+def month_label(month):
+    return f'{1970 + month // 12}-{month % 12 + 1:02d}'
+
+
+def quarter_label(quarter):
+    return f'{1970 + quarter // 4}-Q{quarter % 4 + 1}'
+
+
+def quarters(days):
+    return days.astype('datetime64[M]').astype(np.int64) // 3
+
+
+def category_dimension(table, name, positions):
+    labels = table.categories[name].labels
+    return table.data[name][positions], lambda key: labels[key]
+
+
+def client_cohorts(store):
+    # Quarter of each client's first trip
+    first_trip = np.full(len(store.clients), np.iinfo(np.int64).max)
+    live = store.trips.live
+    np.minimum.at(first_trip, store.trip_client[live], store.trips.data['start_date'][live].astype(np.int64))
+    return quarters(first_trip.astype('datetime64[D]'))
+
+
+DIMENSIONS = {
+    'year': lambda store: (
+        store.payments.data['payment_date'].astype('datetime64[Y]').astype(np.int64),
+        lambda key: str(1970 + key)
+    ),
+    'quarter': lambda store: (quarters(store.payments.data['payment_date']), quarter_label),
+    'month': lambda store: (
+        store.payments.data['payment_date'].astype('datetime64[M]').astype(np.int64),
+        month_label
+    ),
+    'payment_method': lambda store: category_dimension(store.payments, 'payment_method', slice(None)),
+    'destination': lambda store: category_dimension(store.trips, 'destination', store.payment_trip()),
+    'client_id': lambda store: (store.clients.ids[store.payment_client()], int),
+    'cohort': lambda store: (client_cohorts(store)[store.payment_client()], quarter_label),
+}
+
+
+# ----------------------------
+# 🧮 Vectorized group-by
+# ----------------------------
+def group(keys, values, agg, max_groups):
+    # keys: one integer array per dimension. The keys are packed into one
+    # int64 per row; small key spaces are grouped with bincount, larger ones
+    # by sorting (np.unique).
+    if not len(values):
+        return [np.empty(0, dtype=np.int64) for _ in keys], np.empty(0)
+
+    packed = np.zeros(len(values), dtype=np.int64)
+    bounds = []
+    for key in keys:
+        low, span = int(key.min()), int(key.max() - key.min()) + 1
+        packed = packed * span + (key - low)
+        bounds.append((low, span))
+
+    key_space = int(np.prod([span for _, span in bounds], dtype=np.float64))
+    if key_space <= max(len(values), 1 << 16):
+        present = np.bincount(packed, minlength=key_space) > 0
+        groups = np.flatnonzero(present)
+        inverse = (np.cumsum(present) - 1)[packed]
+    else:
+        groups, inverse = np.unique(packed, return_inverse=True)
+
+    if len(groups) > max_groups:
+        raise AnalyticsError(f'{len(groups)} groups exceed the limit of {max_groups}; add filters or fewer dimensions')
+
+    size = len(groups)
+    if agg == 'count':
+        result = np.bincount(inverse, minlength=size)
+    elif agg in ('sum', 'mean'):
+        result = np.bincount(inverse, weights=values, minlength=size)
+        if agg == 'mean':
+            result = result / np.bincount(inverse, minlength=size)
+    else:
+        result = np.full(size, np.inf if agg == 'min' else -np.inf)
+        (np.minimum if agg == 'min' else np.maximum).at(result, inverse, values)
+
+    group_keys = []
+    for low, span in reversed(bounds):
+        group_keys.append(groups % span + low)
+        groups = groups // span
+    return group_keys[::-1], result
+
+
+def label_sort_key(labels):
+    return tuple((label is None, label) for label in labels)
+
+
+# ----------------------------
+# 📐 Pivot over payments (revenue)
+# ----------------------------
+def parse_dimensions(value):
+    names = [name.strip() for name in value.split(',') if name.strip()] if value else []
+    unknown = [name for name in names if name not in DIMENSIONS]
+    if unknown:
+        raise AnalyticsError(f"Unknown dimension(s): {', '.join(unknown)}. Must be one of: {', '.join(DIMENSIONS)}")
+    return names
+
+
+def parse_pivot_args(args):
+    rows = parse_dimensions(args.get('rows'))
+    if not rows:
+        raise AnalyticsError('rows is required (comma-separated dimensions)')
+    columns = parse_dimensions(args.get('columns'))
+    if len(columns) > 1:
+        raise AnalyticsError('columns takes a single dimension')
+    if set(columns) & set(rows) or len(set(rows)) != len(rows):
+        raise AnalyticsError('a dimension can only be used once')
+
+    agg = args.get('agg', 'sum')
+    if agg not in AGGREGATES:
+        raise AnalyticsError(f"Invalid agg. Must be one of: {', '.join(AGGREGATES)}")
+
+    try:
+        date_range = [date.fromisoformat(args[name]) if args.get(name) else None for name in ('from', 'to')]
+    except ValueError:
+        raise AnalyticsError('from and to must be dates (YYYY-MM-DD)')
+
+    filters = {name: set(args[name].split(',')) for name in DIMENSIONS if args.get(name)}
+    return {
+        'rows': rows,
+        'column': columns[0] if columns else None,
+        'agg': agg,
+        'date_range': date_range,
+        'filters': filters,
+    }
+
+
+def pivot(rows, column=None, agg='sum', date_range=(None, None), filters=None):
+    # Payment amounts grouped by the row dimensions (and spread over one
+    # column dimension), after date-range and dimension-value filters
+    max_groups = current_app.config['PIVOT_MAX_CELLS']
+
+    with _lock:
+        store = refreshed_store()
+        payments = store.payments
+        dimensions = {name: DIMENSIONS[name](store) for name in set(rows + [column] + list(filters or {})) if name}
+
+        mask = payments.live.copy()
+        start, end = date_range
+        if start:
+            mask &= payments.data['payment_date'] >= np.datetime64(start, 'D')
+        if end:
+            mask &= payments.data['payment_date'] <= np.datetime64(end, 'D')
+        for name, allowed in (filters or {}).items():
+            keys, label = dimensions[name]
+            candidates = np.unique(keys)
+            mask &= np.isin(keys, [key for key in candidates.tolist() if str(label(key)) in allowed])
+
+        values = payments.data['amount'][mask]
+
+        def grouped(names):
+            keys, result = group([dimensions[name][0][mask] for name in names], values, agg, max_groups)
+            labels = [[dimensions[name][1](key) for key in column_keys.tolist()] for name, column_keys in zip(names, keys)]
+            result = result.tolist() if agg == 'count' else [round(value, 2) for value in result.tolist()]
+            return list(zip(*labels)) if names else [()] * len(result), result
+
+        totals_labels, totals = grouped([])
+        total = totals[0] if totals else (0 if agg in ('sum', 'count') else None)
+        row_labels, row_values = grouped(rows)
+
+        client_names = {}
+        if 'client_id' in rows:
+            client_ids = [labels[rows.index('client_id')] for labels in row_labels]
+            client_names = dict(zip(client_ids, store.clients.data['name'][store.clients.positions(client_ids)]))
+
+        def row_fields(labels):
+            fields = dict(zip(rows, labels))
+            if client_names:
+                fields['client_name'] = client_names[fields['client_id']]
+            return fields
+        order = sorted(range(len(row_labels)), key=lambda i: label_sort_key(row_labels[i]))
+
+        result = {'rows': rows, 'columns': column, 'agg': agg}
+        if column is None:
+            result['data'] = [{**row_fields(row_labels[i]), 'value': row_values[i]} for i in order]
+        else:
+            cell_labels, cell_values = grouped(rows + [column])
+            column_labels, column_values = grouped([column])
+            cells = {}
+            for labels, value in zip(cell_labels, cell_values):
+                cells.setdefault(labels[:-1], {})[labels[-1]] = value
+            column_order = sorted(range(len(column_labels)), key=lambda i: label_sort_key(column_labels[i]))
+
+            result['column_labels'] = [column_labels[i][0] for i in column_order]
+            result['data'] = [
+                {**row_fields(row_labels[i]), 'values': cells[row_labels[i]], 'total': row_values[i]}
+                for i in order
+            ]
+            result['totals'] = {column_labels[i][0]: column_values[i] for i in column_order}
+        result['total'] = total
+        return result
+
+
+# ----------------------------
+# ⏳ AR aging from the column store
+# ----------------------------
+def ar_aging(today=None):
+    # Balances are re-derived as amount - sum(payments), exactly like the
+    # stored invoice.balance_due, so payments only ever append. Returns the
+    # ids and names of the clients with a balance, their [current, 1-30,
+    # 31-60, 61-90, 90+, total] rows, and the column totals.
+    today = np.datetime64(today or date.today(), 'D')
+
+    with _lock:
+        store = refreshed_store()
+        invoices = store.invoices
+        payment_amounts = np.where(store.payments.live, store.payments.data['amount'], 0.0)
+        paid = np.bincount(store.payment_invoice, weights=payment_amounts, minlength=len(invoices))
+        balance = invoices.data['amount'] - paid
+        outstanding = (balance > PAID_TOLERANCE) & invoices.live
+
+        days_past_due = (today - invoices.data['due_date'][outstanding]).astype(np.int64)
+        bucket = np.searchsorted(np.array([0, 30, 60, 90]), days_past_due, side='left')
+        client = store.trip_client[store.invoice_trip[outstanding]].astype(np.int64)
+        sums = np.bincount(client * 5 + bucket, weights=balance[outstanding], minlength=len(store.clients) * 5)\
+            .reshape(-1, 5)
+
+        owing = np.flatnonzero(np.bincount(client, minlength=len(store.clients)))
+        amounts = np.column_stack([sums[owing], sums[owing].sum(axis=1)])
+        return (store.clients.ids[owing].tolist(), store.clients.data['name'][owing].tolist(),
+                amounts.tolist(), amounts.sum(axis=0).tolist())
@@ -0,0 +1,123 @@
+import atexit
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from queue import Empty, Queue
+from threading import Lock, Thread
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+from extensions import db
+from models.audit_event import AuditEvent
+
+# Routes call record() after their commit: it only puts a dict on an
+# in-process queue. A daemon thread drains the queue and inserts the events
+# in batches (AUDIT_BATCH_SIZE rows, or whatever arrived within
+# AUDIT_FLUSH_INTERVAL), on its own connection.
+STOP = None
+WRITE_ATTEMPTS = 3
+
+log = logging.getLogger('crm.audit')
+
+_settings = {'engine': None, 'queue_size': 0, 'batch_size': 1, 'flush_interval': 0.0}
+_writer = {'pid': None, 'queue': None, 'thread': None}
+_lock = Lock()
+
+
+def init_app(app):
+    with app.app_context():
+        _settings['engine'] = db.engine
+    _settings['queue_size'] = app.config['AUDIT_QUEUE_SIZE']
+    _settings['batch_size'] = app.config['AUDIT_BATCH_SIZE']
+    _settings['flush_interval'] = app.config['AUDIT_FLUSH_INTERVAL']
+    atexit.register(shutdown)
+
+
+# ----------------------------
+# 📝 Request path
+# ----------------------------
+def current_user_id():
+    try:
+        return get_jwt_identity()
+    except RuntimeError:  # no verified JWT on this request (e.g. /register)
+        return None
+
+
+def record(action, entity, entity_id=None, details=None, user_id=None):
+    event = {
+        'timestamp': datetime.now(timezone.utc),
+        'user_id': user_id if user_id is not None else current_user_id(),
+        'action': action,
+        'entity': entity,
+        'entity_id': entity_id,
+        'details': dict(details) if details is not None else None,
+    }
+    # A full queue blocks the request briefly instead of dropping events
+    writer_queue().put(event)
+
+
+def writer_queue():
+    # Started lazily, and again after a fork, so every worker has its own writer
+    if _writer['pid'] != os.getpid() or not _writer['thread'].is_alive():
+        with _lock:
+            if _writer['pid'] != os.getpid() or not _writer['thread'].is_alive():
+                _writer['queue'] = Queue(maxsize=_settings['queue_size'])
+                _writer['thread'] = Thread(target=run_writer, args=(_writer['queue'],),
+                                           name='audit-writer', daemon=True)
+                _writer['pid'] = os.getpid()
+                _writer['thread'].start()
+    return _writer['queue']
+
+
+# ----------------------------
+# 🧵 Background writer
+# ----------------------------
+def run_writer(queue):
+    while True:
+        batch = [queue.get()]
+        deadline = time.monotonic() + _settings['flush_interval']
+        while batch[-1] is not STOP and len(batch) < _settings['batch_size']:
+            try:
+                batch.append(queue.get(timeout=max(0.0, deadline - time.monotonic())))
+            except Empty:
+                break
+
+        events = [event for event in batch if event is not STOP]
+        if events:
+            write_batch(events)
+        for _ in batch:
+            queue.task_done()
+        if batch[-1] is STOP:
+            return
+
+
+def write_batch(events):
+    rows = [
+        {**event, 'details': json.dumps(event['details'], default=str, sort_keys=True)
+         if event['details'] is not None else None}
+        for event in events
+    ]
+    for attempt in range(1, WRITE_ATTEMPTS + 1):
+        try:
+            with _settings['engine'].begin() as connection:
+                connection.execute(insert(AuditEvent), rows)
+            return
+        except OperationalError as e:  # e.g. database is locked past busy_timeout
+            if attempt == WRITE_ATTEMPTS:
+                log.error('dropping %d audit events: %s', len(rows), e)
+                return
+            time.sleep(0.1 * attempt)
+
+
+def flush():
+    # Wait until everything queued so far is in the database
+    if _writer['pid'] == os.getpid() and _writer['thread'].is_alive():
+        _writer['queue'].join()
+
+
+def shutdown():
+    if _writer['pid'] == os.getpid() and _writer['thread'].is_alive():
+        _writer['queue'].put(STOP)
+        _writer['thread'].join(timeout=5)
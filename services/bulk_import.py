@@ -0,0 +1,88 @@
+import json
+from itertools import islice
+from flask import current_app, request
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+
+NDJSON_MIMETYPES = {'application/x-ndjson', 'application/ndjson', 'application/jsonl'}
+
+
+class BulkPayloadError(ValueError):
+    pass
+
+
+# ----------------------------
+# 📥 Request body: JSON array or NDJSON stream
+# ----------------------------
+def iter_records():
+    # Yields (index, record, parse_error); NDJSON is read line by line so the
+    # whole upload never has to sit in memory at once
+    if request.mimetype in NDJSON_MIMETYPES:
+        return iter_ndjson(request.stream)
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, list):
+        raise BulkPayloadError('Expected a JSON array or an NDJSON body')
+    return ((index, record, None) for index, record in enumerate(data))
+
+
+def iter_ndjson(stream):
+    index = 0
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield index, json.loads(line), None
+        except ValueError:
+            yield index, None, 'Invalid JSON line'
+        index += 1
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# ----------------------------
+# 📦 Chunked import driver
+# ----------------------------
+def import_records(records, validate, persist):
+    # validate(record) -> (values, error) with the single-create rules.
+    # persist([(index, values)]) -> [(index, error)] runs the set-based
+    # existence/uniqueness checks and inserts the rest with executemany;
+    # each chunk is committed as one transaction.
+    created = 0
+    errors = []
+
+    for chunk in chunked(records, current_app.config['BULK_IMPORT_CHUNK_SIZE']):
+        valid = []
+        for index, record, parse_error in chunk:
+            if parse_error:
+                errors.append({'index': index, 'error': parse_error})
+                continue
+            values, error = validate(record)
+            if error:
+                errors.append({'index': index, 'error': error})
+            else:
+                valid.append((index, values))
+
+        if not valid:
+            continue
+
+        try:
+            rejected = persist(valid)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            rejected = [(index, 'Conflicting write, batch rolled back') for index, _ in valid]
+
+        errors.extend({'index': index, 'error': error} for index, error in rejected)
+        created += len(valid) - len(rejected)
+
+    errors.sort(key=lambda e: e['index'])
+    return {'created': created, 'failed': len(errors), 'errors': errors}
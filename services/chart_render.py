@@ -0,0 +1,41 @@
+import io
+
+# Runs inside the chart process pool (services/charts.py). matplotlib is
+# imported on a pool process's first render, so neither web workers nor
+# pool start-up pay for it.
+_matplotlib = {}
+
+
+def figure_class():
+    if 'Figure' not in _matplotlib:
+        import matplotlib
+        matplotlib.use('Agg')
+        from matplotlib.figure import Figure
+        _matplotlib['Figure'] = Figure
+    return _matplotlib['Figure']
+
+
+def render(kind, title, labels, values, value_label, image_format):
+    # kind: 'bar' (labels along x) or 'barh' (labels down y, first on top)
+    figure = figure_class()(figsize=(10, max(4, 0.3 * len(labels))) if kind == 'barh' else (10, 5), dpi=100)
+    axes = figure.subplots()
+    positions = range(len(labels))
+
+    if kind == 'barh':
+        axes.barh(positions, values)
+        axes.set_yticks(positions, labels)
+        axes.invert_yaxis()
+        axes.set_xlabel(value_label)
+        axes.grid(axis='x', alpha=0.3)
+    else:
+        axes.bar(positions, values)
+        axes.set_xticks(positions, labels, rotation=45, ha='right')
+        axes.set_ylabel(value_label)
+        axes.grid(axis='y', alpha=0.3)
+
+    axes.set_title(title)
+    figure.tight_layout()
+
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format=image_format)
+    return buffer.getvalue()
@@ -0,0 +1,61 @@
+import atexit
+import os
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from threading import Lock
+from flask import current_app
+from services import chart_render
+
+# Charts are drawn in a small process pool so rendering neither holds the
+# web worker's GIL nor loads matplotlib into it. Pool processes are spawned
+# rather than forked from a threaded web worker. Image bytes are cached by
+# @cached_report like any other report response.
+FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+_pool = {'pid': None, 'executor': None}
+_lock = Lock()
+
+
+class ChartError(RuntimeError):
+    pass
+
+
+def executor():
+    # One pool per web worker process, created on the first chart request
+    if _pool['pid'] != os.getpid():
+        with _lock:
+            if _pool['pid'] != os.getpid():
+                _pool['executor'] = ProcessPoolExecutor(
+                    max_workers=current_app.config['CHART_RENDER_WORKERS'],
+                    mp_context=get_context('spawn')
+                )
+                _pool['pid'] = os.getpid()
+                atexit.register(shutdown)
+    return _pool['executor']
+
+
+def shutdown(wait=True):
+    # Also call this before a multiprocessing child exits: such children skip
+    # atexit, and would otherwise wait forever on the idle pool processes
+    with _lock:
+        if _pool['executor'] is not None and _pool['pid'] == os.getpid():
+            _pool['executor'].shutdown(wait=wait, cancel_futures=True)
+        _pool['pid'] = _pool['executor'] = None
+
+
+# ----------------------------
+# 🖼️ Rendering
+# ----------------------------
+def render(chart, image_format):
+    # chart: dict(kind, title, labels, values, value_label) of plain values
+    future = executor().submit(chart_render.render, image_format=image_format, **chart)
+    try:
+        return future.result(timeout=current_app.config['CHART_RENDER_TIMEOUT'])
+    except TimeoutError:
+        future.cancel()
+        raise ChartError('Chart rendering timed out')
+    except BrokenProcessPool:
+        # A renderer died (e.g. killed for memory): start a fresh pool next time
+        shutdown(wait=False)
+        raise ChartError('Chart renderer crashed')
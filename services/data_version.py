@@ -0,0 +1,19 @@
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from extensions import db
+from models.data_version import DataVersion
+
+
+def get(name):
+    version = db.session.query(DataVersion.version).filter(DataVersion.name == name).scalar()
+    return version or 0
+
+
+def bump(name):
+    # Runs in the caller's transaction: the new version becomes visible to
+    # other workers exactly when the write that caused it commits
+    stmt = sqlite_insert(DataVersion).values(name=name, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['name'],
+        set_={'version': DataVersion.version + 1}
+    )
+    db.session.execute(stmt)
@@ -0,0 +1,298 @@
+import json
+import logging
+import os
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+from flask import current_app
+from sqlalchemy import update
+from werkzeug.datastructures import MultiDict
+from extensions import db
+from models.client import Client
+from models.export_job import ExportJob
+from services.streaming import csv_chunks, gzip_stream
+
+# POST /exports stores a queued ExportJob and hands its id to this worker's
+# bounded thread pool (EXPORT_WORKERS). The job writes its CSV to
+# EXPORT_DIR under a .part name and renames it when complete, so a download
+# never sees a half-written file. purge() applies the retention policy.
+# Jobs record the worker process that runs them: once that process is gone
+# (a restart or crash on this host) its queued/running jobs are failed, so
+# they stop counting toward EXPORT_MAX_PENDING.
+FORMATS = {'csv': ('.csv', 'text/csv'), 'gzip': ('.csv.gz', 'application/gzip')}
+PENDING_STATUSES = ('queued', 'running')
+
+log = logging.getLogger('crm.exports')
+
+_pool = {'pid': None, 'executor': None}
+_lock = Lock()
+
+
+class ExportError(ValueError):
+    pass
+
+
+class ExportBusy(RuntimeError):
+    pass
+
+
+def export_types():
+    from routes.reports import CSV_TABLES
+    return ['clients'] + list(CSV_TABLES)
+
+
+def now():
+    return datetime.now(timezone.utc)
+
+
+def artifact_path(file_name):
+    return os.path.join(current_app.config['EXPORT_DIR'], file_name)
+
+
+# ----------------------------
+# 📥 Enqueue
+# ----------------------------
+def validate(export_type, filters, export_format):
+    if export_type not in export_types():
+        raise ExportError(f"Invalid type. Must be one of: {', '.join(export_types())}")
+    if export_format not in FORMATS:
+        raise ExportError(f"Invalid format. Must be one of: {', '.join(FORMATS)}")
+    if not isinstance(filters, dict) or not all(isinstance(v, (str, int, float, bool)) for v in filters.values()):
+        raise ExportError('filters must be an object of query-string values')
+    if export_type == 'pivot':
+        from services.analytics import AnalyticsError, parse_pivot_args
+        try:
+            parse_pivot_args(filter_args(filters))
+        except AnalyticsError as e:
+            raise ExportError(str(e))
+
+
+def filter_args(filters):
+    return MultiDict({name: str(value).lower() if isinstance(value, bool) else str(value)
+                      for name, value in filters.items()})
+
+
+def enqueue(export_type, filters, export_format, user_id):
+    validate(export_type, filters, export_format)
+    config = current_app.config
+
+    fail_orphaned()
+    pending = ExportJob.query.filter(ExportJob.status.in_(PENDING_STATUSES))
+    if pending.count() >= config['EXPORT_MAX_PENDING']:
+        raise ExportBusy('Too many exports in progress, try again later')
+    if pending.filter(ExportJob.user_id == str(user_id)).count() >= config['EXPORT_MAX_PENDING_PER_USER']:
+        raise ExportBusy(f"You already have {config['EXPORT_MAX_PENDING_PER_USER']} exports in progress, "
+                         'try again when one finishes')
+
+    job = ExportJob(
+        user_id=str(user_id),
+        export_type=export_type,
+        filters=json.dumps(filters, sort_keys=True),
+        format=export_format,
+        status='queued',
+        created_at=now(),
+        worker_host=socket.gethostname(),
+        worker_pid=os.getpid()
+    )
+    db.session.add(job)
+    db.session.commit()
+    executor().submit(run_job, current_app._get_current_object(), job.id)
+    return job
+
+
+def executor():
+    # One bounded pool per worker process, created on the first export
+    if _pool['pid'] != os.getpid():
+        with _lock:
+            if _pool['pid'] != os.getpid():
+                _pool['executor'] = ThreadPoolExecutor(
+                    max_workers=current_app.config['EXPORT_WORKERS'],
+                    thread_name_prefix='export'
+                )
+                _pool['pid'] = os.getpid()
+    return _pool['executor']
+
+
+# ----------------------------
+# 🧵 Background job
+# ----------------------------
+def run_job(app, job_id):
+    with app.app_context():
+        try:
+            execute(job_id)
+        except Exception:
+            log.exception('export job %s failed', job_id)
+            db.session.rollback()
+            finish(job_id, status='failed', error='Export failed; see the server log')
+        finally:
+            db.session.remove()
+
+        try:
+            purge()
+        except Exception:
+            log.exception('export purge failed')
+        finally:
+            db.session.remove()
+
+
+def execute(job_id):
+    job = db.session.get(ExportJob, job_id)
+    job.status = 'running'
+    job.started_at = now()
+    db.session.commit()
+
+    extension, _ = FORMATS[job.format]
+    file_name = f'export_{job.id}{extension}'
+    progress = Progress(job.id, current_app.config['EXPORT_PROGRESS_INTERVAL'])
+
+    if job.export_type == 'clients':
+        download_name = 'all_clients_export.csv'
+        chunks = client_chunks(progress)
+    else:
+        download_name, chunks = report_chunks(job, progress)
+
+    if job.format == 'gzip':
+        data = gzip_stream(chunks)
+        download_name += '.gz'
+    else:
+        data = (chunk.encode('utf-8') for chunk in chunks)
+
+    os.makedirs(current_app.config['EXPORT_DIR'], exist_ok=True)
+    path = artifact_path(file_name)
+    try:
+        with open(path + '.part', 'wb') as output:
+            for block in data:
+                output.write(block)
+        os.replace(path + '.part', path)
+    finally:
+        if os.path.exists(path + '.part'):
+            os.remove(path + '.part')
+
+    progress.flush()
+    finish(job_id, status='done', file_name=file_name, download_name=download_name,
+           size_bytes=os.path.getsize(path))
+
+
+def finish(job_id, **values):
+    db.session.execute(
+        update(ExportJob).where(ExportJob.id == job_id).values(finished_at=now(), **values)
+    )
+    db.session.commit()
+
+
+class Progress:
+    # Row counters written to the job at most every `interval` seconds
+    def __init__(self, job_id, interval):
+        self.job_id = job_id
+        self.interval = interval
+        self.rows_done = 0
+        self.written_at = time.monotonic()
+
+    def total(self, rows_total):
+        self.write(rows_total=rows_total)
+
+    def advance(self, rows):
+        self.rows_done += rows
+        if time.monotonic() - self.written_at >= self.interval:
+            self.flush()
+
+    def flush(self):
+        self.write(rows_done=self.rows_done)
+
+    def write(self, **values):
+        db.session.execute(update(ExportJob).where(ExportJob.id == self.job_id).values(**values))
+        db.session.commit()
+        self.written_at = time.monotonic()
+
+
+def client_chunks(progress):
+    from routes.clients import generate_clients_csv
+
+    progress.total(db.session.query(Client.id).count())
+    return generate_clients_csv(current_app.config['EXPORT_BATCH_SIZE'], progress=progress.advance)
+
+
+def report_chunks(job, progress):
+    from routes.reports import CSV_TABLES
+
+    filename, header, rows = CSV_TABLES[job.export_type](filter_args(json.loads(job.filters)))
+    progress.total(len(rows))
+    return filename, csv_chunks(header, rows, current_app.config['STREAM_BATCH_SIZE'], progress=progress.advance)
+
+
+# ----------------------------
+# 🪦 Jobs of stopped workers
+# ----------------------------
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:  # exists, owned by another user
+        return True
+    return True
+
+
+def fail_orphaned():
+    # Queued/running jobs owned by a process on this host that no longer
+    # exists (jobs from other hosts are left to purge()'s retention cutoff).
+    # Returns the number of jobs failed.
+    orphaned = [
+        job for job in ExportJob.query.filter(
+            ExportJob.status.in_(PENDING_STATUSES), ExportJob.worker_host == socket.gethostname(),
+            ExportJob.worker_pid != os.getpid()
+        ) if not process_alive(job.worker_pid)
+    ]
+    for job in orphaned:
+        job.status = 'failed'
+        job.error = 'Abandoned: the worker running this export stopped'
+        job.finished_at = now()
+    if orphaned:
+        db.session.commit()
+    return len(orphaned)
+
+
+# ----------------------------
+# 🧹 Retention
+# ----------------------------
+def purge(at=None):
+    # Expire finished artifacts older than EXPORT_RETENTION_SECONDS, then the
+    # oldest ones until the rest fit in EXPORT_MAX_TOTAL_BYTES; fail jobs
+    # whose worker process is gone, and any other left queued/running that
+    # long, and drop stray .part files. Returns the number of jobs expired or failed.
+    config = current_app.config
+    cutoff = (at or now()) - timedelta(seconds=config['EXPORT_RETENTION_SECONDS'])
+    changed = fail_orphaned()
+
+    finished = ExportJob.query.filter(ExportJob.status == 'done')\
+        .order_by(ExportJob.finished_at.desc(), ExportJob.id.desc()).all()
+    kept_bytes = 0
+    for job in finished:
+        kept_bytes += job.size_bytes or 0
+        if job.finished_at.replace(tzinfo=timezone.utc) < cutoff or kept_bytes > config['EXPORT_MAX_TOTAL_BYTES']:
+            remove_artifact(job.file_name)
+            job.status = 'expired'
+            changed += 1
+
+    stale = ExportJob.query.filter(ExportJob.status.in_(PENDING_STATUSES), ExportJob.created_at < cutoff).all()
+    for job in stale:
+        job.status = 'failed'
+        job.error = 'Abandoned: the worker running this export stopped'
+        job.finished_at = now()
+        changed += 1
+    db.session.commit()
+
+    export_dir = config['EXPORT_DIR']
+    if os.path.isdir(export_dir):
+        for name in os.listdir(export_dir):
+            path = os.path.join(export_dir, name)
+            if name.endswith('.part') and os.path.getmtime(path) < cutoff.timestamp():
+                os.remove(path)
+    return changed
+
+
+def remove_artifact(file_name):
+    if file_name and os.path.exists(artifact_path(file_name)):
+        os.remove(artifact_path(file_name))
@@ -0,0 +1,49 @@
+from datetime import date
+from sqlalchemy import and_, case, func, select, true, update
+from extensions import db
+from models.invoice import Invoice
+from models.payment import Payment
+
+# Amounts are floats in currency units: anything under half a cent is settled
+PAID_TOLERANCE = 0.005
+
+
+def status_after(balance):
+    # Paid once nothing is owed; a Paid invoice that owes money again goes
+    # back to Overdue/Pending by its due date; other statuses are kept.
+    return case(
+        (balance <= PAID_TOLERANCE, 'Paid'),
+        (Invoice.status == 'Paid', case((Invoice.due_date < date.today(), 'Overdue'), else_='Pending')),
+        else_=Invoice.status
+    )
+
+
+def apply(criterion, paid, update_status):
+    # One UPDATE per call: SQLite evaluates every SET expression against the
+    # old row, so paid_amount, balance_due and status change together
+    balance = Invoice.amount - paid
+    values = {'paid_amount': paid, 'balance_due': balance}
+    if update_status:
+        values['status'] = status_after(balance)
+
+    db.session.flush()
+    db.session.execute(
+        update(Invoice).where(criterion).values(**values),
+        execution_options={'synchronize_session': False}
+    )
+
+
+# ----------------------------
+# 💳 Payment writes (same transaction as the write)
+# ----------------------------
+def adjust(invoice_id, paid_delta, update_status=True):
+    # +amount on create, -amount on delete, new - old on update; 0 after an
+    # invoice amount change just recomputes the balance
+    apply(Invoice.id == invoice_id, Invoice.paid_amount + paid_delta, update_status)
+
+
+def recompute(*criteria, update_status=True):
+    # Set-based: re-sum the payments of every matching invoice (bulk imports, backfill)
+    paid = select(func.coalesce(func.sum(Payment.amount), 0.0))\
+        .where(Payment.invoice_id == Invoice.id).scalar_subquery()
+    apply(and_(*criteria) if criteria else true(), paid, update_status)
@@ -0,0 +1,47 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional: JSON_PROVIDER = 'orjson' falls back to Flask's provider
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    # Flask's provider with the encoding done by orjson. Values orjson would
+    # format differently (dates, Decimal) still go through Flask's default(),
+    # so responses keep their shape; keys stay sorted.
+    def option(self):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)  # json.dumps-only options (indent, cls, ...)
+        return orjson.dumps(obj, default=self.default, option=self.option()).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        option = self.option()
+        if self.compact is False or (self.compact is None and self._app.debug):
+            option |= orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE
+        return self._app.response_class(orjson.dumps(obj, default=self.default, option=option),
+                                        mimetype=self.mimetype)
+
+
+PROVIDERS = {'default': DefaultJSONProvider, 'orjson': OrjsonProvider}
+
+
+def create(app):
+    name = app.config['JSON_PROVIDER']
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown JSON_PROVIDER '{name}', expected one of {sorted(PROVIDERS)}")
+    if name == 'orjson' and orjson is None:
+        name = 'default'
+    return PROVIDERS[name](app)
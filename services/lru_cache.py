@@ -0,0 +1,49 @@
+from collections import OrderedDict
+from threading import Lock
+
+
+class LRUCache:
+    # Thread-safe LRU bounded by entry count and by total size in bytes
+    def __init__(self, max_entries, max_bytes=None, sizeof=len):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.entries = OrderedDict()
+        self.sizes = {}
+        self.total_bytes = 0
+        self.lock = Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.discard(key)
+            self.entries[key] = value
+            self.sizes[key] = size
+            self.total_bytes += size
+            while len(self.entries) > self.max_entries or (
+                    self.max_bytes is not None and self.total_bytes > self.max_bytes):
+                self.discard(next(iter(self.entries)))
+
+    def discard(self, key):
+        # Caller holds the lock
+        del self.entries[key]
+        self.total_bytes -= self.sizes.pop(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.sizes.clear()
+            self.total_bytes = 0
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,255 @@
+import atexit
+import json
+import logging
+import os
+import time
+from threading import Lock
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from extensions import db
+
+# Upper bounds of the histogram buckets (+Inf is implicit)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 500)
+BACKGROUND = '(background)'  # SQL issued outside a request: CLI commands, startup
+
+slow_query_log = logging.getLogger('crm.slow_sql')
+
+
+class Histogram:
+    def __init__(self, bounds, counts=None, total=0.0, count=0):
+        self.bounds = bounds
+        self.counts = counts or [0] * (len(bounds) + 1)
+        self.total = total
+        self.count = count
+
+    def observe(self, value):
+        index = next((i for i, bound in enumerate(self.bounds) if value <= bound), len(self.bounds))
+        self.counts[index] += 1
+        self.total += value
+        self.count += 1
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other['counts'])]
+        self.total += other['total']
+        self.count += other['count']
+
+    def to_dict(self):
+        return {'counts': self.counts, 'total': self.total, 'count': self.count}
+
+
+class Registry:
+    # Counters and histograms keyed by label tuples, for one process (or a merge of several)
+    def __init__(self):
+        self.requests = {}          # (endpoint, method, status) -> count
+        self.latency = {}           # (endpoint, method) -> Histogram of seconds
+        self.statements = {}        # (endpoint,) -> Histogram of SQL statements per request
+        self.sql_seconds = {}       # (endpoint,) -> cumulative SQL time
+        self.sql_total = {}         # (endpoint,) -> cumulative SQL statements
+        self.slow_queries = {}      # (endpoint,) -> statements over SLOW_QUERY_MS
+        self.lock = Lock()
+
+    def record_request(self, endpoint, method, status, seconds, statements, sql_seconds):
+        with self.lock:
+            key = (endpoint, method, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.latency.setdefault((endpoint, method), Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self.statements.setdefault((endpoint,), Histogram(STATEMENT_BUCKETS)).observe(statements)
+            self.add_sql(endpoint, statements, sql_seconds)
+
+    def add_sql(self, endpoint, statements, seconds):
+        # Caller holds the lock
+        self.sql_total[(endpoint,)] = self.sql_total.get((endpoint,), 0) + statements
+        self.sql_seconds[(endpoint,)] = self.sql_seconds.get((endpoint,), 0.0) + seconds
+
+    def record_background_sql(self, seconds):
+        with self.lock:
+            self.add_sql(BACKGROUND, 1, seconds)
+
+    def record_slow_query(self, endpoint):
+        with self.lock:
+            self.slow_queries[(endpoint,)] = self.slow_queries.get((endpoint,), 0) + 1
+
+    # Snapshots are plain JSON: [[labels...], value] pairs
+    def snapshot(self):
+        with self.lock:
+            return {
+                'requests': [[list(k), v] for k, v in self.requests.items()],
+                'latency': [[list(k), h.to_dict()] for k, h in self.latency.items()],
+                'statements': [[list(k), h.to_dict()] for k, h in self.statements.items()],
+                'sql_seconds': [[list(k), v] for k, v in self.sql_seconds.items()],
+                'sql_total': [[list(k), v] for k, v in self.sql_total.items()],
+                'slow_queries': [[list(k), v] for k, v in self.slow_queries.items()],
+            }
+
+    def merge(self, snapshot):
+        for name in ('requests', 'sql_seconds', 'sql_total', 'slow_queries'):
+            counters = getattr(self, name)
+            for labels, value in snapshot.get(name, []):
+                counters[tuple(labels)] = counters.get(tuple(labels), 0) + value
+        for name, bounds in (('latency', LATENCY_BUCKETS), ('statements', STATEMENT_BUCKETS)):
+            histograms = getattr(self, name)
+            for labels, data in snapshot.get(name, []):
+                histograms.setdefault(tuple(labels), Histogram(bounds)).merge(data)
+
+
+registry = Registry()
+_settings = {'slow_query_seconds': None, 'directory': None, 'flush_interval': 0.0}
+_last_flush = [0.0]
+_snapshot = {'pid': None, 'name': None}
+
+
+# ----------------------------
+# 🔌 SQLAlchemy engine events (attached to the app's engine in init_app)
+# ----------------------------
+def start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_started', []).append(time.perf_counter())
+
+
+def stop_statement_timer(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('metrics_started')
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+
+    if has_request_context() and 'metrics_started' in g:
+        g.metrics_statements += 1
+        g.metrics_sql_seconds += elapsed
+        endpoint = request.endpoint or 'unmatched'
+    else:
+        registry.record_background_sql(elapsed)
+        endpoint = BACKGROUND
+
+    threshold = _settings['slow_query_seconds']
+    if threshold is not None and elapsed >= threshold:
+        registry.record_slow_query(endpoint)
+        # Statement text only: bound parameters can carry client data
+        slow_query_log.warning('slow query %.1f ms [%s]: %s', elapsed * 1000, endpoint, ' '.join(statement.split()))
+
+
+# ----------------------------
+# 🌐 Flask request hooks
+# ----------------------------
+def start_request():
+    g.metrics_started = time.perf_counter()
+    g.metrics_statements = 0
+    g.metrics_sql_seconds = 0.0
+
+
+def capture_status(response):
+    g.metrics_status = response.status_code
+    return response
+
+
+def finish_request(error=None):
+    # teardown_request: for stream_with_context responses this runs after the
+    # last chunk, so streamed exports are timed in full
+    if 'metrics_started' not in g:
+        return
+    status = g.get('metrics_status', 500)
+    registry.record_request(
+        request.endpoint or 'unmatched', request.method, status,
+        time.perf_counter() - g.metrics_started, g.metrics_statements, g.metrics_sql_seconds
+    )
+    if time.monotonic() - _last_flush[0] >= _settings['flush_interval']:
+        flush()
+
+
+def init_app(app):
+    _settings['slow_query_seconds'] = app.config['SLOW_QUERY_MS'] / 1000
+    _settings['directory'] = app.config['METRICS_DIR']
+    _settings['flush_interval'] = app.config['METRICS_FLUSH_INTERVAL']
+    os.makedirs(_settings['directory'], exist_ok=True)
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', start_statement_timer)
+            event.listen(engine, 'after_cursor_execute', stop_statement_timer)
+    app.before_request(start_request)
+    app.after_request(capture_status)
+    app.teardown_request(finish_request)
+    atexit.register(flush)
+
+
+# ----------------------------
+# 🗂️ Cross-process aggregation
+# ----------------------------
+# Every worker process writes its cumulative snapshot to METRICS_DIR (at most
+# every METRICS_FLUSH_INTERVAL seconds and at exit); /metrics sums all files.
+def flush():
+    directory = _settings['directory']
+    if directory is None:
+        return
+    _last_flush[0] = time.monotonic()
+    path = os.path.join(directory, snapshot_name())
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w') as f:
+        json.dump(registry.snapshot(), f)
+    os.replace(temporary, path)
+
+
+def snapshot_name():
+    # Derived again after a fork: workers of a preloaded app (gunicorn
+    # --preload) must not share the file of the process they were forked from
+    if _snapshot['pid'] != os.getpid():
+        _snapshot['name'] = f'{os.getpid()}-{int(time.time() * 1000)}.json'
+        _snapshot['pid'] = os.getpid()
+    return _snapshot['name']
+
+
+def collect():
+    flush()
+    merged = Registry()
+    directory = _settings['directory']
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                merged.merge(json.load(f))
+        except (OSError, ValueError):
+            continue  # a worker is replacing its file right now
+    return merged
+
+
+# ----------------------------
+# 📝 Prometheus text exposition format
+# ----------------------------
+def label_text(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def render_counter(lines, name, help_text, names, values):
+    lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+    for labels, value in sorted(values.items()):
+        lines.append(f'{name}{label_text(names, labels)} {value}')
+
+
+def render_histogram(lines, name, help_text, names, histograms):
+    lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+    for labels, histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(list(histogram.bounds) + ['+Inf'], histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{label_text(names, labels, [("le", bound)])} {cumulative}')
+        lines.append(f'{name}_sum{label_text(names, labels)} {histogram.total}')
+        lines.append(f'{name}_count{label_text(names, labels)} {histogram.count}')
+
+
+def render(merged):
+    lines = []
+    render_counter(lines, 'crm_http_requests_total', 'Requests handled, by endpoint, method and status.',
+                   ('endpoint', 'method', 'status'), merged.requests)
+    render_histogram(lines, 'crm_http_request_duration_seconds', 'Request latency in seconds.',
+                     ('endpoint', 'method'), merged.latency)
+    render_histogram(lines, 'crm_sql_statements_per_request', 'SQL statements issued per request.',
+                     ('endpoint',), merged.statements)
+    render_counter(lines, 'crm_sql_statements_total', 'SQL statements executed.',
+                   ('endpoint',), merged.sql_total)
+    render_counter(lines, 'crm_sql_duration_seconds_total', 'Cumulative time spent in SQL statements.',
+                   ('endpoint',), merged.sql_seconds)
+    render_counter(lines, 'crm_sql_slow_queries_total', 'SQL statements slower than SLOW_QUERY_MS.',
+                   ('endpoint',), merged.slow_queries)
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,123 @@
+import atexit
+import logging
+import os
+import time
+from datetime import date
+from threading import Event, Lock, Thread
+from sqlalchemy import select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import OperationalError
+from extensions import db
+from models.invoice import Invoice
+from models.scheduled_run import ScheduledRun
+from services import audit, report_cache, versioning
+
+# Invoices are moved from Pending to Overdue by a sweep: one UPDATE over the
+# (status, due_date) index per run, so the stored status of an invoice says
+# Overdue too (the invoice summary counts past-due invoices as overdue either
+# way). Run it with `flask sweep-overdue` from cron. Alternatively set
+# OVERDUE_SWEEP_INTERVAL: every worker process then wakes up on that
+# interval, but only the one that claims the run (a conditional upsert on
+# the 'overdue-sweep' scheduled_run row) sweeps.
+CLAIM_NAME = 'overdue-sweep'
+
+log = logging.getLogger('crm.overdue')
+
+_settings = {'app': None, 'interval': 0}
+_scheduler = {'pid': None, 'thread': None, 'stop': None}
+_lock = Lock()
+
+
+def init_app(app):
+    _settings['app'] = app
+    _settings['interval'] = app.config['OVERDUE_SWEEP_INTERVAL']
+    if _settings['interval'] > 0:
+        app.before_request(ensure_scheduler)
+        atexit.register(shutdown)
+
+
+def due_criterion(today=None):
+    return (Invoice.status == 'Pending') & (Invoice.due_date < (today or date.today()))
+
+
+def due_invoices_query(today=None):
+    return select(Invoice.id).where(due_criterion(today))
+
+
+# ----------------------------
+# ⏰ Sweep (caller commits)
+# ----------------------------
+def sweep(today=None):
+    # Ancestors' ETags first (the subquery still sees the Pending rows), then
+    # the status change itself, which also bumps the invoices' own version
+    criterion = due_criterion(today)
+    versioning.touch_trips(select(Invoice.trip_id).where(criterion))
+    result = db.session.execute(
+        update(Invoice).where(criterion).values(status='Overdue', version=Invoice.version + 1),
+        execution_options={'synchronize_session': False}
+    )
+    if result.rowcount:
+        report_cache.invalidate()
+    return result.rowcount
+
+
+def claim_run(interval, at=None):
+    # True for exactly one caller per interval: the upsert only writes when
+    # the last claimed run is at least `interval` seconds old
+    at = int(at or time.time())
+    stmt = sqlite_insert(ScheduledRun).values(name=CLAIM_NAME, claimed_at=at)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['name'],
+        set_={'claimed_at': at},
+        where=ScheduledRun.claimed_at <= at - interval
+    )
+    return db.session.execute(stmt).rowcount == 1
+
+
+def run_sweep(today=None):
+    started = time.perf_counter()
+    changed = sweep(today)
+    db.session.commit()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if changed:
+        audit.record('sweep', 'invoice', details={'overdue': changed, 'elapsed_ms': round(elapsed_ms, 1)})
+    log.info('overdue sweep: %d invoice(s) marked Overdue in %.1f ms', changed, elapsed_ms)
+    return changed
+
+
+# ----------------------------
+# 🧵 In-process scheduler
+# ----------------------------
+def ensure_scheduler():
+    # Started on the first request, and again after a fork, so every worker has its own
+    if _scheduler['pid'] != os.getpid() or not _scheduler['thread'].is_alive():
+        with _lock:
+            if _scheduler['pid'] != os.getpid() or not _scheduler['thread'].is_alive():
+                _scheduler['stop'] = Event()
+                _scheduler['thread'] = Thread(target=run_scheduler, args=(_scheduler['stop'],),
+                                              name='overdue-sweeper', daemon=True)
+                _scheduler['pid'] = os.getpid()
+                _scheduler['thread'].start()
+
+
+def run_scheduler(stop):
+    while True:
+        with _settings['app'].app_context():
+            try:
+                if claim_run(_settings['interval']):
+                    run_sweep()  # commits the claim with the sweep
+                else:
+                    db.session.rollback()
+            except OperationalError as e:  # e.g. database is locked past busy_timeout
+                db.session.rollback()
+                log.error('overdue sweep failed: %s', e)
+            finally:
+                db.session.remove()
+        if stop.wait(_settings['interval']):
+            return
+
+
+def shutdown():
+    if _scheduler['pid'] == os.getpid() and _scheduler['thread'].is_alive():
+        _scheduler['stop'].set()
+        _scheduler['thread'].join(timeout=5)
@@ -0,0 +1,60 @@
+from flask import current_app
+from extensions import db
+
+TRUTHY_VALUES = {'1', 'true', 'yes', 'on'}
+
+
+class PaginationError(ValueError):
+    pass
+
+
+# ----------------------------
+# 🔧 Query-string helpers
+# ----------------------------
+def flag_arg(args, name, default=False):
+    value = args.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in TRUTHY_VALUES
+
+
+def parse_page_args(args):
+    config = current_app.config
+    try:
+        limit = int(args.get('limit', config['DEFAULT_PAGE_SIZE']))
+        after_id = int(args.get('after_id', 0))
+    except (TypeError, ValueError):
+        raise PaginationError('limit and after_id must be integers')
+
+    if limit < 1 or after_id < 0:
+        raise PaginationError('limit must be positive and after_id cannot be negative')
+
+    return min(limit, config['MAX_PAGE_SIZE']), after_id
+
+
+# ----------------------------
+# 📄 Keyset (cursor) pagination
+# ----------------------------
+def keyset_page(query, id_column, limit, after_id):
+    # One extra row tells us whether another page exists, without a COUNT(*)
+    rows = query.filter(id_column > after_id).order_by(id_column).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = getattr(rows[-1], id_column.key)
+
+    return rows, next_cursor
+
+
+def keyset_rows(statement, id_column, limit, after_id):
+    # keyset_page for a Core select: returns Row tuples, cursor from the 'id' label
+    statement = statement.filter(id_column > after_id).order_by(id_column).limit(limit + 1)
+    rows = db.session.execute(statement).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1].id
+
+    return rows, next_cursor
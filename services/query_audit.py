@@ -0,0 +1,98 @@
+from datetime import date
+from extensions import db
+from models.client import Client
+from models.client_note import ClientNote
+from models.trip import Trip
+from models.invoice import Invoice
+from models.payment import Payment
+from models.audit_event import AuditEvent
+
+# Index-backed plan steps read "SEARCH t USING INDEX ..." or
+# "SCAN t USING [COVERING] INDEX ..." (FTS5: "SCAN t VIRTUAL TABLE INDEX ...");
+# a bare "SCAN t" walks the whole table.
+INDEX_MARKERS = (
+    'USING INDEX', 'USING COVERING INDEX', 'USING INTEGER PRIMARY KEY', 'USING PRIMARY KEY',
+    'VIRTUAL TABLE INDEX'
+)
+
+
+# ----------------------------
+# 📋 Queries issued by list and report endpoints
+# ----------------------------
+def page(query, id_column):
+    return query.filter(id_column > 0).order_by(id_column).limit(100)
+
+
+def audited_queries():
+    from routes import reports
+    from services import overdue, search_index
+
+    sample_ids = [1, 2, 3]
+
+    # (name, query, full_scan_expected) - aggregates over the whole history
+    # have to read every row once; everything else should be index driven.
+    queries = [
+        ('GET /clients', page(Client.query, Client.id), False),
+        ('GET /trips', page(Trip.query, Trip.id), False),
+        ('GET /trips?client_id', page(Trip.query.filter(Trip.client_id == 1), Trip.id), False),
+        ('GET /trips?start_date', page(Trip.query.filter(Trip.start_date >= date.today()), Trip.id), False),
+        ('GET /clients/<id>/notes', ClientNote.query.filter_by(client_id=1), False),
+        ('GET /invoices/<trip_id>', Invoice.query.filter_by(trip_id=1), False),
+        ('GET /payments/<invoice_id>', Payment.query.filter_by(invoice_id=1), False),
+        ('details: trips of clients', Trip.query.filter(Trip.client_id.in_(sample_ids)), False),
+        ('details: invoices of trips', Invoice.query.filter(Invoice.trip_id.in_(sample_ids)), False),
+        ('details: payments of invoices', Payment.query.filter(Payment.invoice_id.in_(sample_ids)), False),
+        ('details: notes of clients', ClientNote.query.filter(ClientNote.client_id.in_(sample_ids)), False),
+        ('GET /audit', page(AuditEvent.query, AuditEvent.id), False),
+        ('GET /audit?entity&entity_id', page(AuditEvent.query.filter(
+            AuditEvent.entity == 'client', AuditEvent.entity_id == 1), AuditEvent.id), False),
+        ('report: unpaid-invoices', reports.unpaid_invoices_query(), False),
+        ('report: monthly-revenue', reports.monthly_revenue_query(), False),
+        ('report: monthly-revenue?year', reports.monthly_revenue_query(year=date.today().year), False),
+        ('report: revenue-by-client', reports.revenue_by_client_query(), True),
+        ('report: invoice-summary', reports.invoice_summary_query(), False),
+        ('sweep: overdue invoices', overdue.due_invoices_query(), False),
+    ]
+
+    if search_index.is_available():
+        queries += [
+            ('GET /clients?name', page(Client.query.filter(
+                Client.id.in_(search_index.matching_ids('client', {'name': 'smith'}))), Client.id), False),
+            ('GET /trips?destination', page(Trip.query.filter(
+                Trip.id.in_(search_index.matching_ids('trip', {'destination': 'paris'}))), Trip.id), False),
+        ]
+
+    return queries
+
+
+# ----------------------------
+# 🔍 EXPLAIN QUERY PLAN
+# ----------------------------
+def explain(query):
+    statement = getattr(query, 'statement', query)
+    compiled = statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+    rows = db.session.connection().exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}').fetchall()
+    return [row[3] for row in rows]
+
+
+def is_table_scan(detail):
+    if not detail.startswith('SCAN '):
+        return False
+    # "SCAN (subquery-1)" / co-routines are not base tables
+    if detail.startswith('SCAN (') or 'CO-ROUTINE' in detail:
+        return False
+    return not any(marker in detail for marker in INDEX_MARKERS)
+
+
+def audit_query_plans():
+    results = []
+    for name, query, full_scan_expected in audited_queries():
+        plan = explain(query)
+        scans = [step for step in plan if is_table_scan(step)]
+        results.append({
+            'name': name,
+            'plan': plan,
+            'scans': scans,
+            'full_scan_expected': full_scan_expected
+        })
+    return results
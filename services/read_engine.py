@@ -0,0 +1,41 @@
+from fnmatch import fnmatchcase
+from flask import g, has_app_context, request
+from flask_sqlalchemy.session import Session
+
+# GET requests to an endpoint matching READ_ENDPOINTS run every statement on
+# a second engine over the same database: its own pool (READ_POOL_SIZE) and
+# PRAGMA query_only, so long report scans and exports neither take
+# connections from the write routes nor can write by accident. Everything
+# else, including background threads, keeps the default engine.
+READ_BIND = 'read'
+READ_METHODS = ('GET', 'HEAD')
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context() and g.get('read_engine'):
+            return self._db.engines[READ_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def configure(config):
+    # Call before db.init_app: adds the read engine to SQLALCHEMY_BINDS
+    config['SQLALCHEMY_BINDS'] = {
+        **(config.get('SQLALCHEMY_BINDS') or {}),
+        READ_BIND: {
+            'url': config['SQLALCHEMY_DATABASE_URI'],
+            'pool_size': config['READ_POOL_SIZE'],
+            'max_overflow': config['READ_POOL_MAX_OVERFLOW'],
+        },
+    }
+
+
+def init_app(app):
+    # Call after the blueprints are registered: patterns are matched once here
+    patterns = app.config['READ_ENDPOINTS']
+    routed = {rule.endpoint for rule in app.url_map.iter_rules()
+              if any(fnmatchcase(rule.endpoint, pattern) for pattern in patterns)}
+
+    @app.before_request
+    def route_request():
+        g.read_engine = request.method in READ_METHODS and request.endpoint in routed
@@ -0,0 +1,67 @@
+import hashlib
+from collections import namedtuple
+from datetime import date
+from functools import wraps
+from flask import Response, current_app, make_response, request
+from services import data_version
+from services.lru_cache import LRUCache
+
+REPORTS_VERSION = 'reports'
+
+CachedReport = namedtuple('CachedReport', 'version body mimetype headers')
+
+_cache = None
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        config = current_app.config
+        _cache = LRUCache(
+            config['REPORT_CACHE_MAX_ENTRIES'],
+            config['REPORT_CACHE_MAX_BYTES'],
+            sizeof=lambda entry: len(entry.body)
+        )
+    return _cache
+
+
+# ----------------------------
+# 🧹 Invalidation (call before commit in client/trip/invoice/payment writes)
+# ----------------------------
+def invalidate():
+    data_version.bump(REPORTS_VERSION)
+
+
+# ----------------------------
+# 🗃️ Cached report views
+# ----------------------------
+def cached_report(view):
+    # Keyed by endpoint + URL and query args. The shared 'reports' version (and the
+    # date, since overdue and AR aging buckets roll over at midnight) make up the ETag, so
+    # a matching If-None-Match is answered with 304 before any report query.
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = (request.endpoint, tuple(sorted((request.view_args or {}).items())),
+               tuple(sorted(request.args.items(multi=True))))
+        version = (data_version.get(REPORTS_VERSION), date.today().isoformat())
+        etag = hashlib.sha1(repr((key, version)).encode()).hexdigest()
+
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            cache = get_cache()
+            entry = cache.get(key)
+            if entry is not None and entry.version == version:
+                response = Response(entry.body, mimetype=entry.mimetype, headers=entry.headers)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                body = response.get_data()
+                headers = [(k, v) for k, v in response.headers if k == 'Content-Disposition']
+                cache.put(key, CachedReport(version, body, response.mimetype, headers))
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return wrapper
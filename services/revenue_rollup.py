@@ -0,0 +1,86 @@
+from sqlalchemy import Integer, cast, func, insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from extensions import db
+from models.revenue_rollup import RevenueRollup
+from models.payment import Payment
+from models.invoice import Invoice
+from models.trip import Trip
+
+# All helpers run inside the caller's session, so the rollup changes commit
+# (or roll back) together with the payment/trip write that caused them.
+
+def payment_year():
+    return cast(func.strftime('%Y', Payment.payment_date), Integer)
+
+
+def payment_month():
+    return cast(func.strftime('%m', Payment.payment_date), Integer)
+
+
+def grouped_payments(*criteria):
+    return db.session.query(
+        payment_year().label('year'),
+        payment_month().label('month'),
+        Trip.destination,
+        func.sum(Payment.amount).label('total'),
+        func.count(Payment.id).label('count')
+    ).select_from(Payment)\
+     .join(Invoice, Payment.invoice_id == Invoice.id)\
+     .join(Trip, Invoice.trip_id == Trip.id)\
+     .filter(*criteria)\
+     .group_by('year', 'month', Trip.destination)
+
+
+# ----------------------------
+# ➕➖ Incremental maintenance
+# ----------------------------
+def apply_delta(year, month, destination, amount, count):
+    stmt = sqlite_insert(RevenueRollup).values(
+        year=year,
+        month=month,
+        destination=destination,
+        total_revenue=amount,
+        payment_count=count
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['year', 'month', 'destination'],
+        set_={
+            'total_revenue': RevenueRollup.total_revenue + stmt.excluded.total_revenue,
+            'payment_count': RevenueRollup.payment_count + stmt.excluded.payment_count
+        }
+    )
+    db.session.execute(stmt)
+
+
+def add_payments(*criteria):
+    for row in grouped_payments(*criteria).all():
+        apply_delta(row.year, row.month, row.destination, row.total, row.count)
+
+
+def remove_payments(*criteria):
+    rows = grouped_payments(*criteria).all()
+    for row in rows:
+        apply_delta(row.year, row.month, row.destination, -row.total, -row.count)
+    if rows:
+        RevenueRollup.query.filter(RevenueRollup.payment_count <= 0).delete(synchronize_session=False)
+
+
+# ----------------------------
+# 🔁 Full rebuild
+# ----------------------------
+def rebuild():
+    RevenueRollup.query.delete(synchronize_session=False)
+    db.session.execute(insert(RevenueRollup).from_select(
+        ['year', 'month', 'destination', 'total_revenue', 'payment_count'],
+        grouped_payments().statement
+    ))
+    return RevenueRollup.query.count()
+
+
+def ensure_populated():
+    # A freshly created rollup table on a database that already has payments
+    if RevenueRollup.query.first() is None and Payment.query.first() is not None:
+        rebuild()
+        db.session.commit()
+        return True
+    return False
@@ -0,0 +1,43 @@
+from sqlalchemy import Date, DateTime, String, select, type_coerce
+from extensions import db
+
+# Read-only lists skip the ORM: a Core select of exactly the serialized
+# columns returns plain Row tuples (no identity map, no attribute
+# instrumentation) and a RowSerializer turns each into its JSON dict with a
+# single zip. SQLite stores dates as ISO text, which already is their JSON
+# form, so Date columns are selected as text rather than parsed into date
+# objects and str()'d back.
+
+
+def iso_datetime(text):
+    # Stored 'YYYY-MM-DD HH:MM:SS.ffffff' -> datetime.isoformat() output
+    text = text.replace(' ', 'T', 1)
+    return text[:-7] if text.endswith('.000000') else text
+
+
+class RowSerializer:
+    def __init__(self, **fields):
+        # fields: JSON key -> column, in output order
+        self.keys = tuple(fields)
+        self.columns = []
+        self.converters = []
+        for index, (key, column) in enumerate(fields.items()):
+            if isinstance(column.type, (Date, DateTime)):
+                column = type_coerce(column, String)
+                if isinstance(fields[key].type, DateTime):
+                    self.converters.append((index, iso_datetime))
+            self.columns.append(column.label(key))
+
+    def select(self):
+        return select(*self.columns)
+
+    def __call__(self, row):
+        if self.converters:
+            row = list(row)
+            for index, convert in self.converters:
+                if row[index] is not None:
+                    row[index] = convert(row[index])
+        return dict(zip(self.keys, row))
+
+    def all(self, statement):
+        return [self(row) for row in db.session.execute(statement)]
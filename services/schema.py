@@ -0,0 +1,77 @@
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateColumn
+from extensions import db
+
+
+# ----------------------------
+# 🧱 In-place schema upgrades for existing crm.db files
+# ----------------------------
+# db.create_all() only creates missing tables; columns and indexes declared
+# later on an existing table have to be added explicitly. New NOT NULL
+# columns need a server_default so SQLite can ADD COLUMN them.
+def ensure_columns(engine=None):
+    engine = engine or db.engine
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+
+    with engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {col['name'] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                    connection.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {ddl}')
+                    added.append(f'{table.name}.{column.name}')
+
+    return added
+
+
+def ensure_indexes(engine=None):
+    engine = engine or db.engine
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    created = []
+
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {ix['name'] for ix in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda ix: ix.name):
+            if index.name not in existing:
+                index.create(bind=engine)
+                created.append(index.name)
+
+    if created:
+        # Without statistics SQLite may keep choosing an older, narrower index
+        with engine.begin() as connection:
+            for name in created:
+                connection.exec_driver_sql(f'ANALYZE {name}')
+
+    return created
+
+
+def create_schema():
+    # Missing tables first, then what upgrade_schema adds to existing files
+    # (the FTS index, rollups); safe to run on an up-to-date database
+    db.create_all()
+    return upgrade_schema()
+
+
+def upgrade_schema(engine=None):
+    from services import invoice_balance, revenue_rollup, search_index
+
+    changes = ensure_columns(engine)
+    if 'invoice.balance_due' in changes:
+        # Existing invoices: totals from their payments; hand-set statuses are kept
+        invoice_balance.recompute(update_status=False)
+        db.session.commit()
+        changes.append('invoice balances (backfilled)')
+    changes += ensure_indexes(engine)
+    if revenue_rollup.ensure_populated():
+        changes.append('revenue_rollup (rebuilt)')
+    if search_index.ensure_created():
+        changes.append('search_index (created)')
+    return changes
@@ -0,0 +1,175 @@
+from sqlalchemy import column, func, literal_column, select, table, text
+from sqlalchemy.exc import OperationalError
+from extensions import db
+
+# FTS5 table over client, trip and note text. The trigram tokenizer keeps the
+# old ilike('%value%') substring semantics (case-insensitive) while letting
+# SQLite answer from the index instead of scanning every row.
+CREATE_SQL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+    kind UNINDEXED,
+    ref_id UNINDEXED,
+    client_id UNINDEXED,
+    name, email, company, phone, destination, notes,
+    tokenize = 'trigram'
+)
+"""
+
+# rowid = ref_id * 4 + kind code, so a row can be replaced/deleted by rowid
+KIND_CODES = {'client': 1, 'trip': 2, 'note': 3}
+TEXT_COLUMNS = ('name', 'email', 'company', 'phone', 'destination', 'notes')
+MIN_TERM_LENGTH = 3  # trigram tokenizer cannot match anything shorter
+
+search_table = table(
+    'search_index',
+    column('rowid'), column('kind'), column('ref_id'), column('client_id'),
+    *(column(name) for name in TEXT_COLUMNS)
+)
+
+_available = {}  # engine URL -> whether that database has the table
+
+
+def rowid_for(kind, ref_id):
+    return ref_id * 4 + KIND_CODES[kind]
+
+
+# ----------------------------
+# 🧱 Setup
+# ----------------------------
+def is_available():
+    url = str(db.engine.url)
+    if url not in _available:
+        exists = db.session.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index'"
+        )).first()
+        _available[url] = exists is not None
+    return _available[url]
+
+
+def ensure_created():
+    if is_available():
+        return False
+    try:
+        db.session.execute(text(CREATE_SQL))
+    except OperationalError:
+        # SQLite built without FTS5 / trigram: searches fall back to ilike
+        db.session.rollback()
+        return False
+    _available[str(db.engine.url)] = True
+    rebuild()
+    db.session.commit()
+    return True
+
+
+def rebuild():
+    db.session.execute(text("DELETE FROM search_index"))
+    db.session.execute(text("""
+        INSERT INTO search_index (rowid, kind, ref_id, client_id, name, email, company, phone)
+        SELECT id * 4 + 1, 'client', id, id, name, email, company, phone FROM client
+    """))
+    db.session.execute(text("""
+        INSERT INTO search_index (rowid, kind, ref_id, client_id, destination, notes)
+        SELECT id * 4 + 2, 'trip', id, client_id, destination, notes FROM trip
+    """))
+    db.session.execute(text("""
+        INSERT INTO search_index (rowid, kind, ref_id, client_id, notes)
+        SELECT id * 4 + 3, 'note', id, client_id, note FROM client_note
+    """))
+    return db.session.execute(text("SELECT count(*) FROM search_index")).scalar()
+
+
+# ----------------------------
+# 🔄 Sync from write routes (same transaction as the write)
+# ----------------------------
+def upsert(kind, ref_id, client_id, **values):
+    if not is_available():
+        return
+    remove(kind, [ref_id])
+    db.session.execute(search_table.insert().values(
+        rowid=rowid_for(kind, ref_id), kind=kind, ref_id=ref_id, client_id=client_id, **values
+    ))
+
+
+def remove(kind, ref_ids):
+    if not is_available() or not ref_ids:
+        return
+    db.session.execute(search_table.delete().where(
+        search_table.c.rowid.in_([rowid_for(kind, ref_id) for ref_id in ref_ids])
+    ))
+
+
+def add_many(kind, rows):
+    # rows: dicts with ref_id, client_id and text columns, for new entities
+    if not is_available() or not rows:
+        return
+    db.session.execute(search_table.insert(), [
+        {'rowid': rowid_for(kind, row['ref_id']), 'kind': kind, **row} for row in rows
+    ])
+
+
+def index_client(client):
+    upsert('client', client.id, client.id,
+           name=client.name, email=client.email, company=client.company, phone=client.phone)
+
+
+def index_trip(trip):
+    upsert('trip', trip.id, trip.client_id, destination=trip.destination, notes=trip.notes)
+
+
+def index_note(note):
+    upsert('note', note.id, note.client_id, notes=note.note)
+
+
+def remove_client(client_id):
+    # Trips and notes go with the client through ON DELETE CASCADE
+    from models.trip import Trip
+    from models.client_note import ClientNote
+
+    if not is_available():
+        return
+    remove('trip', [row.id for row in db.session.query(Trip.id).filter(Trip.client_id == client_id)])
+    remove('note', [row.id for row in db.session.query(ClientNote.id).filter(ClientNote.client_id == client_id)])
+    remove('client', [client_id])
+
+
+# ----------------------------
+# 🔍 Queries
+# ----------------------------
+def quote_phrase(value):
+    return '"' + value.replace('"', '""') + '"'
+
+
+def build_match(column_filters):
+    # {'name': 'smi', 'email': 'gmail'} -> 'name : "smi" AND email : "gmail"'
+    return ' AND '.join(f'{name} : {quote_phrase(value)}' for name, value in column_filters.items())
+
+
+def is_indexable(value):
+    return is_available() and len(value) >= MIN_TERM_LENGTH
+
+
+def match_clause(expression):
+    return literal_column('search_index').op('MATCH')(expression)
+
+
+def matching_ids(kind, column_filters):
+    # Subquery of ref_ids for `Model.id.in_(...)`
+    return select(search_table.c.ref_id).where(
+        match_clause(build_match(column_filters)),
+        search_table.c.kind == kind
+    )
+
+
+def search(terms, kinds, limit):
+    phrases = [quote_phrase(term) for term in terms if len(term) >= MIN_TERM_LENGTH]
+    rank = func.bm25(literal_column('search_index')).label('rank')
+    snippet = func.snippet(literal_column('search_index'), -1, '[', ']', '...', 32).label('snippet')
+
+    query = select(
+        search_table.c.kind, search_table.c.ref_id, search_table.c.client_id, rank, snippet
+    ).where(
+        match_clause(' AND '.join(phrases)),
+        search_table.c.kind.in_(kinds)
+    ).order_by(rank).limit(limit)
+
+    return db.session.execute(query).all()
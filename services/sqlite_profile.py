@@ -0,0 +1,21 @@
+import sqlite3
+
+# Pragmas every connection gets regardless of profile
+BASE_PRAGMAS = {'foreign_keys': 'ON'}
+
+
+def profile_pragmas(config):
+    profile = config['SQLITE_PROFILE']
+    try:
+        return {**BASE_PRAGMAS, **config['SQLITE_PROFILES'][profile]}
+    except KeyError:
+        raise ValueError(f"Unknown SQLITE_PROFILE '{profile}', expected one of {sorted(config['SQLITE_PROFILES'])}")
+
+
+def apply_pragmas(dbapi_connection, pragmas):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    for name, value in pragmas.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
@@ -0,0 +1,81 @@
+import csv
+import zlib
+from io import StringIO
+from flask import Response, current_app, stream_with_context
+from sqlalchemy import Select
+from extensions import db
+
+
+# ----------------------------
+# 🌊 Streamed JSON array
+# ----------------------------
+def stream_json_array(query, serialize, batch_size=None):
+    # query: an ORM query or a Core select (rows.RowSerializer)
+    batch_size = batch_size or current_app.config['STREAM_BATCH_SIZE']
+    dumps = current_app.json.dumps
+
+    def generate():
+        yield '['
+        chunk = []
+        first = True
+        # yield_per keeps only one batch of rows alive at a time
+        if isinstance(query, Select):
+            rows = db.session.execute(query.execution_options(yield_per=batch_size))
+        else:
+            rows = query.yield_per(batch_size)
+        for row in rows:
+            chunk.append(('' if first else ',') + dumps(serialize(row)))
+            first = False
+            if len(chunk) >= batch_size:
+                yield ''.join(chunk)
+                chunk = []
+        if chunk:
+            yield ''.join(chunk)
+        yield ']'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+
+# ----------------------------
+# 📦 Keyset batches (constant memory scans)
+# ----------------------------
+def iter_keyset_batches(query, id_column, batch_size):
+    after_id = 0
+    while True:
+        batch = query.filter(id_column > after_id).order_by(id_column).limit(batch_size).all()
+        if not batch:
+            return
+        yield batch
+        after_id = getattr(batch[-1], id_column.key)
+
+
+# ----------------------------
+# 🧾 CSV in chunks of rows
+# ----------------------------
+def csv_chunks(header, rows, batch_size, progress=None):
+    output = StringIO()
+    writer = csv.writer(output)
+    writer.writerow(header)
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        writer.writerows(batch)
+        yield output.getvalue()
+        output.seek(0)
+        output.truncate(0)
+        if progress:
+            progress(len(batch))
+    if output.tell():
+        yield output.getvalue()  # header only: no rows
+
+
+# ----------------------------
+# 🗜️ On-the-fly gzip
+# ----------------------------
+def gzip_stream(chunks, level=6):
+    # wbits=31 writes a gzip header/trailer around the deflate stream
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
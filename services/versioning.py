@@ -0,0 +1,61 @@
+from flask import Response
+from sqlalchemy import select, update
+from extensions import db
+from models.client import Client
+from models.trip import Trip
+from models.invoice import Invoice
+from models.payment import Payment
+
+# Every read endpoint that serves an entity (or a list under it) derives a
+# strong ETag from that entity's version column. A write bumps the version
+# of the touched rows and of every ancestor whose responses embed them:
+# payment -> invoice -> trip -> client. `ids` may be a list or a subquery.
+
+
+def bump(model, criterion):
+    db.session.flush()
+    db.session.execute(
+        update(model).where(criterion).values(version=model.version + 1),
+        execution_options={'synchronize_session': False}
+    )
+
+
+def touch_clients(ids):
+    bump(Client, Client.id.in_(ids))
+
+
+def touch_trips(ids):
+    bump(Trip, Trip.id.in_(ids))
+    touch_clients(select(Trip.client_id).where(Trip.id.in_(ids)))
+
+
+def touch_invoices(ids):
+    bump(Invoice, Invoice.id.in_(ids))
+    touch_trips(select(Invoice.trip_id).where(Invoice.id.in_(ids)))
+
+
+def touch_payments(ids):
+    bump(Payment, Payment.id.in_(ids))
+    touch_invoices(select(Payment.invoice_id).where(Payment.id.in_(ids)))
+
+
+# ----------------------------
+# 🏷️ Conditional GET helpers
+# ----------------------------
+def etag_for(model, entity_id, scope):
+    # Single primary-key lookup; None when the entity does not exist
+    version = db.session.query(model.version).filter(model.id == entity_id).scalar()
+    if version is None:
+        return None
+    return f'{scope}-{entity_id}-v{version}'
+
+
+def not_modified(etag):
+    response = Response(status=304)
+    return with_etag(response, etag)
+
+
+def with_etag(response, etag):
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+@pytest.fixture
+def app(tmp_path):
+    from app import create_app
+    from config import Config
+    from extensions import db
+    from services import audit
+    from services.schema import create_schema
+
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'crm.db')
+        METRICS_DIR = str(tmp_path / 'metrics')
+        EXPORT_DIR = str(tmp_path / 'exports')
+        JWT_SECRET_KEY = 'test-jwt-secret-key-of-at-least-32-bytes'
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        create_schema()
+    yield app
+    audit.flush()
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def auth_headers(app):
+    from flask_jwt_extended import create_access_token
+
+    with app.app_context():
+        token = create_access_token(identity='1', additional_claims={'role': 'admin', 'username': 'test'})
+    return {'Authorization': f'Bearer {token}'}
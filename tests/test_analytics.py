@@ -0,0 +1,99 @@
+from datetime import date
+
+import pytest
+
+
+@pytest.fixture
+def store_data(app, auth_headers, monkeypatch):
+    from services import analytics
+
+    monkeypatch.setattr(analytics, '_store', None)  # one store per process, not per test database
+    client = app.test_client()
+    for c in range(3):
+        client.post('/clients', json={'name': f'Client {c}', 'email': f'c{c}@example.com', 'phone': '555-0100'},
+                    headers=auth_headers)
+        for t in range(2):
+            client.post('/trips', json={'client_id': c + 1, 'destination': f'City {t}', 'start_date': '2024-03-01',
+                                        'end_date': '2024-03-08', 'price': 1000}, headers=auth_headers)
+    for trip_id in range(1, 7):
+        client.post('/invoices', json={'trip_id': trip_id, 'issue_date': '2024-02-01', 'due_date': '2024-02-15',
+                                       'amount': 300}, headers=auth_headers)
+        for p in range(2):
+            client.post('/payments', json={'invoice_id': trip_id, 'amount': 100, 'payment_date': f'2024-0{p + 2}-10',
+                                           'payment_method': 'Card'}, headers=auth_headers)
+    return client
+
+
+def results(app):
+    from services import analytics
+
+    with app.app_context():
+        return (analytics.pivot(['destination'], column='month', agg='count'),
+                analytics.pivot(['client_id'], agg='sum'),
+                analytics.ar_aging(today=date(2024, 6, 1)))
+
+
+def fresh_results(app, monkeypatch):
+    from services import analytics
+
+    monkeypatch.setattr(analytics, '_store', None)
+    return results(app)
+
+
+def test_updates_and_deletes_patch_the_loaded_store(app, auth_headers, store_data, monkeypatch):
+    from services import analytics
+
+    client = store_data
+    results(app)
+    store = analytics._store
+
+    assert client.patch('/payments/1', json={'amount': 250}, headers=auth_headers).status_code == 200
+    assert client.patch('/trips/3', json={'destination': 'Lisbon', 'client_id': 3},
+                        headers=auth_headers).status_code == 200
+    assert client.patch('/clients/1', json={'name': 'Renamed'}, headers=auth_headers).status_code == 200
+    assert client.delete('/invoices/2', headers=auth_headers).status_code == 200
+    assert client.delete('/clients/2', headers=auth_headers).status_code == 200  # trips 3 and 4 cascade away
+
+    patched = results(app)
+    assert analytics._store is store  # patched, not reloaded
+    assert patched == fresh_results(app, monkeypatch)
+
+
+def test_reused_id_replaces_the_deleted_row(app, auth_headers, store_data, monkeypatch):
+    from services import analytics
+
+    client = store_data
+    results(app)
+    store = analytics._store
+
+    # The highest trip, invoice and payment ids are handed to the next rows once deleted
+    assert client.delete('/trips/6', headers=auth_headers).status_code == 200
+    client.post('/trips', json={'client_id': 1, 'destination': 'Oslo', 'start_date': '2024-05-01',
+                                'end_date': '2024-05-08', 'price': 500}, headers=auth_headers)
+    client.post('/invoices', json={'trip_id': 6, 'issue_date': '2024-05-01', 'due_date': '2024-05-15',
+                                   'amount': 500}, headers=auth_headers)
+    client.post('/payments', json={'invoice_id': 6, 'amount': 200, 'payment_date': '2024-05-02',
+                                   'payment_method': 'Cash'}, headers=auth_headers)
+
+    patched = results(app)
+    assert analytics._store is store
+    assert patched == fresh_results(app, monkeypatch)
+    assert 'Oslo' in {row['destination'] for row in patched[0]['data']}
+
+
+def test_insert_reusing_an_applied_delete_is_loaded(app, auth_headers, store_data, monkeypatch):
+    from services import analytics
+
+    client = store_data
+    results(app)
+    store = analytics._store
+
+    assert client.delete('/payments/12', headers=auth_headers).status_code == 200
+    results(app)  # the delete is applied: payment 12 is masked out
+    client.post('/payments', json={'invoice_id': 6, 'amount': 200, 'payment_date': '2024-05-02',
+                                   'payment_method': 'Cash'}, headers=auth_headers)  # gets id 12 again
+
+    patched = results(app)
+    assert analytics._store is store
+    assert patched == fresh_results(app, monkeypatch)
+    assert '2024-05' in patched[0]['column_labels']
@@ -0,0 +1,79 @@
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import event
+
+
+def add_client(db, name, trips, invoices_per_trip, payments_per_invoice, notes):
+    from models.client import Client
+    from models.client_note import ClientNote
+    from models.invoice import Invoice
+    from models.payment import Payment
+    from models.trip import Trip
+
+    client = Client(name=name, email=f'{name}@example.com', phone='555-0100')
+    db.session.add(client)
+    for n in range(notes):
+        db.session.add(ClientNote(client=client, note=f'note {n}', timestamp=datetime(2024, 1, 1, 12, n)))
+    for t in range(trips):
+        trip = Trip(client=client, destination=f'City {t}', start_date=date(2024, 3, 1),
+                    end_date=date(2024, 3, 8), price=1000.0)
+        db.session.add(trip)
+        for _ in range(invoices_per_trip):
+            invoice = Invoice(trip=trip, issue_date=date(2024, 2, 1), due_date=date(2024, 2, 15),
+                              amount=100.0 * payments_per_invoice, status='Paid')
+            db.session.add(invoice)
+            for _ in range(payments_per_invoice):
+                db.session.add(Payment(invoice=invoice, payment_date=date(2024, 2, 10), amount=100.0,
+                                       payment_method='Card'))
+    db.session.commit()
+    return client.id
+
+
+@pytest.fixture
+def clients(app):
+    from extensions import db
+
+    with app.app_context():
+        small = add_client(db, 'small', trips=1, invoices_per_trip=1, payments_per_invoice=1, notes=1)
+        large = add_client(db, 'large', trips=60, invoices_per_trip=3, payments_per_invoice=2, notes=10)
+    return small, large
+
+
+def count_statements(app, request):
+    # Statements on every engine (the export runs on the read-only one)
+    from extensions import db
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = request()
+    finally:
+        for engine in engines:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    assert response.status_code == 200
+    return len(statements), response
+
+
+@pytest.mark.parametrize('path', ['/clients/{}/details', '/clients/{}/details/export'])
+def test_query_count_does_not_grow_with_the_client_graph(app, auth_headers, clients, path):
+    client = app.test_client()
+    small, large = clients
+
+    small_count, _ = count_statements(app, lambda: client.get(path.format(small), headers=auth_headers))
+    large_count, response = count_statements(app, lambda: client.get(path.format(large), headers=auth_headers))
+
+    assert large_count == small_count
+    assert large_count <= 7  # client, notes, trips, invoices, payments (+ the ETag lookup)
+    if path.endswith('/details'):
+        body = response.get_json()
+        assert len(body['trips']) == 60
+        assert len(body['notes']) == 10
+        assert sum(len(invoice['payments']) for trip in body['trips'] for invoice in trip['invoices']) == 360
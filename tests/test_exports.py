@@ -0,0 +1,56 @@
+import os
+import socket
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+import pytest
+
+
+def add_job(app, user_id, pid):
+    from extensions import db
+    from models.export_job import ExportJob
+
+    with app.app_context():
+        job = ExportJob(user_id=user_id, export_type='ar-aging', filters='{}', format='csv', status='running',
+                        created_at=datetime.now(timezone.utc), worker_host=socket.gethostname(), worker_pid=pid)
+        db.session.add(job)
+        db.session.commit()
+        return job.id
+
+
+def headers_for(app, user_id):
+    from flask_jwt_extended import create_access_token
+
+    with app.app_context():
+        token = create_access_token(identity=user_id, additional_claims={'role': 'analyst', 'username': user_id})
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def test_jobs_of_a_stopped_worker_stop_counting(app, dead_pid):
+    from extensions import db
+    from models.export_job import ExportJob
+
+    app.config['EXPORT_MAX_PENDING'] = 1
+    orphan = add_job(app, '7', dead_pid)
+
+    response = app.test_client().post('/exports', json={'type': 'ar-aging'}, headers=headers_for(app, '8'))
+    assert response.status_code == 202
+    with app.app_context():
+        assert db.session.get(ExportJob, orphan).status == 'failed'
+
+
+def test_pending_exports_are_capped_per_user(app):
+    app.config['EXPORT_MAX_PENDING_PER_USER'] = 1
+    add_job(app, '7', os.getpid())  # still running in this process
+    client = app.test_client()
+
+    assert client.post('/exports', json={'type': 'ar-aging'}, headers=headers_for(app, '7')).status_code == 429
+    assert client.post('/exports', json={'type': 'ar-aging'}, headers=headers_for(app, '8')).status_code == 202
@@ -0,0 +1,31 @@
+def test_metrics_require_an_admin_token(app, auth_headers):
+    client = app.test_client()
+
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers=auth_headers).status_code == 200
+
+
+def test_loopback_is_trusted_only_when_enabled(app):
+    app.config['METRICS_ALLOW_LOCAL'] = True
+    client = app.test_client()
+
+    assert client.get('/metrics').status_code == 200
+    assert client.get('/metrics', headers={'X-Forwarded-For': '203.0.113.7'}).status_code == 401
+
+
+def test_forked_workers_write_their_own_snapshots(app):
+    import os
+    from services import metrics
+
+    with app.app_context():
+        metrics.flush()
+    pid = os.fork()
+    if pid == 0:  # a worker forked from the preloaded app
+        try:
+            metrics.flush()
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+
+    snapshots = [name for name in os.listdir(app.config['METRICS_DIR']) if name.endswith('.json')]
+    assert len(snapshots) == 2
@@ -0,0 +1,55 @@
+from datetime import date
+
+
+def test_one_claim_per_interval(app):
+    from extensions import db
+    from services import overdue
+
+    with app.app_context():
+        assert overdue.claim_run(600, at=1000)
+        db.session.commit()
+        assert not overdue.claim_run(600, at=1300)  # another worker, same interval
+        db.session.rollback()
+        assert overdue.claim_run(600, at=1600)
+        db.session.commit()
+
+
+def test_sweep_marks_past_due_pending_invoices(app, auth_headers):
+    from extensions import db
+    from models.invoice import Invoice
+    from services import overdue
+
+    client = app.test_client()
+    client.post('/clients', json={'name': 'A', 'email': 'a@example.com', 'phone': '555-0100'}, headers=auth_headers)
+    client.post('/trips', json={'client_id': 1, 'destination': 'Paris', 'start_date': '2024-03-01',
+                                'end_date': '2024-03-08', 'price': 1000}, headers=auth_headers)
+    for due_date, status in (('2024-02-15', 'Pending'), ('2024-02-15', 'Paid'), ('2024-06-15', 'Pending')):
+        client.post('/invoices', json={'trip_id': 1, 'issue_date': '2024-02-01', 'due_date': due_date,
+                                       'amount': 100, 'status': status}, headers=auth_headers)
+
+    with app.app_context():
+        assert overdue.run_sweep(today=date(2024, 3, 1)) == 1
+        assert overdue.run_sweep(today=date(2024, 3, 1)) == 0
+        statuses = [status for (status,) in db.session.query(Invoice.status).order_by(Invoice.id)]
+    assert statuses == ['Overdue', 'Paid', 'Pending']
+
+
+def test_summary_counts_unswept_past_due_invoices_as_overdue(app, auth_headers):
+    from extensions import db
+    from models.invoice import Invoice
+
+    client = app.test_client()
+    client.post('/clients', json={'name': 'A', 'email': 'a@example.com', 'phone': '555-0100'}, headers=auth_headers)
+    client.post('/trips', json={'client_id': 1, 'destination': 'Paris', 'start_date': '2024-03-01',
+                                'end_date': '2024-03-08', 'price': 1000}, headers=auth_headers)
+    for due_date in ('2099-02-15', '2099-06-15'):
+        client.post('/invoices', json={'trip_id': 1, 'issue_date': '2024-02-01', 'due_date': due_date,
+                                       'amount': 100}, headers=auth_headers)
+    with app.app_context():
+        # Invoice 1 passes its due date; no sweep runs
+        db.session.query(Invoice).filter(Invoice.id == 1).update({'due_date': date(2024, 2, 15)})
+        db.session.commit()
+
+    body = client.get('/reports/invoice-summary', headers=auth_headers).get_json()
+    assert body['overdue_invoice_ids'] == [1]
+    assert body['pending_invoice_ids'] == [2]
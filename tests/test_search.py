@@ -0,0 +1,24 @@
+import pytest
+
+
+@pytest.fixture
+def client(app):
+    from services import search_index
+
+    with app.app_context():
+        if not search_index.is_available():
+            pytest.skip('this SQLite build has no FTS5 trigram tokenizer')
+    return app.test_client()
+
+
+def test_limit_must_be_positive(app, client, auth_headers):
+    for name in ('Paris One', 'Paris Two', 'Paris Three'):
+        response = client.post('/clients', json={'name': name, 'email': f"{name.split()[1]}@example.com",
+                                                 'phone': '555-0100'}, headers=auth_headers)
+        assert response.status_code == 201
+
+    assert len(client.get('/search?q=paris&limit=1', headers=auth_headers).get_json()) == 1
+    assert len(client.get('/search?q=paris', headers=auth_headers).get_json()) == 3
+    for limit in ('0', '-1'):
+        response = client.get(f'/search?q=paris&limit={limit}', headers=auth_headers)
+        assert response.status_code == 400